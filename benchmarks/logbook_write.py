@@ -0,0 +1,64 @@
+"""Benchmark the overhead of `LogBook.write` (without any logger).
+
+Usage: python benchmarks/logbook_write.py [--num_writes 20000]
+
+The overhead is measured for a flat metric log and for a nested config
+log. For reference, the overhead of deep-copying the log (which LogBook
+did before the logs were wrapped in a read-only mapping) is also shown.
+"""
+
+import argparse
+import copy
+import time
+import timeit
+from typing import Callable
+
+import numpy as np
+
+from ml_logger.logbook import LogBook, make_config
+from ml_logger.types import LogType
+
+FLAT_LOG: LogType = {"step": 1, "epoch": 0, "mode": "train", "loss": 0.5, "acc": 0.9}
+
+NESTED_LOG: LogType = {
+    **FLAT_LOG,
+    "config": {
+        "layers": list(range(64)),
+        "weights": [np.float32(index) for index in range(32)],
+        "optimizer": {"name": "adam", "lr": 0.001, "betas": [0.9, 0.999]},
+    },
+}
+
+
+def deepcopy_write(log: LogType, log_type: str = "metric") -> None:
+    """Copy the log the way LogBook did before the read-only logs."""
+    log = copy.deepcopy(log)
+    log["logbook_id"] = "0"
+    log["logbook_timestamp"] = time.strftime("%I:%M:%S%p %Z %b %d, %Y")
+    log["logbook_type"] = log_type
+
+
+def time_per_write(write: Callable[[LogType], None], log: LogType, n: int) -> float:
+    """Best (of 5) time per write in microseconds."""
+    timer = timeit.Timer(lambda: write(log))
+    return min(timer.repeat(repeat=5, number=n)) / n * 1e6
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--num_writes", type=int, default=20_000)
+    args = parser.parse_args()
+    logbook = LogBook(config=make_config())
+    for name, log in [("flat", FLAT_LOG), ("nested", NESTED_LOG)]:
+        deepcopy_time = time_per_write(deepcopy_write, log, args.num_writes)
+        write_time = time_per_write(logbook.write, log, args.num_writes)
+        print(
+            f"{name:6}  deepcopy {deepcopy_time:6.2f} us/write"
+            f"  LogBook.write {write_time:6.2f} us/write"
+        )
+    logbook.close()
+
+
+if __name__ == "__main__":
+    main()
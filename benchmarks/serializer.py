@@ -0,0 +1,75 @@
+"""Benchmark the serializers on writing and parsing the metric logs.
+
+Usage: python benchmarks/serializer.py [--num_logs 1000000]
+
+For every installed serializer, the metric logs are written to a file
+(one JSON line per log) and the file is parsed line by line.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from ml_logger.serializer import SERIALIZERS, get_serializer
+from ml_logger.types import LogType
+
+
+def make_logs(num_logs: int) -> List[LogType]:
+    """Make realistic metric logs (with numpy scalars)."""
+    return [
+        {
+            "step": step,
+            "epoch": step // 1000,
+            "mode": "train",
+            "loss": np.float32(1.0 / (step + 1)),
+            "accuracy": np.float64(0.5),
+            "lr": 0.001,
+            "num_examples": np.int64(step * 32),
+            "logbook_id": "0",
+            "logbook_timestamp": "10:21:14PM EST Mar 04, 2020",
+            "logbook_type": "metric",
+        }
+        for step in range(num_logs)
+    ]
+
+
+def benchmark(name: str, logs: List[LogType], file_path: str) -> Dict[str, float]:
+    """Time writing the logs to the file and parsing them back."""
+    serializer = get_serializer(name=name)
+    start_time = time.perf_counter()
+    with open(file_path, "w") as f:
+        for log in logs:
+            f.write(serializer.dumps(log) + "\n")
+    write_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    with open(file_path) as f:
+        for line in f:
+            serializer.loads(line)
+    read_time = time.perf_counter() - start_time
+    return {"write": write_time, "read": read_time}
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--num_logs", type=int, default=1_000_000)
+    args = parser.parse_args()
+    logs = make_logs(num_logs=args.num_logs)
+    with tempfile.TemporaryDirectory() as dir_path:
+        file_path = os.path.join(dir_path, "metric_log.jsonl")
+        for name in SERIALIZERS:
+            try:
+                times = benchmark(name=name, logs=logs, file_path=file_path)
+            except ImportError:
+                print(f"{name:8} not installed")
+                continue
+            print(f"{name:8} write {times['write']:6.2f}s  read {times['read']:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
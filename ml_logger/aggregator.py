@@ -0,0 +1,245 @@
+"""Implementation of the LogAggregator class.
+
+LogAggregator starts a process that owns the loggers (filesystem, wandb,
+tensorboard, etc) of a LogBook config and writes the logs that the client
+LogBooks send to it, so that many processes can log to the same backends
+(eg one wandb run or one log file) without opening them in every process:
+
+    aggregator = LogAggregator(config=make_config(logger_dir="logs"))
+    # in every (producer) process
+    logbook = LogBook(
+        make_config(
+            id=str(rank),
+            write_to_console=False,
+            aggregator_address=aggregator.address,
+            batch_size=100,
+        )
+    )
+    ...
+    logbook.close()
+    # once the producers are closed
+    aggregator.close()
+
+The producers send the logs over a `multiprocessing.connection` (a Unix
+socket by default), one message per batch. The logs of a producer are
+written in the order they were sent. The logs of different producers are
+interleaved in the order they are received.
+
+"""
+
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import weakref
+from multiprocessing import get_context
+from multiprocessing.connection import Client, Connection, Listener
+from multiprocessing.process import BaseProcess
+from multiprocessing.synchronize import Event
+from typing import Any, List, Optional, Set, Tuple
+
+from ml_logger.logbook import make_loggers
+from ml_logger.logger.base import Logger as LoggerType
+from ml_logger.types import ConfigType
+
+MessageType = Tuple[Connection, Optional[Tuple[str, Any]]]
+
+
+def _read_messages(
+    connection: Connection, messages: "queue.Queue[MessageType]"
+) -> None:
+    """Put the messages of a connection in the queue, in order.
+
+    `(connection, None)` is put in the queue when the connection is closed.
+    """
+    try:
+        while True:
+            messages.put((connection, connection.recv()))
+    except (EOFError, OSError):
+        messages.put((connection, None))
+
+
+def _accept_connections(
+    listener: Listener, messages: "queue.Queue[MessageType]"
+) -> None:
+    """Accept the connections and read every connection on its own thread."""
+    while True:
+        try:
+            connection = listener.accept()
+        except OSError:
+            # the listener is closed.
+            return
+        threading.Thread(
+            target=_read_messages, args=(connection, messages), daemon=True
+        ).start()
+
+
+def _write_logs(loggers: List[LoggerType], logs: List[Any]) -> Optional[str]:
+    """Write the logs to the loggers and return the (first) error, if any."""
+    error = None
+    for logger in loggers:
+        try:
+            logger.write_batch(logs=logs)
+        except Exception as e:
+            error = error or repr(e)
+    return error
+
+
+def _flush_loggers(loggers: List[LoggerType], close: bool = False) -> Optional[str]:
+    """Flush (or close) the loggers and return the (first) error, if any."""
+    error = None
+    for logger in loggers:
+        try:
+            if close:
+                logger.close()
+            else:
+                logger.flush()
+        except Exception as e:
+            error = error or repr(e)
+    return error
+
+
+def _run_aggregator(
+    config: ConfigType,
+    address: Any,
+    queue_size: int,
+    shutdown_timeout: float,
+    ready: Event,
+) -> None:
+    """Write the logs received from the clients (in the aggregator process)."""
+    loggers = make_loggers(config)
+    listener = Listener(address)
+    # the queue is bounded so that the slow loggers block the clients (the
+    # socket buffers fill up) instead of growing the memory.
+    messages: "queue.Queue[MessageType]" = queue.Queue(maxsize=queue_size)
+    threading.Thread(
+        target=_accept_connections, args=(listener, messages), daemon=True
+    ).start()
+    ready.set()
+    error: Optional[str] = None
+    connections: Set[Connection] = set()
+    shutdown_connection: Optional[Connection] = None
+    deadline = 0.0
+    while shutdown_connection is None or (connections and time.time() < deadline):
+        try:
+            connection, message = messages.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        if message is None:
+            connections.discard(connection)
+            connection.close()
+            continue
+        connections.add(connection)
+        kind, payload = message
+        if kind == "logs":
+            error = error or _write_logs(loggers, payload)
+        elif kind == "flush":
+            error = error or _flush_loggers(loggers)
+            connection.send(("flushed", error))
+            error = None
+        elif kind == "shutdown":
+            # the logs sent (by the clients) before the shutdown are still
+            # written, till the clients close or the timeout expires.
+            connections.discard(connection)
+            shutdown_connection = connection
+            deadline = time.time() + shutdown_timeout
+    listener.close()
+    error = error or _flush_loggers(loggers, close=True)
+    shutdown_connection.send(("closed", error))
+    shutdown_connection.close()
+
+
+def _shutdown(
+    process: BaseProcess, address: Any, temp_dir: Optional[str]
+) -> Optional[str]:
+    """Stop the aggregator process and return its (first) error, if any.
+
+    This function does not reference the LogAggregator so that it can be
+    used as the finalizer of the LogAggregator.
+    """
+    error = None
+    if process.is_alive():
+        with Client(address) as connection:
+            connection.send(("shutdown", None))
+            _, error = connection.recv()
+        process.join()
+    if temp_dir is not None:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    return error
+
+
+class LogAggregator:
+    """Process that writes the logs of many (client) LogBooks to the loggers."""
+
+    def __init__(
+        self,
+        config: ConfigType,
+        address: Optional[Any] = None,
+        queue_size: int = 1000,
+        shutdown_timeout: float = 10.0,
+    ):
+        """Initialise the aggregator and start its process.
+
+        Args:
+            config (ConfigType): LogBook config (refer
+                `ml_logger.logbook.make_config`) of the loggers that the
+                aggregator writes to. The loggers are created in the
+                aggregator process.
+            address (Optional[Any], optional): Address to listen on (refer
+                `multiprocessing.connection.Listener`), eg the path of a
+                Unix socket. If None, a Unix socket is created in a
+                (private) temporary directory. Defaults to None.
+            queue_size (int, optional): Maximum number of messages (batches
+                of logs) that can be waiting to be written. Once the queue
+                is full, the clients block. Defaults to 1000.
+            shutdown_timeout (float, optional): When the aggregator is
+                closed, it keeps writing the logs of the connected clients
+                till they close, for at most these many seconds. Defaults
+                to 10.0.
+
+        Raises:
+            RuntimeError: If the aggregator process fails to start.
+        """
+        temp_dir = None
+        if address is None:
+            temp_dir = tempfile.mkdtemp(prefix="ml_logger_")
+            address = os.path.join(temp_dir, "aggregator.sock")
+        self.address = address
+        context = get_context("spawn")
+        ready = context.Event()
+        self._process = context.Process(
+            target=_run_aggregator,
+            args=(config, address, queue_size, shutdown_timeout, ready),
+            daemon=True,
+        )
+        self._process.start()
+        while not ready.wait(timeout=0.1):
+            if not self._process.is_alive():
+                if temp_dir is not None:
+                    shutil.rmtree(temp_dir, ignore_errors=True)
+                raise RuntimeError(
+                    "The aggregator process exited with the code "
+                    f"{self._process.exitcode} before it started."
+                )
+        # The finalizer stops the process when the aggregator is garbage
+        # collected or when the interpreter exits (whichever is first).
+        self._finalizer = weakref.finalize(
+            self, _shutdown, self._process, address, temp_dir
+        )
+
+    def close(self) -> None:
+        """Write the pending logs, close the loggers and stop the process.
+
+        Close the client LogBooks first: the logs that the clients send
+        after this method returns are not written.
+
+        Raises:
+            RuntimeError: If the aggregator failed to write some logs.
+        """
+        if not self._finalizer.alive:
+            return
+        error = self._finalizer()
+        if error is not None:
+            raise RuntimeError(f"The aggregator failed to write the logs: {error}")
@@ -0,0 +1,239 @@
+"""Reduce the metric logs of the ranks of a distributed job before writing.
+
+In data-parallel training, every rank computes the same metrics. With
+`rank_reduce_address` set (refer `ml_logger.logbook.make_config`), the
+LogBook of every rank other than 0 sends its metric logs (over a Unix
+socket, without GPUs) to the LogBook of rank 0, which reduces the n-th
+metric log of every rank into one log and writes it to its loggers. So
+the loggers get one log (instead of `world_size` logs) per step, with
+the mean (sum, min or max) of the values across the ranks.
+
+The ranks should write the same metric logs, in the same order (like the
+collectives of `torch.distributed`). A reduced log is written once every
+rank has sent its log, so it can be written after the other logs (config,
+metadata, etc) that rank 0 writes later. The other logs of the other ranks
+are not written.
+
+"""
+
+import collections
+import threading
+import time
+from multiprocessing.connection import Connection, Listener
+from typing import Any, Deque, Dict, List, Optional, Type, Union
+
+from ml_logger.logger.base import Logger as LoggerType
+from ml_logger.metrics import AverageMetric, BaseMetric, MaxMetric, MinMetric, SumMetric
+from ml_logger.types import ReadOnlyLogType
+from ml_logger.writer import AsyncWriter, ClientWriter
+
+REDUCE_OPS: Dict[str, Type[BaseMetric]] = {
+    "mean": AverageMetric,
+    "sum": SumMetric,
+    "min": MinMetric,
+    "max": MaxMetric,
+}
+
+
+def check_reduce_op(reduce_op: str) -> None:
+    """Raise ValueError if the reduce op is not supported."""
+    if reduce_op not in REDUCE_OPS:
+        reduce_op_string = ", ".join(REDUCE_OPS)
+        raise ValueError(
+            f"reduce_op should be one of {reduce_op_string}. Got {reduce_op}"
+        )
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def reduce_logs(
+    logs: List[ReadOnlyLogType],
+    reduce_ops: Optional[Dict[str, str]] = None,
+    default_reduce_op: Optional[str] = "mean",
+) -> ReadOnlyLogType:
+    """Reduce the (metric) logs of the ranks into one log.
+
+    Args:
+        logs (List[ReadOnlyLogType]): Logs to reduce, starting with the
+            log of rank 0.
+        reduce_ops (Optional[Dict[str, str]], optional): Mapping of the
+            keys to the reduce ops ("mean", "sum", "min" or "max") of
+            their (numeric) values. Defaults to None.
+        default_reduce_op (Optional[str], optional): Reduce op for the
+            float values of the other keys. The other values (eg `step`,
+            `mode`) are taken from the first log that has them. Defaults
+            to "mean".
+
+    Returns:
+        ReadOnlyLogType: Reduced log
+    """
+    reduce_ops = reduce_ops or {}
+    reduced_log: Dict[str, Any] = {}
+    for log in logs:
+        for key, value in log.items():
+            reduced_log.setdefault(key, value)
+    for key, value in reduced_log.items():
+        reduce_op = reduce_ops.get(key)
+        if reduce_op is None and isinstance(value, float):
+            reduce_op = default_reduce_op
+        if reduce_op is None:
+            continue
+        metric = REDUCE_OPS[reduce_op](name=key)
+        for log in logs:
+            if _is_number(log.get(key)):
+                metric.update(log[key])
+        reduced_log[key] = metric.get_val()
+    return reduced_log
+
+
+class RankReduceWriter:
+    """Reduce the metric logs of all the ranks and write them (on rank 0)."""
+
+    def __init__(
+        self,
+        writers: List[Union[LoggerType, AsyncWriter, ClientWriter]],
+        address: Any,
+        world_size: int,
+        reduce_ops: Optional[Dict[str, str]] = None,
+        default_reduce_op: Optional[str] = "mean",
+        shutdown_timeout: float = 10.0,
+    ):
+        """Initialise the writer and listen for the other ranks.
+
+        Args:
+            writers (List[Union[LoggerType, AsyncWriter, ClientWriter]]):
+                Writers to write the reduced logs (and the other logs of
+                rank 0) to.
+            address (Any): Address to listen on (refer
+                `multiprocessing.connection.Listener`), eg the path of a
+                Unix socket.
+            world_size (int): Number of ranks.
+            reduce_ops (Optional[Dict[str, str]], optional): Mapping of
+                the keys to their reduce ops. Refer `reduce_logs`.
+                Defaults to None.
+            default_reduce_op (Optional[str], optional): Reduce op for the
+                float values of the other keys. Refer `reduce_logs`.
+                Defaults to "mean".
+            shutdown_timeout (float, optional): When the writer is closed,
+                it waits for the other ranks to close, for at most these
+                many seconds. Defaults to 10.0.
+        """
+        for reduce_op in [*(reduce_ops or {}).values(), default_reduce_op]:
+            if reduce_op is not None:
+                check_reduce_op(reduce_op)
+        self.writers = writers
+        self.world_size = world_size
+        self.reduce_ops = reduce_ops
+        self.default_reduce_op = default_reduce_op
+        self.shutdown_timeout = shutdown_timeout
+        # The metric logs (waiting to be reduced) of rank 0 and of every
+        # connection (ie rank). The lock guards the queues and the
+        # connections as the connections are read by their own threads.
+        self._logs: Deque[ReadOnlyLogType] = collections.deque()
+        self._rank_logs: Dict[Connection, Deque[ReadOnlyLogType]] = {}
+        self._num_closed = 0
+        self._lock = threading.Lock()
+        self._listener = Listener(address)
+        self._thread = threading.Thread(target=self._accept_connections, daemon=True)
+        self._thread.start()
+
+    def _accept_connections(self) -> None:
+        """Accept the connections of the other ranks."""
+        for _ in range(self.world_size - 1):
+            try:
+                connection = self._listener.accept()
+            except OSError:
+                # the listener is closed.
+                return
+            with self._lock:
+                self._rank_logs[connection] = collections.deque()
+            threading.Thread(
+                target=self._read_logs, args=(connection,), daemon=True
+            ).start()
+
+    def _read_logs(self, connection: Connection) -> None:
+        """Queue the metric logs that a rank sends, in order."""
+        try:
+            while True:
+                kind, payload = connection.recv()
+                if kind == "flush":
+                    connection.send(("flushed", None))
+                    continue
+                logs = [log for log in payload if log["logbook_type"] == "metric"]
+                with self._lock:
+                    self._rank_logs[connection].extend(logs)
+        except (EOFError, OSError):
+            with self._lock:
+                self._num_closed += 1
+            connection.close()
+
+    def _pop_reduced_logs(self, partial: bool = False) -> List[ReadOnlyLogType]:
+        """Reduce the logs that every rank has sent.
+
+        If `partial` is True, the logs that only some ranks have sent are
+        reduced too.
+        """
+        reduced_logs = []
+        with self._lock:
+            queues = [self._logs, *self._rank_logs.values()]
+            is_complete = len(queues) == self.world_size
+            while (partial and any(queues)) or (is_complete and all(queues)):
+                logs = [rank_logs.popleft() for rank_logs in queues if rank_logs]
+                reduced_logs.append(
+                    reduce_logs(logs, self.reduce_ops, self.default_reduce_op)
+                )
+        return reduced_logs
+
+    def _write_logs(self, logs: List[ReadOnlyLogType]) -> None:
+        """Write the reduced logs (and the other logs of rank 0)."""
+        with self._lock:
+            self._logs.extend(log for log in logs if log["logbook_type"] == "metric")
+        logs = [log for log in logs if log["logbook_type"] != "metric"]
+        logs.extend(self._pop_reduced_logs())
+        if logs:
+            for writer in self.writers:
+                writer.write_batch(logs=logs)
+
+    def write(self, log: ReadOnlyLogType) -> None:
+        """Write the log (or reduce it, if it is a metric log).
+
+        Args:
+            log (ReadOnlyLogType): Log to write
+        """
+        self._write_logs([log])
+
+    def write_batch(self, logs: List[ReadOnlyLogType]) -> None:
+        """Write a batch of logs (or reduce them, if they are metric logs).
+
+        Args:
+            logs (List[ReadOnlyLogType]): Logs to write
+        """
+        self._write_logs(logs)
+
+    def flush(self) -> None:
+        """Write the logs that every rank has sent and flush the writers.
+
+        The metric logs that some ranks have not sent yet are not written.
+        """
+        self._write_logs([])
+        for writer in self.writers:
+            writer.flush()
+
+    def close(self) -> None:
+        """Wait for the other ranks to close, write all the logs and close the writers.
+
+        The metric logs that only some ranks have sent (eg when a rank
+        crashed or did not close within `shutdown_timeout`) are reduced
+        over these ranks.
+        """
+        deadline = time.monotonic() + self.shutdown_timeout
+        while self._num_closed < self.world_size - 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self._listener.close()
+        logs = self._pop_reduced_logs(partial=True)
+        for writer in self.writers:
+            if logs:
+                writer.write_batch(logs=logs)
+            writer.close()
@@ -0,0 +1,453 @@
+"""Sidecar index for random access into the JSONL log files.
+
+The index of a log file `<file>` is stored (as JSON lines) in `<file>.idx`.
+The first line is a header and every other line describes a block of
+consecutive (complete) lines of the log file:
+
+    {"version": 1, "step_key": "step", "fingerprint": 2841062545}
+    {"start": 0, "end": 5120, "num_lines": 64, "min_step": 0, "max_step": 63}
+
+where [start, end) is the byte range of the block and min_step / max_step
+are the smallest / largest (numeric) values of the step key in the block
+(None if no line in the block has a numeric step). The fingerprint is the
+checksum of the first line of the log file and is used to detect that the
+log file was replaced.
+
+The blocks are contiguous and start at the beginning of the log file, but
+they can cover only a prefix of the file (eg the lines of the block that
+is still being filled by the logger). The readers parse the rest of the
+file as it is. The index is rebuilt (from the log file) if it is missing
+or stale.
+"""
+
+import os
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from ml_logger.serializer import get_serializer
+from ml_logger.types import NumType
+
+INDEX_VERSION = 1
+
+# Suffix of the sidecar index file.
+INDEX_SUFFIX = ".idx"
+
+# Default number of lines (of the log file) in one block of the index.
+DEFAULT_LINES_PER_BLOCK = 1024
+
+# Maximum number of bytes (of the first line) used to identify a log file.
+FINGERPRINT_SIZE = 1024
+
+BlockType = Dict[str, Any]
+ByteRangeType = Tuple[int, int]
+
+_serializer = get_serializer()
+
+
+def get_index_path(file_path: str) -> str:
+    """Get the path to the index of a log file."""
+    return file_path + INDEX_SUFFIX
+
+
+def is_index_file(file_path: Union[str, Path]) -> bool:
+    """Check if a file is the index of a log file."""
+    return str(file_path).endswith(INDEX_SUFFIX)
+
+
+def get_fingerprint(first_line: bytes) -> int:
+    """Get the fingerprint of a log file from (the bytes of) its first line.
+
+    The fingerprint is the same as the checksum that `ml_logger.parser`
+    uses to identify the log files.
+    """
+    return zlib.crc32(first_line[:FINGERPRINT_SIZE])
+
+
+def _get_step(log: object, step_key: str) -> Optional[NumType]:
+    """Get the (numeric) step of a log, if any."""
+    if not isinstance(log, dict):
+        return None
+    step = log.get(step_key)
+    if isinstance(step, (int, float)) and not isinstance(step, bool):
+        return step
+    return None
+
+
+class IndexBuilder:
+    """Split a sequence of lines into the blocks of an index."""
+
+    def __init__(self, lines_per_block: int, offset: int = 0):
+        """Split a sequence of lines into the blocks of an index.
+
+        Args:
+            lines_per_block (int): Number of lines in a block.
+            offset (int, optional): Offset (in the log file) of the first
+                line. Defaults to 0.
+        """
+        if lines_per_block < 1:
+            raise ValueError(
+                f"lines_per_block should be positive. Got {lines_per_block}"
+            )
+        self.lines_per_block = lines_per_block
+        self.offset = offset
+        self._block: Optional[BlockType] = None
+
+    def add_line(self, num_bytes: int, step: Optional[NumType]) -> Optional[BlockType]:
+        """Add a line to the current block.
+
+        Args:
+            num_bytes (int): Size of the line (including the newline).
+            step (Optional[NumType]): Step of the log in the line, if any.
+
+        Returns:
+            Optional[BlockType]: The block, if the line completes it.
+        """
+        block = self._block
+        if block is None:
+            block = self._block = {
+                "start": self.offset,
+                "end": self.offset,
+                "num_lines": 0,
+                "min_step": None,
+                "max_step": None,
+            }
+        self.offset += num_bytes
+        block["end"] = self.offset
+        block["num_lines"] += 1
+        if step is not None:
+            if block["min_step"] is None or step < block["min_step"]:
+                block["min_step"] = step
+            if block["max_step"] is None or step > block["max_step"]:
+                block["max_step"] = step
+        if block["num_lines"] >= self.lines_per_block:
+            self._block = None
+            return block
+        return None
+
+    def finish(self) -> Optional[BlockType]:
+        """Get the current (incomplete) block, if any, and start a new one."""
+        block, self._block = self._block, None
+        return block
+
+
+class Index:
+    """Index of a log file."""
+
+    def __init__(self, step_key: str, fingerprint: int, blocks: List[BlockType]):
+        """Index of a log file.
+
+        Args:
+            step_key (str): Key (in the logs) that the blocks are indexed by.
+            fingerprint (int): Fingerprint of the log file.
+            blocks (List[BlockType]): Contiguous blocks of the log file,
+                starting at offset 0.
+        """
+        self.step_key = step_key
+        self.fingerprint = fingerprint
+        self.blocks = blocks
+
+    @property
+    def end(self) -> int:
+        """Offset (in the log file) till which the file is indexed."""
+        return self.blocks[-1]["end"] if self.blocks else 0
+
+    def get_byte_ranges(
+        self, step_range: Tuple[NumType, NumType], file_size: int
+    ) -> List[ByteRangeType]:
+        """Get the byte ranges (of the log file) that can have the steps.
+
+        Args:
+            step_range (Tuple[NumType, NumType]): Smallest and largest
+                step (both inclusive).
+            file_size (int): Size of the log file. The lines after the
+                indexed blocks are always included.
+
+        Returns:
+            List[ByteRangeType]: Sorted, non-overlapping (start, end) byte
+                ranges.
+        """
+        min_step, max_step = step_range
+        byte_ranges: List[ByteRangeType] = []
+        for block in self.blocks:
+            if block["min_step"] is None or not (
+                block["min_step"] <= max_step and block["max_step"] >= min_step
+            ):
+                continue
+            if byte_ranges and byte_ranges[-1][1] == block["start"]:
+                byte_ranges[-1] = (byte_ranges[-1][0], block["end"])
+            else:
+                byte_ranges.append((block["start"], block["end"]))
+        if file_size > self.end:
+            if byte_ranges and byte_ranges[-1][1] == self.end:
+                byte_ranges[-1] = (byte_ranges[-1][0], file_size)
+            else:
+                byte_ranges.append((self.end, file_size))
+        return byte_ranges
+
+    def to_lines(self) -> List[str]:
+        """Serialize the index as JSON lines (without the newlines)."""
+        header = {
+            "version": INDEX_VERSION,
+            "step_key": self.step_key,
+            "fingerprint": self.fingerprint,
+        }
+        return [_serializer.dumps(header)] + [
+            _serializer.dumps(block) for block in self.blocks
+        ]
+
+
+def _read_first_line(file_path: str) -> bytes:
+    with open(file_path, "rb") as f:
+        return f.readline(FINGERPRINT_SIZE)
+
+
+def load_index(file_path: str, step_key: str) -> Optional[Index]:
+    """Load the index of a log file.
+
+    Args:
+        file_path (str): Path to the log file.
+        step_key (str): Key (in the logs) that the blocks should be
+            indexed by.
+
+    Returns:
+        Optional[Index]: The index or None if the index is missing, can
+            not be read or is stale (eg the log file was replaced or
+            truncated).
+    """
+    try:
+        with open(get_index_path(file_path), "rb") as f:
+            lines = [line for line in f if line.endswith(b"\n")]
+        file_size = os.path.getsize(file_path)
+        first_line = _read_first_line(file_path)
+    except OSError:
+        return None
+    if not lines:
+        return None
+    try:
+        header = _serializer.loads(lines[0])
+        blocks = [_serializer.loads(line) for line in lines[1:]]
+    except ValueError:
+        return None
+    if (
+        not isinstance(header, dict)
+        or header.get("version") != INDEX_VERSION
+        or header.get("step_key") != step_key
+        or header.get("fingerprint") != get_fingerprint(first_line)
+    ):
+        return None
+    index = Index(step_key=step_key, fingerprint=header["fingerprint"], blocks=blocks)
+    offset = 0
+    for block in blocks:
+        if not isinstance(block, dict) or block.get("start") != offset:
+            return None
+        offset = block["end"]
+    if index.end > file_size:
+        return None
+    return index
+
+
+def _index_lines(
+    file_path: str, builder: IndexBuilder, step_key: str
+) -> List[BlockType]:
+    """Index the complete lines of a log file, starting at `builder.offset`."""
+    blocks = []
+    with open(file_path, "rb") as f:
+        f.seek(builder.offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                # the line is still being written.
+                break
+            try:
+                log = _serializer.loads(line)
+            except ValueError:
+                log = None
+            block = builder.add_line(
+                num_bytes=len(line), step=_get_step(log, step_key=step_key)
+            )
+            if block is not None:
+                blocks.append(block)
+    block = builder.finish()
+    if block is not None:
+        blocks.append(block)
+    return blocks
+
+
+def build_index(
+    file_path: str, step_key: str, lines_per_block: int = DEFAULT_LINES_PER_BLOCK
+) -> Index:
+    """Build the index of a log file by reading the file.
+
+    A partially written line at the end of the file is not indexed.
+
+    Args:
+        file_path (str): Path to the log file.
+        step_key (str): Key (in the logs) to index the blocks by.
+        lines_per_block (int, optional): Number of lines in a block.
+            Defaults to DEFAULT_LINES_PER_BLOCK.
+
+    Returns:
+        Index: Index of the log file
+    """
+    index = Index(
+        step_key=step_key,
+        fingerprint=get_fingerprint(_read_first_line(file_path)),
+        blocks=[],
+    )
+    return update_index(
+        file_path=file_path, index=index, lines_per_block=lines_per_block
+    )
+
+
+def update_index(
+    file_path: str, index: Index, lines_per_block: int = DEFAULT_LINES_PER_BLOCK
+) -> Index:
+    """Index the (complete) lines that were appended after the index.
+
+    Args:
+        file_path (str): Path to the log file.
+        index (Index): Index of (a prefix of) the log file.
+        lines_per_block (int, optional): Number of lines in a block.
+            Defaults to DEFAULT_LINES_PER_BLOCK.
+
+    Returns:
+        Index: Index of the log file
+    """
+    builder = IndexBuilder(lines_per_block=lines_per_block, offset=index.end)
+    blocks = _index_lines(file_path=file_path, builder=builder, step_key=index.step_key)
+    return Index(
+        step_key=index.step_key,
+        fingerprint=index.fingerprint,
+        blocks=index.blocks + blocks,
+    )
+
+
+def write_index(file_path: str, index: Index) -> None:
+    """Write (replace) the index of a log file.
+
+    Args:
+        file_path (str): Path to the log file.
+        index (Index): Index to write
+    """
+    index_path = get_index_path(file_path)
+    temp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as f:
+        f.write("".join(f"{line}\n" for line in index.to_lines()))
+    os.replace(temp_path, index_path)
+
+
+def get_index(
+    file_path: str, step_key: str, lines_per_block: int = DEFAULT_LINES_PER_BLOCK
+) -> Index:
+    """Load the index of a log file, rebuilding it if it is missing or stale.
+
+    The rebuilt index is written to the sidecar file, if possible. Note
+    that the lines after the index (eg appended by a logger that does not
+    maintain the index) are not indexed.
+
+    Args:
+        file_path (str): Path to the log file.
+        step_key (str): Key (in the logs) that the blocks are indexed by.
+        lines_per_block (int, optional): Number of lines in a block, if the
+            index is rebuilt. Defaults to DEFAULT_LINES_PER_BLOCK.
+
+    Returns:
+        Index: Index of the log file
+    """
+    index = load_index(file_path=file_path, step_key=step_key)
+    if index is None:
+        index = build_index(
+            file_path=file_path, step_key=step_key, lines_per_block=lines_per_block
+        )
+        if index.blocks:
+            try:
+                write_index(file_path=file_path, index=index)
+            except OSError:
+                # eg the directory is read-only.
+                pass
+    return index
+
+
+class IndexWriter:
+    """Maintain the index of a log file while the lines are appended to it."""
+
+    def __init__(
+        self,
+        file_path: str,
+        step_key: str = "step",
+        lines_per_block: int = DEFAULT_LINES_PER_BLOCK,
+    ):
+        """Maintain the index of a log file while the lines are appended to it.
+
+        If the log file already has lines, its index is rebuilt (if it is
+        missing or stale) or updated (if some lines are not indexed). Only
+        one writer should append to a log file.
+
+        Args:
+            file_path (str): Path to the log file.
+            step_key (str, optional): Key (in the logs) to index the blocks
+                by. Defaults to "step".
+            lines_per_block (int, optional): Number of lines in a block.
+                Defaults to DEFAULT_LINES_PER_BLOCK.
+        """
+        self.step_key = step_key
+        file_size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+        offset = 0
+        if file_size > 0:
+            index = load_index(file_path=file_path, step_key=step_key)
+            if index is None:
+                index = build_index(file_path, step_key, lines_per_block)
+                write_index(file_path=file_path, index=index)
+            elif index.end < file_size:
+                index = update_index(file_path, index, lines_per_block)
+                write_index(file_path=file_path, index=index)
+            offset = index.end
+        self._builder = IndexBuilder(lines_per_block=lines_per_block, offset=offset)
+        # Number of bytes of a partially written line at the end of the log
+        # file. The next line is appended to it.
+        self._partial_line_size = file_size - offset
+        self._has_header = file_size > 0
+        self._file = open(get_index_path(file_path), "a" if file_size else "w")
+
+    def write(self, lines: List[bytes], logs: List[object]) -> None:
+        """Index the lines that were appended to the log file.
+
+        Args:
+            lines (List[bytes]): Lines (including the newlines).
+            logs (List[object]): Logs in the lines.
+        """
+        if not lines:
+            return
+        if not self._has_header:
+            index = Index(
+                step_key=self.step_key,
+                fingerprint=get_fingerprint(lines[0]),
+                blocks=[],
+            )
+            self._file.write(f"{index.to_lines()[0]}\n")
+            self._has_header = True
+        blocks = []
+        for line, log in zip(lines, logs):
+            num_bytes = len(line) + self._partial_line_size
+            self._partial_line_size = 0
+            block = self._builder.add_line(
+                num_bytes=num_bytes, step=_get_step(log, step_key=self.step_key)
+            )
+            if block is not None:
+                blocks.append(block)
+        self._write_blocks(blocks)
+
+    def _write_blocks(self, blocks: List[BlockType]) -> None:
+        if blocks:
+            self._file.write(
+                "".join(f"{_serializer.dumps(block)}\n" for block in blocks)
+            )
+            self._file.flush()
+
+    def close(self) -> None:
+        """Write the incomplete block and close the index."""
+        if not self._file.closed:
+            block = self._builder.finish()
+            if block is not None:
+                self._write_blocks([block])
+            self._file.close()
@@ -6,12 +6,63 @@ tensorboard, remote backends, etc.
 """
 
 import importlib
+import os
+import threading
 import time
-from copy import deepcopy
-from typing import Any, List, Optional
+import weakref
+from types import MappingProxyType
+from typing import Any, Dict, List, Optional, Union
 
+from ml_logger.distributed import RankReduceWriter
 from ml_logger.logger.base import Logger as LoggerType
-from ml_logger.types import ConfigType, KeyMapType, LogType, MetricType
+from ml_logger.types import ConfigType, KeyMapType, LogType, MetricType, ReadOnlyLogType
+from ml_logger.writer import AsyncWriter, ClientWriter
+
+WriterType = Union[LoggerType, AsyncWriter, ClientWriter, RankReduceWriter]
+
+# Format of the `logbook_timestamp` key. Eg 10:21:14PM EST Mar 04, 2020
+TIME_FORMAT = "%I:%M:%S%p %Z %b %d, %Y"
+
+
+def _close_writers(
+    writers: List[WriterType], batch: List[ReadOnlyLogType], lock: threading.Lock
+) -> None:
+    """Write the pending batch of logs and close the writers.
+
+    This function does not reference the LogBook so that it can be used
+    as the finalizer of the LogBook.
+
+    Args:
+        writers (List[WriterType]): Writers to close
+        batch (List[ReadOnlyLogType]): Pending batch of logs. It is
+            emptied in place.
+        lock (threading.Lock): Lock that guards the batch and the writers
+    """
+    with lock:
+        if batch:
+            logs = list(batch)
+            batch.clear()
+            for writer in writers:
+                writer.write_batch(logs=logs)
+        for writer in writers:
+            writer.close()
+
+
+def make_loggers(config: ConfigType) -> List[LoggerType]:
+    """Make the loggers of a LogBook config.
+
+    Args:
+        config (ConfigType): Config made by `make_config`
+
+    Returns:
+        List[LoggerType]: Loggers
+    """
+    loggers: List[LoggerType] = []
+    for logger_name, logger_config in config["loggers"].items():
+        logger_module = importlib.import_module(f"ml_logger.logger.{logger_name}")
+        logger_cls = getattr(logger_module, "Logger")
+        loggers.append(logger_cls(config=logger_config))
+    return loggers
 
 
 class LogBook:
@@ -27,9 +78,34 @@ class LogBook:
                 id: Id of the current LogBook instance. This
                     attribute is logged with each log and is useful
                     when multiple LogBook instances are needed (for
-                    example with multiprocessing)
+                    example with multiprocessing). To share the loggers
+                    across processes, every process sends its logs to
+                    one aggregator process (refer `aggregator_address`)
                 logger_file_path: Path to the file, where the logs
                     will be written
+                The logbook config can optionally have the following
+                keys:
+                async_write: Should the logs be written by background
+                    threads (one per logger)
+                queue_size: Maximum number of items (per logger) that
+                    can be waiting to be written in the async mode. An
+                    item is a log or, in the batched mode, a batch of logs
+                queue_policy: What to do when the queue is full in the
+                    async mode. One of "block", "drop_oldest" and
+                    "drop_newest"
+                batch_size: Number of logs to accumulate before writing
+                    them (as a batch) to the loggers
+                batch_timeout_ms: Maximum time (in milliseconds) a log
+                    can wait in the batch before the batch is written (by
+                    a timer thread)
+                aggregator_address: Address of the aggregator process
+                    (refer `ml_logger.aggregator`) to send the logs to
+                rank_reduce_address: Address that rank 0 listens on for
+                    the metric logs of the other ranks (refer
+                    `ml_logger.distributed`)
+                rank, world_size, rank_reduce_ops and
+                    rank_default_reduce_op: Rank of the current process,
+                    number of ranks and reduce ops of the metrics
                 The logbook config can be created using the make_config
                 method defined in ml_logger/logbook.py
             config (ConfigType): config corresponding to the ml experiment
@@ -37,39 +113,186 @@ class LogBook:
         """
         self.id = config["id"]
         self.logger_name = config["name"]
-        self.time_format = "%I:%M:%S%p %Z %b %d, %Y"  # 10:21:14PM EST Mar 04, 2020
-        self.loggers: List[LoggerType] = []
-        for logger_name, logger_config in config["loggers"].items():
-            logger_module = importlib.import_module(f"ml_logger.logger.{logger_name}")
-            logger_cls = getattr(logger_module, "Logger")
-            logger = logger_cls(config=logger_config)
-            self.loggers.append(logger)
-
-    def _process_log(self, log: LogType, log_type: str) -> LogType:
+        self.time_format = TIME_FORMAT
+        rank_reduce_address = config.get("rank_reduce_address", None)
+        rank = config.get("rank", 0)
+        world_size = config.get("world_size", 1)
+        if rank_reduce_address is not None and not 0 <= rank < world_size:
+            raise ValueError(
+                f"rank should be in the range [0, {world_size}). Got {rank}"
+            )
+        if rank_reduce_address is not None and rank != 0:
+            # the metric logs are sent to rank 0 and the other logs are
+            # written only by rank 0.
+            self.loggers: List[LoggerType] = []
+            self.writers: List[WriterType] = [
+                ClientWriter(address=rank_reduce_address, connect_timeout=60.0)
+            ]
+        else:
+            self.loggers = make_loggers(config)
+            self.writers = self._make_writers(config)
+        self.batch_size: int = config.get("batch_size", 1)
+        self.batch_timeout_ms: Optional[float] = config.get("batch_timeout_ms", None)
+        self._batch: List[ReadOnlyLogType] = []
+        # The lock guards the batch (and the writers in the batched mode)
+        # as the batch can be written by the timer thread.
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._error: Optional[BaseException] = None
+        self._is_closed = False
+        # The finalizer closes the writers when the LogBook is garbage
+        # collected or when the interpreter exits (whichever is first).
+        self._finalizer = weakref.finalize(
+            self, _close_writers, self.writers, self._batch, self._lock
+        )
+
+    def _make_writers(self, config: ConfigType) -> List[WriterType]:
+        """Make the writers that the logs are written to (in this process)."""
+        writers: List[Union[LoggerType, AsyncWriter, ClientWriter]]
+        if config.get("async_write", False):
+            writers = [
+                AsyncWriter(
+                    logger=logger,
+                    queue_size=config.get("queue_size", 1000),
+                    queue_policy=config.get("queue_policy", "block"),
+                )
+                for logger in self.loggers
+            ]
+        else:
+            writers = list(self.loggers)
+        if config.get("aggregator_address", None) is not None:
+            writers.append(ClientWriter(address=config["aggregator_address"]))
+        if config.get("rank_reduce_address", None) is not None:
+            return [
+                RankReduceWriter(
+                    writers=writers,
+                    address=config["rank_reduce_address"],
+                    world_size=config.get("world_size", 1),
+                    reduce_ops=config.get("rank_reduce_ops", None),
+                    default_reduce_op=config.get("rank_default_reduce_op", "mean"),
+                )
+            ]
+        return list(writers)
+
+    def _process_log(self, log: LogType, log_type: str) -> ReadOnlyLogType:
         """Process the log before writing.
 
+        The input log is not modified. A (shallow) copy of the log, with
+        the logbook keys added, is returned as a read-only mapping. The
+        read-only log is shared by all the loggers and each logger makes
+        its own copy of the keys that it needs to write.
+
         Args:
             log (LogType): Log to process
             log_type (str): Type of the log: config, metric, metadata, etc
 
         Returns:
-            LogType: Processed log
+            ReadOnlyLogType: Processed log
         """
-        log["logbook_id"] = self.id
-        log["logbook_timestamp"] = time.strftime(self.time_format)
-        log["logbook_type"] = log_type
-        return log
+        processed_log = {
+            **log,
+            "logbook_id": self.id,
+            "logbook_timestamp": time.strftime(self.time_format),
+            "logbook_type": log_type,
+        }
+        return MappingProxyType(processed_log)
 
     def write(self, log: LogType, log_type: str = "metric") -> None:
         """Write log to loggers.
 
+        Only the top-level dictionary of the log is copied. Nested values
+        (lists, dictionaries, etc) are shared with the loggers and should
+        not be modified after writing the log, specially in the async and
+        batched modes where the log is written later.
+
         Args:
             log (LogType): Log to write
             log_type (str, optional): Type of this log. Defaults to "metric".
+
+        Raises:
+            RuntimeError: If the LogBook is closed.
+        """
+        if self._is_closed:
+            raise RuntimeError("Can not write to a closed LogBook.")
+        self._raise_error()
+        processed_log = self._process_log(log, log_type)
+        if self.batch_size <= 1:
+            for writer in self.writers:
+                writer.write(log=processed_log)
+            return
+        with self._lock:
+            self._batch.append(processed_log)
+            if len(self._batch) >= self.batch_size or (
+                self.batch_timeout_ms is not None and self.batch_timeout_ms <= 0
+            ):
+                self._write_batch()
+            elif len(self._batch) == 1 and self.batch_timeout_ms is not None:
+                self._timer = threading.Timer(
+                    interval=self.batch_timeout_ms / 1000,
+                    function=self._write_batch_on_timeout,
+                )
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _write_batch_on_timeout(self) -> None:
+        """Write the batch when the batch timeout expires (in the timer thread)."""
+        with self._lock:
+            try:
+                self._write_batch()
+            except Exception as error:
+                if self._error is None:
+                    self._error = error
+
+    def _raise_error(self) -> None:
+        """Raise the (first) error encountered by the timer thread."""
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _write_batch(self) -> None:
+        """Write the accumulated batch of logs to the loggers.
+
+        The caller should hold `self._lock`.
         """
-        log = self._process_log(deepcopy(log), log_type)
-        for logger in self.loggers:
-            logger.write(log=log)
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._batch:
+            return
+        # the batch is emptied in place as it is shared with the finalizer.
+        logs = list(self._batch)
+        self._batch.clear()
+        for writer in self.writers:
+            writer.write_batch(logs=logs)
+
+    def flush(self) -> None:
+        """Flush the logs to all the loggers.
+
+        The accumulated batch (if any) is written to the loggers. In the
+        async mode, this method blocks till all the enqueued logs are
+        written.
+        """
+        with self._lock:
+            self._write_batch()
+            for writer in self.writers:
+                writer.flush()
+        self._raise_error()
+
+    def close(self) -> None:
+        """Write all the pending logs and close the loggers.
+
+        This method is also called when the LogBook is garbage collected
+        or when the interpreter exits.
+        """
+        if self._is_closed:
+            return
+        self._is_closed = True
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        self._finalizer()
+        self._raise_error()
 
     def write_config(self, config: ConfigType) -> None:
         """Write config to loggers.
@@ -114,6 +337,14 @@ def make_config(
     filename: Optional[str] = None,
     filename_prefix: str = "",
     create_multiple_log_files: bool = True,
+    flush_every_n_lines: int = 1,
+    flush_interval: Optional[float] = None,
+    serializer: Optional[str] = None,
+    index_every_n_lines: Optional[int] = None,
+    index_step_key: str = "step",
+    segment_max_bytes: Optional[int] = None,
+    segment_max_seconds: Optional[float] = None,
+    compression: Optional[str] = None,
     wandb_config: Optional[ConfigType] = None,
     wandb_key_map: Optional[KeyMapType] = None,
     wandb_prefix_key: Optional[str] = None,
@@ -124,6 +355,18 @@ def make_config(
     mlflow_key_map: Optional[KeyMapType] = None,
     mlflow_prefix_key: Optional[str] = None,
     mongo_config: Optional[ConfigType] = None,
+    columnar_config: Optional[ConfigType] = None,
+    async_write: bool = False,
+    queue_size: int = 1000,
+    queue_policy: str = "block",
+    batch_size: int = 1,
+    batch_timeout_ms: Optional[float] = None,
+    aggregator_address: Optional[str] = None,
+    rank_reduce_address: Optional[str] = None,
+    rank: Optional[int] = None,
+    world_size: Optional[int] = None,
+    rank_reduce_ops: Optional[Dict[str, str]] = None,
+    rank_default_reduce_op: Optional[str] = "mean",
 ) -> ConfigType:
     """Make the config that can be passed to the LogBook constructor.
 
@@ -150,6 +393,49 @@ def make_config(
             metric_log.jsonl etc. If False, only one file log.jsonl is
             created. This argument is ignored if `filename` is set.
             Defaults to True.
+        flush_every_n_lines (int, optional): The filesystem logger buffers
+            the log lines (per log file) and writes them to the file once
+            these many lines are buffered. Buffered lines are also written
+            on `flush()` and `close()`. Use `fsync()`, on the filesystem
+            logger, to sync the files to the disk. Defaults to 1.
+        flush_interval (Optional[float], optional): The filesystem logger
+            writes the buffered lines (using a timer thread) at most these
+            many seconds after they are buffered, even if nothing else is
+            logged. This argument is ignored if set to None. Defaults to
+            None.
+        serializer (Optional[str], optional): Name of the JSON serializer
+            that the filesystem logger uses. One of "orjson", "msgspec",
+            "ujson" and "json". If None, the fastest installed serializer
+            is used. All the serializers write NaN and Infinity as
+            `NaN` and `Infinity` (like the stdlib `json` module). Defaults
+            to None.
+        index_every_n_lines (Optional[int], optional): The filesystem
+            logger maintains a sidecar index (`<log file>.idx`) of every
+            log file, with the byte range and the smallest and largest
+            step of every block of these many lines. The metric parser
+            uses the index to parse a range of steps (refer
+            `ml_logger.index`). The index is not maintained if set to
+            None. Defaults to None.
+        index_step_key (str, optional): Key (in the logs) that the blocks
+            of the index are indexed by. Defaults to "step".
+        segment_max_bytes (Optional[int], optional): The filesystem logger
+            rotates the log files: the lines are written to numbered
+            segments (`<name>.<segment number>.jsonl`) and a new segment
+            is started once the current segment has these many bytes. The
+            parsers read the segments in order (refer
+            `ml_logger.segment`). Ignored if None. Defaults to None.
+        segment_max_seconds (Optional[float], optional): The filesystem
+            logger starts a new segment (of a log file) once the current
+            segment is these many seconds old. Ignored if None. Defaults
+            to None.
+        compression (Optional[str], optional): The filesystem logger
+            writes the log files as compressed segments
+            (`<name>.<segment number>.jsonl.<gz|zst>`), using "gzip" or
+            "zstd" (requires `zstandard`). Every flush writes a complete
+            gzip member (or zstd frame), so a crash loses at most the
+            lines that were being flushed. Use `flush_every_n_lines` to
+            compress more lines at a time. It can not be used with
+            `index_every_n_lines`. Defaults to None.
         wandb_config (Optional[ConfigType], optional): Config for the wandb
             logger. If None, wandb logger is not created. The config can
             have any parameters that wandb.init() methods accepts
@@ -221,6 +507,83 @@ def make_config(
                 (3) db: name of the db to use.
                 (4) collection: name of the collection to use.
             Defaults to None.
+        columnar_config (Optional[ConfigType], optional): config for the
+            columnar logger, that writes the metric logs as Arrow (or
+            Parquet) files. The metric parsers read these files directly
+            as dataframes. It requires `pyarrow`. The config supports the
+            following keys:
+                (1) logger_dir: directory to write the files to. Defaults
+                    to `logger_dir`.
+                (2) format: "arrow" (uncompressed, memory mapped while
+                    reading) or "parquet". Defaults to "arrow".
+                (3) filename_prefix: string to prefix before the names of
+                    the files. Defaults to "".
+                (4) rows_per_batch: number of logs in an Arrow record
+                    batch. Defaults to 1024.
+                (5) segment_max_bytes: the record batches are written as a
+                    new file (segment) once they take these many bytes.
+                    Defaults to 64 MiB.
+                (6) segment_max_seconds: the record batches are written
+                    as a new file at most these many seconds after the
+                    first log of the segment. Ignored if None. Defaults
+                    to None.
+            `flush()` also writes the record batches as a new file. If
+            None, the columnar logger is not created. Defaults to None.
+        async_write (bool, optional): Should the logs be written by
+            background threads (one per logger). When True, `write()` only
+            enqueues the log and returns immediately. Use `flush()` to
+            wait for the enqueued logs to be written. Pending logs are
+            written when the interpreter exits. Defaults to False.
+        queue_size (int, optional): Maximum number of items (per logger)
+            that can be waiting to be written. An item is a log or, when
+            `batch_size` is greater than 1, a batch of logs. This argument
+            is ignored if `async_write` is False. Defaults to 1000.
+        queue_policy (str, optional): What to do when the queue (of a
+            logger) is full. "block" waits for a free slot, "drop_oldest"
+            discards the oldest queued item and "drop_newest" discards the
+            incoming item. This argument is ignored if `async_write` is
+            False. Defaults to "block".
+        batch_size (int, optional): Number of logs to accumulate before
+            writing them, as a batch, to the loggers. Loggers use their
+            bulk APIs (if available) to write a batch. Logs are written
+            one at a time if `batch_size` is 1. Defaults to 1.
+        batch_timeout_ms (Optional[float], optional): Maximum time (in
+            milliseconds) a log can wait in the batch. A timer thread
+            writes the batch once this time has elapsed, even if it has
+            fewer than `batch_size` logs and no more logs are written. Use
+            `flush()` to write the batch right away. This argument is
+            ignored if set to None or if `batch_size` is 1.
+            Defaults to None.
+        aggregator_address (Optional[str], optional): Address (eg the path
+            of a Unix socket) of an aggregator process (refer
+            `ml_logger.aggregator.LogAggregator`). The LogBook sends the
+            logs (in batches of `batch_size` logs) to the aggregator, which
+            writes them to its loggers, in addition to the loggers of this
+            config (typically none). Use it to share the backends (eg one
+            wandb run or one log file) across many processes. If None, the
+            logs are not sent to an aggregator. Defaults to None.
+        rank_reduce_address (Optional[str], optional): Address (eg the
+            path of a Unix socket) that the LogBook of rank 0 listens on.
+            The LogBooks of the other ranks send their metric logs (in
+            batches of `batch_size` logs) to rank 0, which reduces the
+            n-th metric log of every rank into one log and writes it
+            (refer `ml_logger.distributed`). Only rank 0 creates the
+            loggers. If None, every rank writes its own logs. Defaults to
+            None.
+        rank (Optional[int], optional): Rank of the current process. If
+            None, the `RANK` environment variable (set by `torchrun`, etc)
+            is used, or 0 if it is not set. Defaults to None.
+        world_size (Optional[int], optional): Number of ranks. If None,
+            the `WORLD_SIZE` environment variable is used, or 1 if it is
+            not set. Defaults to None.
+        rank_reduce_ops (Optional[Dict[str, str]], optional): Mapping of
+            the keys (of the metric logs) to the reduce ops ("mean",
+            "sum", "min" or "max") of their values across the ranks.
+            Defaults to None.
+        rank_default_reduce_op (Optional[str], optional): Reduce op of the
+            float values of the other keys. The other values (eg `step`
+            or `mode`) are taken from rank 0. If None, only the keys in
+            `rank_reduce_ops` are reduced. Defaults to "mean".
 
     Returns:
         ConfigType: config to construct the LogBook
@@ -229,11 +592,18 @@ def make_config(
     if logger_dir is not None:
         loggers["filesystem"] = {
             "logger_dir": logger_dir,
-            "logger_name": name,
             "write_to_console": write_to_console,
             "filename": filename,
             "create_multiple_log_files": create_multiple_log_files,
             "filename_prefix": filename_prefix,
+            "flush_every_n_lines": flush_every_n_lines,
+            "flush_interval": flush_interval,
+            "serializer": serializer,
+            "index_every_n_lines": index_every_n_lines,
+            "index_step_key": index_step_key,
+            "segment_max_bytes": segment_max_bytes,
+            "segment_max_seconds": segment_max_seconds,
+            "compression": compression,
         }
         loggers["filesystem"]["logbook_key_map"] = None
         loggers["filesystem"]["logbook_key_prefix"] = None
@@ -258,5 +628,32 @@ def make_config(
         loggers[key]["logbook_key_map"] = None
         loggers[key]["logbook_key_prefix"] = None
 
-    config = {"id": id, "name": name, "loggers": loggers}
+    if columnar_config is not None:
+        key = "columnar"
+        loggers[key] = columnar_config
+        if logger_dir is not None:
+            loggers[key].setdefault("logger_dir", logger_dir)
+        loggers[key]["logbook_key_map"] = None
+        loggers[key]["logbook_key_prefix"] = None
+
+    config = {
+        "id": id,
+        "name": name,
+        "loggers": loggers,
+        "async_write": async_write,
+        "queue_size": queue_size,
+        "queue_policy": queue_policy,
+        "batch_size": batch_size,
+        "batch_timeout_ms": batch_timeout_ms,
+        "aggregator_address": aggregator_address,
+        "rank_reduce_address": rank_reduce_address,
+        "rank": rank if rank is not None else int(os.environ.get("RANK", 0)),
+        "world_size": (
+            world_size
+            if world_size is not None
+            else int(os.environ.get("WORLD_SIZE", 1))
+        ),
+        "rank_reduce_ops": rank_reduce_ops,
+        "rank_default_reduce_op": rank_default_reduce_op,
+    }
     return config
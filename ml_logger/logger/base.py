@@ -1,8 +1,8 @@
 """Abstract logger class."""
 from abc import ABCMeta, abstractmethod
-from typing import List, Optional
+from typing import Iterable, List, Optional
 
-from ml_logger.types import ConfigType, KeyMapType, LogType
+from ml_logger.types import ConfigType, KeyMapType, LogType, ReadOnlyLogType
 
 
 class Logger(metaclass=ABCMeta):
@@ -22,15 +22,39 @@ class Logger(metaclass=ABCMeta):
         self.key_prefix: Optional[str] = config.pop("logbook_key_prefix")
 
     @abstractmethod
-    def write(self, log: LogType) -> None:
+    def write(self, log: ReadOnlyLogType) -> None:
         """Interface to write the log.
 
+        The log is shared with the other loggers and must not be modified.
+        Use `_prepare_log_to_write` or `_prepare_metric_log_to_write` to
+        get a copy of the log that can be modified.
+
+        Args:
+            log (ReadOnlyLogType): Log to write
+        """
+        pass
+
+    def write_batch(self, logs: List[ReadOnlyLogType]) -> None:
+        """Interface to write a batch of logs.
+
+        Loggers that support bulk writes should override this method.
+        By default, the logs are written one at a time.
+
         Args:
-            log (LogType): Log to write
+            logs (List[ReadOnlyLogType]): Logs to write
         """
+        for log in logs:
+            self.write(log=log)
+
+    def flush(self) -> None:
+        """Flush the logs that are buffered by the logger."""
         pass
 
-    def _validate_metric_log(self, metric: LogType) -> None:
+    def close(self) -> None:
+        """Flush the buffered logs and release the resources held by the logger."""
+        self.flush()
+
+    def _validate_metric_log(self, metric: ReadOnlyLogType) -> None:
         """Valdiate that metric log has all the required keys."""
         if not all(key in metric for key in self.keys_to_check):
             key_string = ", ".join(self.keys_to_check)
@@ -38,7 +62,7 @@ class Logger(metaclass=ABCMeta):
                 f"One or more of the following keys missing in the metric: {key_string}"
             )
 
-    def _prepare_log_to_write(self, log: LogType) -> LogType:
+    def _prepare_log_to_write(self, log: ReadOnlyLogType) -> LogType:
         """Remove certain keys before writing the log.
 
         LogBook adds some keys to track metadata. These keys are filtered
@@ -49,28 +73,25 @@ class Logger(metaclass=ABCMeta):
 
         `self.keys_to_skip` informs what keys are to be skipped.
 
+        The input log is not modified. The returned log is a (shallow)
+        copy that the logger is free to modify.
+
         Args:
-            log (LogType): Log to write
+            log (ReadOnlyLogType): Log to write
 
         Returns:
             LogType: Log with certain keys removed
         """
-        processed_log: LogType = {}
-
         if self.keys_to_retain is None:
             # Retain all the keys, other than the ones to skip
-            processed_log = log
+            keys: Iterable[str] = log.keys()
         else:
             # Retain only the keys that need to be retained
-            for key in self.keys_to_retain:
-                processed_log[key] = log[key]
+            keys = self.keys_to_retain
 
-        for key in self.keys_to_skip:
-            if key in processed_log:
-                processed_log.pop(key)
-        return processed_log
+        return {key: log[key] for key in keys if key not in self.keys_to_skip}
 
-    def _prepare_metric_log_to_write(self, log: LogType) -> LogType:
+    def _prepare_metric_log_to_write(self, log: ReadOnlyLogType) -> LogType:
         """Map some keys to another keys, remove some keys before writing the log.
 
         Some loggers require specific keys to be present. User can specify
@@ -85,13 +106,18 @@ class Logger(metaclass=ABCMeta):
 
         `self.keys_to_skip` informs what keys are to be skipped.
 
+        The input log is not modified. The returned log is a (shallow)
+        copy that the logger is free to modify.
+
         Args:
-            log (LogType): Log to write
+            log (ReadOnlyLogType): Log to write
 
         Returns:
             LogType: Log with certain keys removed
         """
         if self.key_map is not None:
+            mapped_log = dict(log)
             for key, mapped_key in self.key_map.items():
-                log[mapped_key] = log.pop(key)
+                mapped_log[mapped_key] = mapped_log.pop(key)
+            log = mapped_log
         return self._prepare_log_to_write(log=log)
@@ -0,0 +1,280 @@
+"""Logger that writes the metric logs as columnar (Arrow or Parquet) files.
+
+The metric logs are flattened (using "." as the separator, like
+`pd.json_normalize`) and accumulated as Arrow tables of `rows_per_batch`
+rows. The tables are written as one segment file once they take more than
+`segment_max_bytes` bytes or once the segment is `segment_max_seconds`
+seconds old. The segments are named
+`<filename_prefix>metric_log.<segment number>.<arrow|parquet>` and are
+written atomically, so the readers only see complete segments.
+
+New keys (and values of a more general type, eg a float in an integer
+column) are supported: the tables of a segment are unified when the
+segment is written and the missing values are written as nulls.
+"""
+
+import glob
+import os
+import re
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from ml_logger.logger.base import Logger as BaseLogger
+from ml_logger.serializer import get_serializer
+from ml_logger.types import ConfigType, LogType, ReadOnlyLogType
+from ml_logger.utils import flatten_dict, make_dir
+
+# Mapping of the formats to the extensions of the segment files.
+FORMATS = {"arrow": ".arrow", "parquet": ".parquet"}
+
+_serializer = get_serializer()
+
+
+def _to_arrow_value(value: object) -> object:
+    """Convert the numpy values to python values."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return value
+
+
+def _to_array(values: List[object]) -> pa.Array:
+    """Convert the values (of a column) to an Arrow array.
+
+    Columns with values of incompatible types (eg strings and numbers) are
+    written as JSON strings.
+    """
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, ValueError):
+        return pa.array(
+            [None if value is None else _serializer.dumps(value) for value in values],
+            type=pa.string(),
+        )
+
+
+def rows_to_table(rows: List[LogType]) -> pa.Table:
+    """Convert the (flattened) rows to an Arrow table.
+
+    Args:
+        rows (List[LogType]): Rows to convert
+
+    Returns:
+        pa.Table: Table with one column per key (in the order the keys are
+            seen). Missing values are nulls.
+    """
+    keys: Dict[str, None] = {}
+    for row in rows:
+        keys.update(dict.fromkeys(row))
+    return pa.table({key: _to_array([row.get(key) for row in rows]) for key in keys})
+
+
+def concat_tables(tables: List[pa.Table]) -> pa.Table:
+    """Concatenate the tables, unifying their schemas.
+
+    Raises:
+        pa.ArrowInvalid: If the schemas can not be unified.
+    """
+    try:
+        return pa.concat_tables(tables, promote_options="permissive")
+    except TypeError:
+        # pyarrow < 14 only supports adding the missing columns.
+        return pa.concat_tables(tables, promote=True)
+
+
+class Logger(BaseLogger):
+    """Logger class that writes the metric logs as columnar files."""
+
+    def __init__(self, config: ConfigType):
+        """Initialise the Columnar Logger.
+
+        Args:
+            config (ConfigType): config to initialise the columnar logger.
+                It must have the following key: logger_dir. It can
+                optionally have the following keys: format,
+                filename_prefix, rows_per_batch, segment_max_bytes and
+                segment_max_seconds. Refer the documentation of
+                `ml_logger.logbook.make_config` for their description.
+        """
+        super().__init__(config=config)
+        keys_to_check = ["logger_dir"]
+        if not all(key in config for key in keys_to_check):
+            key_string = ", ".join(keys_to_check)
+            raise KeyError(
+                f"One or more of the following keys missing in the config: {key_string}"
+            )
+        self.format: str = config.get("format", "arrow")
+        if self.format not in FORMATS:
+            format_string = ", ".join(FORMATS)
+            raise ValueError(
+                f"format should be one of {format_string}. Got {self.format}"
+            )
+        self.logger_dir: str = config["logger_dir"]
+        self.filename_prefix: str = config.get("filename_prefix", "")
+        self.rows_per_batch: int = config.get("rows_per_batch", 1024)
+        self.segment_max_bytes: int = config.get("segment_max_bytes", 64 * 1024 * 1024)
+        self.segment_max_seconds: Optional[float] = config.get(
+            "segment_max_seconds", None
+        )
+        make_dir(self.logger_dir)
+        self._rows: List[LogType] = []
+        self._tables: List[pa.Table] = []
+        self._num_bytes = 0
+        self._segment_number = self._get_last_segment_number() + 1
+        # The lock guards the buffered rows and tables as the segment can be
+        # written by the timer thread.
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._error: Optional[BaseException] = None
+
+    def _get_segment_path(self, segment_number: int) -> str:
+        filename = (
+            f"{self.filename_prefix}metric_log.{segment_number:06d}"
+            f"{FORMATS[self.format]}"
+        )
+        return os.path.join(self.logger_dir, filename)
+
+    def _get_last_segment_number(self) -> int:
+        """Get the number of the last segment written in the logger dir."""
+        pattern = re.compile(
+            re.escape(f"{self.filename_prefix}metric_log.")
+            + r"(\d+)"
+            + re.escape(FORMATS[self.format])
+        )
+        segment_numbers = [-1]
+        for file_path in glob.iglob(os.path.join(glob.escape(self.logger_dir), "*")):
+            match = pattern.fullmatch(os.path.basename(file_path))
+            if match is not None:
+                segment_numbers.append(int(match.group(1)))
+        return max(segment_numbers)
+
+    def write(self, log: ReadOnlyLogType) -> None:
+        """Write the metric log to the current segment.
+
+        Logs of the other types are ignored.
+
+        Args:
+            log (ReadOnlyLogType): Log to write
+        """
+        self.write_batch(logs=[log])
+
+    def write_batch(self, logs: List[ReadOnlyLogType]) -> None:
+        """Write the metric logs to the current segment.
+
+        Args:
+            logs (List[ReadOnlyLogType]): Logs to write
+        """
+        self._raise_error()
+        rows = [
+            {
+                key: _to_arrow_value(value)
+                for key, value in flatten_dict(
+                    self._prepare_log_to_write(log), sep="."
+                ).items()
+            }
+            for log in logs
+            if log["logbook_type"] == "metric"
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._rows.extend(rows)
+            if len(self._rows) >= self.rows_per_batch:
+                self._add_table()
+                if self._num_bytes >= self.segment_max_bytes:
+                    self._write_segment()
+            has_logs = bool(self._rows or self._tables)
+            if (
+                has_logs
+                and self.segment_max_seconds is not None
+                and self._timer is None
+            ):
+                self._timer = threading.Timer(
+                    interval=self.segment_max_seconds,
+                    function=self._write_segment_on_timeout,
+                )
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _add_table(self) -> None:
+        """Convert the buffered rows to a table.
+
+        The caller should hold `self._lock`.
+        """
+        if self._rows:
+            table = rows_to_table(self._rows)
+            self._rows = []
+            self._tables.append(table)
+            self._num_bytes += table.nbytes
+
+    def _write_segment(self) -> None:
+        """Write the buffered rows and tables as a segment.
+
+        The caller should hold `self._lock`.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._add_table()
+        tables, self._tables = self._tables, []
+        self._num_bytes = 0
+        if not tables:
+            return
+        try:
+            tables = [concat_tables(tables)]
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # the tables are written as separate segments.
+            pass
+        for table in tables:
+            self._write_table(table)
+
+    def _write_table(self, table: pa.Table) -> None:
+        """Write the table as a new segment, atomically."""
+        segment_path = self._get_segment_path(self._segment_number)
+        self._segment_number += 1
+        # the temporary file is hidden from the globbing parsers.
+        temp_path = os.path.join(
+            self.logger_dir, f".{os.path.basename(segment_path)}.tmp"
+        )
+        if self.format == "parquet":
+            pq.write_table(table, temp_path)
+        else:
+            # the arrow files are not compressed so that they can be memory
+            # mapped (without copying the data).
+            with pa.OSFile(temp_path, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+        os.replace(temp_path, segment_path)
+
+    def _write_segment_on_timeout(self) -> None:
+        """Write the segment when it is `segment_max_seconds` old (in the timer thread)."""
+        with self._lock:
+            try:
+                self._write_segment()
+            except Exception as error:
+                if self._error is None:
+                    self._error = error
+
+    def _raise_error(self) -> None:
+        """Raise the (first) error encountered by the timer thread."""
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def flush(self) -> None:
+        """Write the buffered logs as a segment.
+
+        Note that every flush (with buffered logs) writes a new segment.
+        """
+        with self._lock:
+            self._write_segment()
+        self._raise_error()
+
+    def close(self) -> None:
+        """Write the buffered logs as a segment."""
+        self.flush()
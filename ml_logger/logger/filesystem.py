@@ -1,91 +1,270 @@
 """Functions to interface with the filesystem."""
 
-import json
-import logging
 import os
+import sys
+import threading
+import time
 from functools import partial
-from typing import Any, Optional
-
-import numpy as np
+from typing import Callable, Dict, List, Optional
 
+from ml_logger.index import IndexWriter
 from ml_logger.logger.base import Logger as BaseLogger
-from ml_logger.types import ConfigType, LogType
+from ml_logger.segment import get_compressor, get_last_segment_number, get_segment_path
+from ml_logger.serializer import to_json_serializable  # noqa: F401
+from ml_logger.serializer import Serializer, get_serializer
+from ml_logger.types import ConfigType, LogType, ReadOnlyLogType
 from ml_logger.utils import make_dir
 
 
-def to_json_serializable(val: Any) -> Any:
-    """Serialize values as json."""
-    if isinstance(val, np.floating):
-        return float(val)
-    if isinstance(val, np.integer):
-        return int(val)
-    return val
-
-
-def _serialize_log_to_json(log: LogType) -> str:
+def _serialize_log_to_json(log: LogType, serializer: Serializer) -> str:
     """Serialize the log into a JSON string.
 
     Args:
         log (LogType): Log to be serialized
+        serializer (Serializer): Serializer to use
 
     Returns:
         str: JSON serialized string
     """
-    return json.dumps(log, default=to_json_serializable)
+    return serializer.dumps(log)
+
+
+class JsonlWriter:
+    """Write JSON lines to a file using a userspace buffer."""
+
+    def __init__(
+        self,
+        file_path: str,
+        flush_every_n_lines: int = 1,
+        flush_interval: Optional[float] = None,
+        index_every_n_lines: Optional[int] = None,
+        index_step_key: str = "step",
+        segment_max_bytes: Optional[int] = None,
+        segment_max_seconds: Optional[float] = None,
+        compression: Optional[str] = None,
+    ):
+        """Write JSON lines to a file using a userspace buffer.
+
+        The lines are accumulated in a buffer and written to the file
+        (with a single system call) when the buffer is flushed.
+
+        If any of `segment_max_bytes`, `segment_max_seconds` and
+        `compression` is set, the lines are written to numbered segments
+        of the file (refer `ml_logger.segment`), starting with a new
+        segment. Every flush writes the buffered lines as one gzip member
+        (or zstd frame) of a compressed segment, so buffer the lines (eg
+        with `flush_every_n_lines`) for a better compression ratio.
 
+        Args:
+            file_path (str): Path to the file to append the lines to.
+            flush_every_n_lines (int, optional): Flush the buffer once it
+                has these many lines. Defaults to 1.
+            flush_interval (Optional[float], optional): Flush the buffer
+                (using a timer thread) at most these many seconds after a
+                line is added to it, even if no more lines are written.
+                This argument is ignored if set to None. Defaults to None.
+            index_every_n_lines (Optional[int], optional): Maintain a
+                sidecar index (refer `ml_logger.index`) of the file with
+                one block per these many lines. The index is not
+                maintained if set to None. Defaults to None.
+            index_step_key (str, optional): Key (in the logs) that the
+                blocks of the index are indexed by. Defaults to "step".
+            segment_max_bytes (Optional[int], optional): Start a new
+                segment once the current segment has these many bytes
+                (after compression). Ignored if None. Defaults to None.
+            segment_max_seconds (Optional[float], optional): Start a new
+                segment (on the next flush) once the current segment is
+                these many seconds old. Ignored if None. Defaults to None.
+            compression (Optional[str], optional): Compress the segments
+                using "gzip" or "zstd" (requires `zstandard`). The
+                compressed segments are not indexed. Defaults to None.
+        """
+        if compression is not None and index_every_n_lines is not None:
+            raise ValueError("The compressed log files can not be indexed.")
+        self.base_file_path = file_path
+        self.segment_max_bytes = segment_max_bytes
+        self.segment_max_seconds = segment_max_seconds
+        self.compression = compression
+        self._compress: Optional[Callable[[bytes], bytes]] = None
+        if compression is not None:
+            self._compress = get_compressor(compression)
+        self.is_segmented = (
+            segment_max_bytes is not None
+            or segment_max_seconds is not None
+            or compression is not None
+        )
+        self._segment_number = -1
+        if self.is_segmented:
+            self._segment_number = get_last_segment_number(file_path) + 1
+            file_path = get_segment_path(file_path, self._segment_number, compression)
+        self.file_path = file_path
+        self.index_every_n_lines = index_every_n_lines
+        self.index_step_key = index_step_key
+        self.flush_every_n_lines = flush_every_n_lines
+        self.flush_interval = flush_interval
+        self._buffer: List[bytes] = []
+        self._index: Optional[IndexWriter] = None
+        # logs in the buffered lines, used to maintain the index.
+        self._logs: List[object] = []
+        if index_every_n_lines is not None:
+            self._index = IndexWriter(
+                file_path=file_path,
+                step_key=index_step_key,
+                lines_per_block=index_every_n_lines,
+            )
+        # The lock guards the buffer and the file as the buffer can be
+        # flushed by the timer thread.
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._error: Optional[BaseException] = None
+        self._file = open(file_path, "ab", buffering=0)
+        self._segment_start_time = time.monotonic()
+        self._segment_size = os.fstat(self._file.fileno()).st_size
+
+    def _rotate(self) -> None:
+        """Close the current segment and start the next one.
+
+        The caller should hold `self._lock`.
+        """
+        self._file.close()
+        if self._index is not None:
+            self._index.close()
+        self._segment_number += 1
+        self.file_path = get_segment_path(
+            self.base_file_path, self._segment_number, self.compression
+        )
+        if self._index is not None and self.index_every_n_lines is not None:
+            self._index = IndexWriter(
+                file_path=self.file_path,
+                step_key=self.index_step_key,
+                lines_per_block=self.index_every_n_lines,
+            )
+        self._file = open(self.file_path, "ab", buffering=0)
+        self._segment_start_time = time.monotonic()
+        self._segment_size = 0
+
+    def _is_segment_full(self) -> bool:
+        if self._segment_size == 0:
+            return False
+        if (
+            self.segment_max_bytes is not None
+            and self._segment_size >= self.segment_max_bytes
+        ):
+            return True
+        return (
+            self.segment_max_seconds is not None
+            and time.monotonic() - self._segment_start_time >= self.segment_max_seconds
+        )
 
-def _get_logger(logger_name: str = "default_logger") -> logging.Logger:
-    """Get logger for a given name.
-
-    Args:
-        logger_name (str, optional): Name of the logger (to retrieve).
-            Defaults to "default_logger"
+    def write(self, line: str, log: Optional[ReadOnlyLogType] = None) -> None:
+        """Write a line to the file.
 
-    Returns:
-        logging.Logger: Logger object
-    """
-    return logging.getLogger(name=logger_name)
+        Args:
+            line (str): Line to write (without the newline character).
+            log (Optional[ReadOnlyLogType], optional): Log in the line. It
+                is used to maintain the index. Defaults to None.
+        """
+        self._raise_error()
+        with self._lock:
+            self._buffer.append(line.encode("utf-8") + b"\n")
+            if self._index is not None:
+                self._logs.append(log)
+            self._maybe_flush()
+
+    def write_lines(
+        self, lines: List[str], logs: Optional[List[ReadOnlyLogType]] = None
+    ) -> None:
+        """Write a list of lines to the file.
 
+        Args:
+            lines (List[str]): Lines to write (without the newline character).
+            logs (Optional[List[ReadOnlyLogType]], optional): Logs in the
+                lines. They are used to maintain the index. Defaults to None.
+        """
+        self._raise_error()
+        with self._lock:
+            self._buffer.extend(line.encode("utf-8") + b"\n" for line in lines)
+            if self._index is not None:
+                self._logs.extend(logs if logs is not None else [None] * len(lines))
+            self._maybe_flush()
 
-def _set_logger(
-    logger_file_path: str,
-    logger_name: str = "default_logger",
-    write_to_console: bool = True,
-) -> logging.Logger:
-    """Set logger to log to the given path.
+    def _maybe_flush(self) -> None:
+        """Flush the buffer (or schedule a flush) as per the flush policy.
 
-    Modified from https://docs.python.org/3/howto/logging-cookbook.html
+        The caller should hold `self._lock`.
+        """
+        if len(self._buffer) >= self.flush_every_n_lines:
+            self._flush()
+        elif self._buffer and self.flush_interval is not None and self._timer is None:
+            self._timer = threading.Timer(
+                interval=self.flush_interval, function=self._flush_on_timeout
+            )
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_on_timeout(self) -> None:
+        """Flush the buffer when the flush interval expires (in the timer thread)."""
+        with self._lock:
+            try:
+                if not self._file.closed:
+                    self._flush()
+            except Exception as error:
+                if self._error is None:
+                    self._error = error
+
+    def _raise_error(self) -> None:
+        """Raise the (first) error encountered by the timer thread."""
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _flush(self, fsync: bool = False) -> None:
+        """Write the buffered lines to the file.
+
+        The caller should hold `self._lock`.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._buffer:
+            if self.is_segmented and self._is_segment_full():
+                self._rotate()
+            lines, self._buffer = self._buffer, []
+            joined_lines = b"".join(lines)
+            if self._compress is not None:
+                joined_lines = self._compress(joined_lines)
+            self._segment_size += len(joined_lines)
+            data = memoryview(joined_lines)
+            while data:
+                num_bytes_written = self._file.write(data)
+                data = data[num_bytes_written:]
+            if self._index is not None:
+                # the lines are indexed once they are written.
+                logs, self._logs = self._logs, []
+                self._index.write(lines=lines, logs=logs)
+        if fsync:
+            os.fsync(self._file.fileno())
+
+    def flush(self, fsync: bool = False) -> None:
+        """Write the buffered lines to the file.
 
-    Args:
-        logger_file_path (str): Filepath to write to
-        logger_name (str, optional): Name of the logger to use. Defaults
-            to "default_logger"
-        write_to_console (bool, optional): Should write the logs to console.
-            Defaults to True
+        Args:
+            fsync (bool, optional): Should the file be synced to the disk
+                (using `os.fsync`). Defaults to False.
+        """
+        with self._lock:
+            self._flush(fsync=fsync)
+        self._raise_error()
 
-    Returns:
-        logging.Logger: Logger object
-    """
-    logger = logging.getLogger(name=logger_name)
-    logger.setLevel(level=logging.INFO)
-    # create file handler which logs all the messages
-    file_handler = logging.FileHandler(filename=logger_file_path)
-    file_handler.setLevel(level=logging.INFO)
-    # create formatter and add it to the handlers
-    formatter = logging.Formatter(fmt="%(message)s")
-    file_handler.setFormatter(fmt=formatter)
-    # add the handlers to the logger
-    logger.addHandler(hdlr=file_handler)
-
-    if write_to_console:
-        # create console handler with a higher log level
-        stream_handler = logging.StreamHandler()
-        stream_handler.setLevel(level=logging.INFO)
-        # add formatter to the handlers
-        stream_handler.setFormatter(fmt=formatter)
-        # add the handlers to the logger
-        logger.addHandler(hdlr=stream_handler)
-    return logger
+    def close(self) -> None:
+        """Flush the buffered lines and close the file."""
+        with self._lock:
+            if not self._file.closed:
+                self._flush()
+                self._file.close()
+                if self._index is not None:
+                    self._index.close()
+        self._raise_error()
 
 
 class Logger(BaseLogger):
@@ -96,14 +275,18 @@ class Logger(BaseLogger):
 
         Args:
             config (ConfigType): config to initialise the filesystem logger.
-                It must have two keys: logger_file_path and logger_name.
-                "logger_file_path" is the path to the file where the logs
-                will be written. "logger_name" is the name of the logger instance
+                It must have the following keys: logger_dir,
+                write_to_console, create_multiple_log_files, filename_prefix
+                and filename. It can optionally have the following keys:
+                flush_every_n_lines, flush_interval, serializer,
+                index_every_n_lines, index_step_key, segment_max_bytes,
+                segment_max_seconds and compression. Refer the
+                documentation of `ml_logger.logbook.make_config` for their
+                description.
         """
         super().__init__(config=config)
         keys_to_check = [
             "logger_dir",
-            "logger_name",
             "write_to_console",
             "create_multiple_log_files",
             "filename_prefix",
@@ -126,46 +309,113 @@ class Logger(BaseLogger):
             filename_prefix=config["filename_prefix"],
         )
 
-        if config["create_multiple_log_files"]:
+        self.write_to_console: bool = config["write_to_console"]
+        self.serializer = get_serializer(name=config.get("serializer", None))
+        _make_writer = partial(
+            JsonlWriter,
+            flush_every_n_lines=config.get("flush_every_n_lines", 1),
+            flush_interval=config.get("flush_interval", None),
+            index_every_n_lines=config.get("index_every_n_lines", None),
+            index_step_key=config.get("index_step_key", "step"),
+            segment_max_bytes=config.get("segment_max_bytes", None),
+            segment_max_seconds=config.get("segment_max_seconds", None),
+            compression=config.get("compression", None),
+        )
 
-            self.loggers = {
-                _type: _set_logger(
-                    logger_file_path=_get_logger_file_path(
-                        filename_suffix=f"{_type}_log"
-                    ),
-                    logger_name=config["logger_name"] + "_" + _type,
-                    write_to_console=config["write_to_console"],
+        self.writers: Dict[str, JsonlWriter]
+        if config["create_multiple_log_files"]:
+            self.writers = {
+                _type: _make_writer(
+                    file_path=_get_logger_file_path(filename_suffix=f"{_type}_log")
                 )
                 for _type in logger_types
             }
 
         else:
-            logger = _set_logger(
-                logger_file_path=_get_logger_file_path(filename_suffix="log"),
-                logger_name=config["logger_name"],
-                write_to_console=config["write_to_console"],
+            writer = _make_writer(
+                file_path=_get_logger_file_path(filename_suffix="log")
             )
-            self.loggers = {_type: logger for _type in logger_types}
+            self.writers = {_type: writer for _type in logger_types}
 
-    def write(self, log: LogType) -> None:
+    def write(self, log: ReadOnlyLogType) -> None:
         """Write the log to the filesystem.
 
         Args:
-            log (LogType): Log to write
+            log (ReadOnlyLogType): Log to write
         """
-        log_str = _serialize_log_to_json(log=self._prepare_log_to_write(log))
-        return self._write_log_to_fs(log_str=log_str, log_type=log["logbook_type"])
+        log_to_write = self._prepare_log_to_write(log)
+        log_str = _serialize_log_to_json(log=log_to_write, serializer=self.serializer)
+        return self._write_log_to_fs(
+            log_str=log_str, log_type=log["logbook_type"], log=log_to_write
+        )
+
+    def write_batch(self, logs: List[ReadOnlyLogType]) -> None:
+        """Write a batch of logs to the filesystem.
 
-    def _write_log_to_fs(self, log_str: str, log_type: str) -> None:
+        Args:
+            logs (List[ReadOnlyLogType]): Logs to write
+        """
+        log_strs: List[str] = []
+        writers: Dict[int, JsonlWriter] = {}
+        lines_per_writer: Dict[int, List[str]] = {}
+        logs_per_writer: Dict[int, List[ReadOnlyLogType]] = {}
+        for log in logs:
+            log_to_write = self._prepare_log_to_write(log)
+            log_str = _serialize_log_to_json(
+                log=log_to_write, serializer=self.serializer
+            )
+            log_strs.append(log_str)
+            writer = self._get_writer(log_type=log["logbook_type"])
+            if id(writer) not in writers:
+                writers[id(writer)] = writer
+                lines_per_writer[id(writer)] = []
+                logs_per_writer[id(writer)] = []
+            lines_per_writer[id(writer)].append(log_str)
+            logs_per_writer[id(writer)].append(log_to_write)
+        for key, writer in writers.items():
+            writer.write_lines(lines=lines_per_writer[key], logs=logs_per_writer[key])
+        if self.write_to_console:
+            sys.stderr.write("".join(f"{log_str}\n" for log_str in log_strs))
+
+    def _get_writer(self, log_type: str) -> JsonlWriter:
+        """Get the writer that writes the logs of the given type."""
+        if log_type not in self.writers:
+            log_type = "message"
+        return self.writers[log_type]
+
+    def _write_log_to_fs(
+        self, log_str: str, log_type: str, log: Optional[ReadOnlyLogType] = None
+    ) -> None:
         """Write log string to filesystem.
 
         Args:
             log_str (str): Log string to write
             log_type (str): Type of log to write
+            log (Optional[ReadOnlyLogType], optional): Log in the log string.
+                It is used to maintain the index. Defaults to None.
         """
-        if log_type not in self.loggers:
-            log_type = "message"
-        self.loggers[log_type].info(msg=log_str)
+        self._get_writer(log_type=log_type).write(line=log_str, log=log)
+        if self.write_to_console:
+            sys.stderr.write(f"{log_str}\n")
+
+    def _unique_writers(self) -> List[JsonlWriter]:
+        """Get the list of writers without duplicates."""
+        return list({id(writer): writer for writer in self.writers.values()}.values())
+
+    def flush(self) -> None:
+        """Write the buffered logs to the files."""
+        for writer in self._unique_writers():
+            writer.flush()
+
+    def fsync(self) -> None:
+        """Write the buffered logs to the files and sync the files to the disk."""
+        for writer in self._unique_writers():
+            writer.flush(fsync=True)
+
+    def close(self) -> None:
+        """Write the buffered logs and close the files."""
+        for writer in self._unique_writers():
+            writer.close()
 
 
 def get_logger_file_path(
@@ -1,9 +1,20 @@
 """Logger class that writes to mlflow."""
 
+import time
+from typing import Any, List, Optional, Tuple
+
 import mlflow
+from mlflow.entities import Metric, Param
+from mlflow.tracking import MlflowClient
 
+from ml_logger.logbook import TIME_FORMAT
 from ml_logger.logger.base import Logger as BaseLogger
-from ml_logger.types import ConfigType, LogType, MetricType
+from ml_logger.types import ConfigType, MetricType, ReadOnlyLogType
+
+# Maximum number of metrics and params that mlflow accepts in a single
+# `log_batch` call.
+MAX_METRICS_PER_BATCH = 1000
+MAX_PARAMS_PER_BATCH = 100
 
 
 class Logger(BaseLogger):
@@ -25,22 +36,24 @@ class Logger(BaseLogger):
         super().__init__(config=config)
         self.keys_to_skip = ["logbook_id", "logbook_type", "logbook_timestamp"]
         self.keys_to_check = ["step"]
+        self._logbook_timestamp: Optional[str] = None
+        self._timestamp_ms = 0
         mlflow.create_experiment(**config)
 
-    def write(self, log: LogType) -> None:
+    def write(self, log: ReadOnlyLogType) -> None:
         """Write the log to mlflow.
 
         Args:
-            log (LogType): Log to write
+            log (ReadOnlyLogType): Log to write
         """
         logbook_type = log["logbook_type"]
         if logbook_type == "metric":
-            log = self._prepare_metric_log_to_write(log=log)
-            self.write_metric(metric=log)
+            metric = self._prepare_metric_log_to_write(log=log)
+            self.write_metric(metric=metric)
         else:
-            log = self._prepare_log_to_write(log=log)
+            config = self._prepare_log_to_write(log=log)
             if logbook_type == "config":
-                self.write_config(config=log)
+                self.write_config(config=config)
             # Only metric logs and message logs are supported right now
 
     def write_metric(self, metric: MetricType) -> None:
@@ -49,12 +62,91 @@ class Logger(BaseLogger):
         Args:
             metric (MetricType): Metric to write
         """
+        step, metric = self._process_metric(metric=metric)
+        mlflow.log_metrics(metric, step)
+
+    def _process_metric(self, metric: MetricType) -> Tuple[Any, MetricType]:
+        """Validate the metric and separate the step from the metric values.
+
+        Args:
+            metric (MetricType): Metric to process
+
+        Returns:
+            Tuple[Any, MetricType]: Tuple of (step, metric values)
+        """
         self._validate_metric_log(metric)
         step = metric.pop("step")
         if self.key_prefix:
             prefix = {metric.pop(self.key_prefix)}
             metric = {f"{prefix}_{key}": value for key, value in metric.items()}
-        mlflow.log_metrics(metric, step)
+        return step, metric
+
+    def _get_timestamp_ms(self, log: ReadOnlyLogType) -> int:
+        """Get the time (in milliseconds) at which the log was written to the LogBook.
+
+        The time is parsed from the `logbook_timestamp` key (which has a
+        resolution of one second). The current time is returned if the key
+        is missing or can not be parsed.
+
+        Args:
+            log (ReadOnlyLogType): Log written to the LogBook
+
+        Returns:
+            int: Time in milliseconds since the epoch
+        """
+        logbook_timestamp = log.get("logbook_timestamp")
+        if not isinstance(logbook_timestamp, str):
+            return int(time.time() * 1000)
+        if logbook_timestamp != self._logbook_timestamp:
+            try:
+                parsed_time = time.strptime(logbook_timestamp, TIME_FORMAT)
+            except ValueError:
+                return int(time.time() * 1000)
+            # consecutive logs generally have the same timestamp.
+            self._logbook_timestamp = logbook_timestamp
+            self._timestamp_ms = int(time.mktime(parsed_time) * 1000)
+        return self._timestamp_ms
+
+    def write_batch(self, logs: List[ReadOnlyLogType]) -> None:
+        """Write a batch of logs to mlflow (using `log_batch`).
+
+        Every metric is timestamped with the time at which its log was
+        written to the LogBook (and not when the batch is written).
+
+        Args:
+            logs (List[ReadOnlyLogType]): Logs to write
+        """
+        metrics: List[Metric] = []
+        params: List[Param] = []
+        for log in logs:
+            logbook_type = log["logbook_type"]
+            if logbook_type == "metric":
+                timestamp = self._get_timestamp_ms(log=log)
+                step, metric = self._process_metric(
+                    metric=self._prepare_metric_log_to_write(log=log)
+                )
+                metrics.extend(
+                    Metric(key=key, value=value, timestamp=timestamp, step=step)
+                    for key, value in metric.items()
+                )
+            elif logbook_type == "config":
+                config = self._prepare_log_to_write(log=log)
+                params.extend(
+                    Param(key=key, value=str(value)) for key, value in config.items()
+                )
+            # Only metric logs and message logs are supported right now
+        if not metrics and not params:
+            return
+        run = mlflow.active_run()
+        if run is None:
+            run = mlflow.start_run()
+        client = MlflowClient()
+        for start in range(0, len(params), MAX_PARAMS_PER_BATCH):
+            end = start + MAX_PARAMS_PER_BATCH
+            client.log_batch(run_id=run.info.run_id, params=params[start:end])
+        for start in range(0, len(metrics), MAX_METRICS_PER_BATCH):
+            end = start + MAX_METRICS_PER_BATCH
+            client.log_batch(run_id=run.info.run_id, metrics=metrics[start:end])
 
     def write_config(self, config: ConfigType) -> None:
         """Write the config to mlflow.
@@ -1,10 +1,12 @@
 """Functions to interface with the mongodb."""
 
 
+from typing import List
+
 from pymongo import MongoClient
 
 from ml_logger.logger.base import Logger as BaseLogger
-from ml_logger.types import ConfigType, LogType
+from ml_logger.types import ConfigType, ReadOnlyLogType
 
 
 class Logger(BaseLogger):
@@ -36,11 +38,25 @@ class Logger(BaseLogger):
         self.client = MongoClient(config["host"], config["port"])
         self.collection = self.client[config["db"]][config["collection"]]
 
-    def write(self, log: LogType) -> None:
+    def write(self, log: ReadOnlyLogType) -> None:
         """Write the log to the filesystem.
 
         Args:
-            log (LogType): Log to write
+            log (ReadOnlyLogType): Log to write
         """
         if log["logbook_type"] in self.logger_types:
-            self.collection.insert_one(log)
+            # insert_one adds the `_id` key to the document, so a copy is
+            # inserted.
+            self.collection.insert_one(dict(log))
+
+    def write_batch(self, logs: List[ReadOnlyLogType]) -> None:
+        """Write a batch of logs to the mongodb (using `insert_many`).
+
+        Args:
+            logs (List[ReadOnlyLogType]): Logs to write
+        """
+        documents = [
+            dict(log) for log in logs if log["logbook_type"] in self.logger_types
+        ]
+        if documents:
+            self.collection.insert_many(documents)
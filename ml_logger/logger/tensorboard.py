@@ -5,7 +5,7 @@ from typing import Dict
 from tensorboardX import SummaryWriter
 
 from ml_logger.logger.base import Logger as BaseLogger
-from ml_logger.types import ConfigType, LogType, MetricType, NumType
+from ml_logger.types import ConfigType, MetricType, NumType, ReadOnlyLogType
 from ml_logger.utils import flatten_dict, make_dir
 
 
@@ -33,19 +33,20 @@ class Logger(BaseLogger):
         self.summary_writer = SummaryWriter(**config)
         self.keys_to_skip = ["logbook_id", "logbook_type", "logbook_timestamp"]
 
-    def write(self, log: LogType) -> None:
+    def write(self, log: ReadOnlyLogType) -> None:
         """Write the log to tensorboard.
 
         Args:
-            log (LogType): Log to write
+            log (ReadOnlyLogType): Log to write
         """
         logbook_type = log["logbook_type"]
         if logbook_type == "metric":
-            log = self._prepare_metric_log_to_write(log=log)
-            self.write_metric(metric=log)
+            metric = self._prepare_metric_log_to_write(log=log)
+            self.write_metric(metric=metric)
         else:
             if logbook_type == "config":
-                self.write_config(config=log)
+                # write_config pops keys from the config, so a copy is passed.
+                self.write_config(config=dict(log))
             # Only metric logs and message logs are supported right now
 
     def write_metric(self, metric: MetricType) -> None:
@@ -91,8 +92,9 @@ class Logger(BaseLogger):
 
         metric_dict: Dict[str, NumType] = {}
         if "metric_dict" in config:
-            metric_dict = config.pop("metric_dict")
-            metric_dict = self._prepare_metric_log_to_write(log=metric_dict)
+            metric_dict = self._prepare_metric_log_to_write(
+                log=config.pop("metric_dict")
+            )
 
         global_step = None
         if "global_step" in config:
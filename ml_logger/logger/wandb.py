@@ -3,7 +3,7 @@
 import wandb
 
 from ml_logger.logger.base import Logger as BaseLogger
-from ml_logger.types import ConfigType, LogType, MetricType
+from ml_logger.types import ConfigType, MetricType, ReadOnlyLogType
 
 
 class Logger(BaseLogger):
@@ -26,20 +26,20 @@ class Logger(BaseLogger):
         self.keys_to_check = []
         self.run = wandb.init(**config)
 
-    def write(self, log: LogType) -> None:
+    def write(self, log: ReadOnlyLogType) -> None:
         """Write log to wandb.
 
         Args:
-            log (LogType): Log to write
+            log (ReadOnlyLogType): Log to write
         """
         logbook_type = log["logbook_type"]
         if logbook_type == "metric":
-            log = self._prepare_metric_log_to_write(log=log)
-            self.write_metric(metric=log)
+            metric = self._prepare_metric_log_to_write(log=log)
+            self.write_metric(metric=metric)
         else:
-            log = self._prepare_log_to_write(log=log)
+            config = self._prepare_log_to_write(log=log)
             if logbook_type == "config":
-                self.write_config(config=log)
+                self.write_config(config=config)
             # Only metric logs and message logs are supported right now
 
     def write_metric(self, metric: MetricType) -> None:
@@ -1,14 +1,23 @@
 """Implementation of different type of metrics."""
 
 import operator
-from typing import Any, Iterable, Optional, Union
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import numpy as np
 
 from ml_logger.types import ComparisonOpType, LogType, NumType, ValueType
 
 
+def _to_vector(values: Any) -> np.ndarray:
+    """Convert a sequence, numpy array or (cpu) tensor-like buffer to a 1-d array."""
+    return np.asarray(values).reshape(-1)
+
+
 class BaseMetric:
     """Base Metric class. This class is not to be used directly."""
 
+    __slots__ = ("name", "val")
+
     def __init__(self, name: str):
         """All metrics extend this class.
 
@@ -34,6 +43,20 @@ class BaseMetric:
         """
         pass
 
+    def update_many(self, values: Any, counts: Optional[Any] = None) -> None:
+        """Update the metric using many values, in order.
+
+        Args:
+            values (Any): Values (a sequence, a numpy array or a (cpu)
+                tensor-like buffer, eg the per-sample losses of a batch)
+                to update the metric with
+            counts (Optional[Any], optional): Number of samples used to
+                compute every value. It is used only by the average (and
+                sum) metrics. Defaults to None.
+        """
+        for val in _to_vector(values).tolist():
+            self.update(val)
+
     def get_val(self) -> ValueType:
         """Get the current value of the metric."""
         return self.val
@@ -42,7 +65,14 @@ class BaseMetric:
         return str(self.get_val())
 
     def __repr__(self) -> str:
-        return f"{self.__class__} {self.__dict__}"
+        # the metrics do not have a `__dict__` as they define `__slots__`.
+        state = {
+            slot: getattr(self, slot)
+            for cls in reversed(type(self).__mro__)
+            for slot in getattr(cls, "__slots__", ())
+            if hasattr(self, slot)
+        }
+        return f"{self.__class__} {state}"
 
 
 class CurrentMetric(BaseMetric):
@@ -52,6 +82,8 @@ class CurrentMetric(BaseMetric):
         BaseMetric: Base metric class
     """
 
+    __slots__ = ()
+
     def __init__(self, name: str):
         super().__init__(name)
 
@@ -63,6 +95,18 @@ class CurrentMetric(BaseMetric):
         """
         self.val = val
 
+    def update_many(self, values: Any, counts: Optional[Any] = None) -> None:
+        """Set the metric value to the last of the values.
+
+        Args:
+            values (Any): Values (a sequence, a numpy array or a (cpu)
+                tensor-like buffer)
+            counts (Optional[Any], optional): This value is ignored
+        """
+        vector = _to_vector(values)
+        if vector.size:
+            self.val = vector[-1].item()
+
 
 class ConstantMetric(BaseMetric):
     """Metric to track one fixed value.
@@ -73,6 +117,8 @@ class ConstantMetric(BaseMetric):
         BaseMetric: Base metric class
     """
 
+    __slots__ = ()
+
     def __init__(self, name: str, val: ValueType):
         self.name = name
         self.val = val
@@ -89,6 +135,15 @@ class ConstantMetric(BaseMetric):
         """
         return None
 
+    def update_many(self, values: Any, counts: Optional[Any] = None) -> None:
+        """Do nothing for the constant metrics.
+
+        Args:
+            values (Any): These values are ignored
+            counts (Optional[Any], optional): This value is ignored
+        """
+        return None
+
 
 class ComparisonMetric(BaseMetric):
     """Metric to track the min/max value.
@@ -99,6 +154,8 @@ class ComparisonMetric(BaseMetric):
         BaseMetric: Base metric class
     """
 
+    __slots__ = ("_default_val", "comparison_op")
+
     def __init__(
         self, name: str, default_val: ValueType, comparison_op: ComparisonOpType
     ):
@@ -146,6 +203,8 @@ class MaxMetric(ComparisonMetric):
         ComparisonMetric: Comparison metric class
     """
 
+    __slots__ = ()
+
     def __init__(self, name: str):
         """Metric to track the max value.
 
@@ -158,6 +217,18 @@ class MaxMetric(ComparisonMetric):
             name=name, default_val=float("-inf"), comparison_op=operator.lt
         )
 
+    def update_many(self, values: Any, counts: Optional[Any] = None) -> None:
+        """Update the metric using the max of the values.
+
+        Args:
+            values (Any): Values (a sequence, a numpy array or a (cpu)
+                tensor-like buffer)
+            counts (Optional[Any], optional): This value is ignored
+        """
+        vector = _to_vector(values)
+        if vector.size:
+            self.update(vector.max().item())
+
 
 class MinMetric(ComparisonMetric):
     """Metric to track the min value.
@@ -168,6 +239,8 @@ class MinMetric(ComparisonMetric):
         ComparisonMetric: Comparison metric class
     """
 
+    __slots__ = ()
+
     def __init__(self, name: str):
         """Metric to track the min value.
 
@@ -178,6 +251,18 @@ class MinMetric(ComparisonMetric):
         """
         super().__init__(name=name, default_val=float("inf"), comparison_op=operator.gt)
 
+    def update_many(self, values: Any, counts: Optional[Any] = None) -> None:
+        """Update the metric using the min of the values.
+
+        Args:
+            values (Any): Values (a sequence, a numpy array or a (cpu)
+                tensor-like buffer)
+            counts (Optional[Any], optional): This value is ignored
+        """
+        vector = _to_vector(values)
+        if vector.size:
+            self.update(vector.min().item())
+
 
 class AverageMetric(BaseMetric):
     """Metric to track the average value.
@@ -188,6 +273,8 @@ class AverageMetric(BaseMetric):
         BaseMetric: Base metric class
     """
 
+    __slots__ = ("avg", "sum", "count")
+
     def __init__(self, name: str):
         self.name = name
         self.val: float
@@ -219,6 +306,32 @@ class AverageMetric(BaseMetric):
         self.count += n
         self.avg = self.sum / self.count
 
+    def update_many(self, values: Any, counts: Optional[Any] = None) -> None:
+        """Update the metric using many values, in one call.
+
+        This is the same as calling `update(val, n)` for every value (and
+        count), but the sums are computed by numpy.
+
+        Args:
+            values (Any): Values (a sequence, a numpy array or a (cpu)
+                tensor-like buffer, eg the per-sample losses of a batch)
+            counts (Optional[Any], optional): Number of samples used to
+                compute every value. If None, every value counts as one
+                sample. Defaults to None.
+        """
+        vector = _to_vector(values)
+        if not vector.size:
+            return
+        if counts is None:
+            self.sum += vector.sum().item()
+            self.count += vector.size
+        else:
+            count_vector = _to_vector(counts)
+            self.sum += np.dot(vector, count_vector).item()
+            self.count += count_vector.sum().item()
+        self.val = vector[-1].item()
+        self.avg = self.sum / self.count
+
     def get_val(self) -> float:
         """Get the current average value."""
         return self.avg
@@ -231,6 +344,8 @@ class SumMetric(AverageMetric):
         BaseMetric: Base metric class
     """
 
+    __slots__ = ()
+
     def __init__(self, name: str):
         super().__init__(name)
 
@@ -256,13 +371,16 @@ class MetricDict:
         for key in self._metrics_dict:
             self._metrics_dict[key].reset()
 
-    def update(self, metrics_dict: Union[LogType, "MetricDict"]) -> None:
+    def update(
+        self, metrics_dict: Union[LogType, "MetricDict", "ArrayMetricDict"]
+    ) -> None:
         """Update all the metrics using the current values.
 
         Args:
-            metrics_dict (Union[LogType, MetricDict]): Current value of metrics
+            metrics_dict (Union[LogType, MetricDict, ArrayMetricDict]):
+                Current value of metrics
         """
-        if isinstance(metrics_dict, MetricDict):
+        if isinstance(metrics_dict, (MetricDict, ArrayMetricDict)):
             metrics_dict = metrics_dict.to_dict()
         for key, val in metrics_dict.items():
             if key in self._metrics_dict:
@@ -281,3 +399,184 @@ class MetricDict:
             LogType: Metric data in as a dictionary
         """
         return {key: val.get_val() for key, val in self._metrics_dict.items()}
+
+
+# Rows of the state array of ArrayMetricDict.
+_VAL, _SUM, _COUNT, _MIN, _MAX = range(5)
+
+# Rows of the value array (ie the values returned by `get_val()`).
+_CURRENT_VALUE, _SUM_VALUE, _AVERAGE_VALUE, _MIN_VALUE, _MAX_VALUE = range(5)
+
+
+def _get_value_row(metric: BaseMetric) -> int:
+    """Get the row of the value array that has the value of a metric."""
+    if isinstance(metric, SumMetric):
+        return _SUM_VALUE
+    if isinstance(metric, AverageMetric):
+        return _AVERAGE_VALUE
+    if isinstance(metric, MinMetric):
+        return _MIN_VALUE
+    if isinstance(metric, MaxMetric):
+        return _MAX_VALUE
+    if type(metric) is CurrentMetric:
+        return _CURRENT_VALUE
+    raise ValueError(
+        "metric should be a CurrentMetric, ConstantMetric, MinMetric, "
+        f"MaxMetric, AverageMetric or SumMetric. Got {metric!r}"
+    )
+
+
+class ArrayMetricDict:
+    """Collection of metrics with the states stored in numpy arrays.
+
+    This class has the same interface as `MetricDict`, but the states
+    (val, sum, count, min and max) of all the metrics are stored in one
+    array, with a column (slot) per metric. The metrics are updated
+    together, with one array operation per state, so updating hundreds of
+    metrics does not call a method per metric.
+
+    The values of the (non-constant) metrics should be numeric and
+    `to_dict()` returns them as floats.
+    """
+
+    def __init__(self, metric_list: Iterable[BaseMetric]):
+        """Initialise the collection of metrics.
+
+        Args:
+            metric_list (Iterable[BaseMetric]): list of metrics to wrap
+                over. The metrics should be instances of CurrentMetric,
+                ConstantMetric, MinMetric, MaxMetric, AverageMetric or
+                SumMetric. Only their names (and the values of the
+                constant metrics) are used.
+
+        Raises:
+            ValueError: If a metric is of another type.
+        """
+        self._constants: LogType = {}
+        self.names: List[str] = []
+        value_rows = []
+        metric_list = list(metric_list)
+        self._order = [metric.name for metric in metric_list]
+        for metric in metric_list:
+            if isinstance(metric, ConstantMetric):
+                self._constants[metric.name] = metric.val
+            else:
+                value_rows.append(_get_value_row(metric))
+                self.names.append(metric.name)
+        # mapping of the (non-constant) metric names to their slots.
+        self.slots: Dict[str, int] = {
+            name: slot for slot, name in enumerate(self.names)
+        }
+        self._value_rows = np.array(value_rows, dtype=np.intp)
+        self._columns = np.arange(len(self.names))
+        self._default_states = np.zeros((5, len(self.names)))
+        self._default_states[_MIN] = np.inf
+        self._default_states[_MAX] = -np.inf
+        self._states = self._default_states.copy()
+
+    def reset(self) -> None:
+        """Reset all the metrics to default values."""
+        np.copyto(self._states, self._default_states)
+
+    def _update_slots(
+        self,
+        slots: Union[np.ndarray, slice],
+        values: np.ndarray,
+        counts: Union[np.ndarray, float],
+    ) -> None:
+        """Update the states of the slots (an index array or a slice)."""
+        states = self._states
+        states[_VAL, slots] = values
+        states[_SUM, slots] += values * counts
+        states[_COUNT, slots] += counts
+        states[_MIN, slots] = np.minimum(states[_MIN, slots], values)
+        states[_MAX, slots] = np.maximum(states[_MAX, slots], values)
+
+    def update(
+        self, metrics_dict: Union[LogType, MetricDict, "ArrayMetricDict"]
+    ) -> None:
+        """Update all the metrics using the current values.
+
+        Args:
+            metrics_dict (Union[LogType, MetricDict, ArrayMetricDict]):
+                Current value of metrics. Like `MetricDict`, the value of
+                an average (or sum) metric can be a `(val, n)` tuple. The
+                keys that are not (non-constant) metrics are ignored.
+        """
+        if isinstance(metrics_dict, (MetricDict, ArrayMetricDict)):
+            metrics_dict = metrics_dict.to_dict()
+        get_slot = self.slots.get
+        keys = [key for key in metrics_dict if key in self.slots]
+        if not keys:
+            return
+        slots = np.array([get_slot(key) for key in keys], dtype=np.intp)
+        values = [metrics_dict[key] for key in keys]
+        try:
+            array = np.array(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            # some values are `(val, n)` tuples (of different lengths).
+            array = None
+        if array is not None and array.ndim == 1:
+            self._update_slots(slots, array, 1.0)
+            return
+        counts = [
+            (val[1] if len(val) > 1 else 1) if isinstance(val, (tuple, list)) else 1
+            for val in values
+        ]
+        values = [val[0] if isinstance(val, (tuple, list)) else val for val in values]
+        self._update_slots(
+            slots,
+            np.array(values, dtype=np.float64),
+            np.array(counts, dtype=np.float64),
+        )
+
+    def update_array(
+        self, values: np.ndarray, counts: Optional[np.ndarray] = None
+    ) -> None:
+        """Update all the (non-constant) metrics using a vector of values.
+
+        Args:
+            values (np.ndarray): Current values of the metrics, in the
+                order of `self.names`
+            counts (Optional[np.ndarray], optional): Number of samples
+                used to compute the (average) values. If None, every value
+                counts as one sample. Defaults to None.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if values.shape != (len(self.names),):
+            raise ValueError(
+                f"values should have the shape ({len(self.names)},). "
+                f"Got {values.shape}"
+            )
+        self._update_slots(
+            slice(None),
+            values,
+            1.0 if counts is None else np.asarray(counts, dtype=np.float64),
+        )
+
+    def to_array(self) -> np.ndarray:
+        """Get the values of the (non-constant) metrics, in the order of `self.names`."""
+        states = self._states
+        count = states[_COUNT]
+        average = np.divide(
+            states[_SUM], count, out=np.zeros_like(count), where=count > 0
+        )
+        values = np.stack(
+            [states[_VAL], states[_SUM], average, states[_MIN], states[_MAX]]
+        )
+        return values[self._value_rows, self._columns]
+
+    def __str__(self) -> str:
+        return "\n".join([f"{key}: {val}" for key, val in self.to_dict().items()])
+
+    def to_dict(self) -> LogType:
+        """Convert the metrics into a dictionary for `LogBook`.
+
+        Returns:
+            LogType: Metric data in as a dictionary
+        """
+        metrics = dict(zip(self.names, self.to_array().tolist()))
+        if not self._constants:
+            return metrics
+        metrics.update(self._constants)
+        return {name: metrics[name] for name in self._order}
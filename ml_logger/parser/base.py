@@ -1,12 +1,202 @@
 """Base class that all parsers extend."""
 
+import os
 from abc import ABC
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from concurrent.futures import wait as wait_for_futures
 from pathlib import Path
-from typing import Dict, Iterator, Optional, Union
+from typing import (
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
+from ml_logger.parser.columnar import is_columnar_file
 from ml_logger.parser.utils import parse_json
+from ml_logger.segment import is_compressed_file, iterate_lines
 from ml_logger.types import LogType, ParseLineFunctionType
 
+EXECUTORS: Dict[str, Callable[..., Executor]] = {
+    "process": ProcessPoolExecutor,
+    "thread": ThreadPoolExecutor,
+}
+
+# Default number of bytes (of a log file) that are parsed in one task when
+# parsing the log files in parallel.
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Default number of bytes read at a time when reading a file backwards.
+DEFAULT_BLOCK_SIZE = 64 * 1024
+
+FileChunkType = Tuple[Union[str, Path], int, int]
+
+
+class ParseLineWrapper:
+    """Parse a line using the first parser function that returns a log."""
+
+    def __init__(
+        self, parser_functions: Dict[str, ParseLineFunctionType], log_key: str
+    ):
+        """Parse a line using the first parser function that returns a log.
+
+        Unlike a closure, instances of this class can be pickled (if the
+        parser functions can be pickled) and sent to other processes.
+
+        Args:
+            parser_functions (Dict[str, ParseLineFunctionType]): Mapping
+                of the log type to the function that parses the logs of
+                that type.
+            log_key (str): Key (in the log) that is set to the log type,
+                if not already present.
+        """
+        self.parser_functions = parser_functions
+        self.log_key = log_key
+
+    def __call__(self, line: str) -> Optional[LogType]:
+        """Parse the line."""
+        log = None
+        for parser_type, parser_func in self.parser_functions.items():
+            log = parser_func(line)
+            if log is not None:
+                if not isinstance(log, dict):
+                    log = {"data": log}
+                if self.log_key not in log:
+                    log[self.log_key] = parser_type
+                break
+        return log
+
+
+def parse_file_chunk(
+    parse_line: ParseLineFunctionType, file_path: Union[str, Path], start: int, end: int
+) -> List[LogType]:
+    """Parse the lines that start in the byte range [start, end) of a file.
+
+    Args:
+        parse_line (ParseLineFunctionType): Function to parse a line
+        file_path (Union[str, Path]): Log file to read from
+        start (int): Offset (in bytes) to start reading from
+        end (int): Offset (in bytes) to stop reading at
+
+    Returns:
+        List[LogType]: List of logs
+    """
+    return list(
+        iterate_file_chunk(
+            parse_line=parse_line, file_path=file_path, start=start, end=end
+        )
+    )
+
+
+def iterate_file_chunk(
+    parse_line: ParseLineFunctionType, file_path: Union[str, Path], start: int, end: int
+) -> Iterator[LogType]:
+    """Parse the lines that start in the byte range [start, end) of a file.
+
+    Unlike `parse_file_chunk`, the logs are yielded as they are parsed.
+
+    Args:
+        parse_line (ParseLineFunctionType): Function to parse a line
+        file_path (Union[str, Path]): Log file to read from
+        start (int): Offset (in bytes) to start reading from
+        end (int): Offset (in bytes) to stop reading at
+
+    Yields:
+        Iterator[LogType]: Iterator over the logs
+    """
+    if is_compressed_file(file_path):
+        # the compressed segments are parsed as a whole, in the chunk that
+        # starts at 0.
+        if start == 0:
+            for line in iterate_lines(file_path):
+                log = parse_line(line.decode("utf-8"))
+                if log is not None:
+                    yield log
+        return
+    with open(file_path, "rb") as f:
+        if start > 0:
+            # skip the line that started in the previous chunk.
+            f.seek(start - 1)
+            f.readline()
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            log = parse_line(line.decode("utf-8"))
+            if log is not None:
+                yield log
+
+
+def read_lines_in_reverse(
+    file_path: Union[str, Path], block_size: int = DEFAULT_BLOCK_SIZE
+) -> Iterator[str]:
+    """Read the lines of a file, starting from the last line.
+
+    The file is read backwards in blocks of `block_size` bytes, so reading
+    the last few lines does not depend on the size of the file. The lines
+    are the same as the lines returned when iterating over the file (ie
+    they include the newline character, if any).
+
+    Args:
+        file_path (Union[str, Path]): File to read from
+        block_size (int, optional): Number of bytes to read at a time.
+            Defaults to DEFAULT_BLOCK_SIZE.
+
+    Yields:
+        Iterator[str]: Iterator over the lines, in reverse order
+    """
+    with open(file_path, "rb") as f:
+        position = f.seek(0, os.SEEK_END)
+        # bytes of the line that started in a previous block (in the
+        # reverse order of the blocks).
+        pending: List[bytes] = []
+        # only the last line of a file can be without the newline character.
+        newline = b""
+        while position > 0:
+            size = min(block_size, position)
+            position -= size
+            f.seek(position)
+            block = f.read(size)
+            pieces = block.split(b"\n")
+            if len(pieces) == 1:
+                pending.append(block)
+                continue
+            pending.append(pieces[-1])
+            pieces[-1] = b"".join(reversed(pending))
+            for piece in reversed(pieces[1:]):
+                if piece or newline:
+                    yield (piece + newline).decode("utf-8")
+                newline = b"\n"
+            pending = [pieces[0]]
+        piece = b"".join(reversed(pending))
+        if piece or newline:
+            yield (piece + newline).decode("utf-8")
+
+
+def _make_file_chunks(
+    file_paths: Iterable[Union[str, Path]], chunk_size: int
+) -> Iterator[FileChunkType]:
+    """Split the files into chunks of (at most) `chunk_size` bytes."""
+    for file_path in file_paths:
+        file_size = os.path.getsize(file_path)
+        if is_compressed_file(file_path):
+            yield (file_path, 0, file_size)
+            continue
+        for start in range(0, file_size, chunk_size):
+            yield (file_path, start, min(start + chunk_size, file_size))
+
 
 class Parser(ABC):
     """Base class that all parsers extend."""
@@ -36,24 +226,170 @@ class Parser(ABC):
         Yields:
             Iterator[Optional[LogType]]: Iterator over the logs
         """
+        if is_columnar_file(file_path):
+            yield from self._parse_columnar_file(file_path=file_path)
+            return
+        if is_compressed_file(file_path):
+            for raw_line in iterate_lines(file_path):
+                yield self.parse_line(raw_line.decode("utf-8"))
+            return
         with open(file_path) as f:
             for line in f:
                 log = self.parse_line(line)
                 yield log
 
+    def _parse_columnar_file(self, file_path: Union[str, Path]) -> Iterator[LogType]:
+        """Parse a columnar (Arrow or Parquet) log file.
+
+        The columnar files have only the metric logs. They are parsed by the
+        metric parser and skipped by the other parsers.
+
+        Args:
+            file_path (Union[str, Path]): Columnar log file to read from
+
+        Returns:
+            Iterator[LogType]: Iterator over the logs
+        """
+        return iter([])
+
+    def _parse_file_in_reverse(
+        self, file_path: Union[str, Path]
+    ) -> Iterator[Optional[LogType]]:
+        """Parse a log file, starting from the last line.
+
+        Args:
+            file_path (Union[str, Path]): Log file to read from
+
+        Yields:
+            Iterator[Optional[LogType]]: Iterator over the logs, in reverse
+                order
+        """
+        for line in read_lines_in_reverse(file_path=file_path):
+            yield self.parse_line(line)
+
+    def _parse_files(
+        self,
+        file_paths: Iterable[Union[str, Path]],
+        workers: Optional[int] = None,
+        executor: str = "process",
+        ordered: bool = True,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> Iterator[LogType]:
+        """Parse the log files, optionally in parallel.
+
+        Args:
+            file_paths (Iterable[Union[str, Path]]): Log files to read from
+            workers (Optional[int], optional): Number of workers to parse
+                the files with. The files are parsed in the current thread
+                if workers is None or 1. Defaults to None.
+            executor (str, optional): Type of the workers. "process" uses
+                a pool of processes and is suitable when decoding the logs
+                is the bottleneck. "thread" uses a pool of threads and is
+                suitable when reading the files is the bottleneck. Note that
+                `self.parse_line` should be picklable when using "process".
+                The columnar log files are parsed in the current thread,
+                after the other files. Defaults to "process".
+            ordered (bool, optional): Should the logs be returned in the
+                same order as the serial parsing. If False, the logs are
+                returned as soon as a chunk is parsed. Defaults to True.
+            chunk_size (int, optional): Number of bytes (of a file) parsed
+                by a worker in one task. At most `2 * workers` chunks are
+                parsed (or waiting to be consumed) at any time.
+                Defaults to DEFAULT_CHUNK_SIZE.
+
+        Yields:
+            Iterator[LogType]: Iterator over the logs
+        """
+        if workers is None or workers <= 1:
+            for file_path in file_paths:
+                for log in self._parse_file(file_path=file_path):
+                    if log is not None:
+                        yield log
+            return
+        file_paths = list(file_paths)
+        yield from self._parse_file_chunks(
+            file_chunks=_make_file_chunks(
+                (path for path in file_paths if not is_columnar_file(path)),
+                chunk_size,
+            ),
+            workers=workers,
+            executor=executor,
+            ordered=ordered,
+        )
+        for file_path in file_paths:
+            if is_columnar_file(file_path):
+                yield from self._parse_columnar_file(file_path=file_path)
+
+    def _parse_file_chunks(
+        self,
+        file_chunks: Iterable[FileChunkType],
+        workers: Optional[int] = None,
+        executor: str = "process",
+        ordered: bool = True,
+    ) -> Iterator[LogType]:
+        """Parse the chunks (byte ranges) of the log files, optionally in parallel.
+
+        Args:
+            file_chunks (Iterable[FileChunkType]): (file path, start, end)
+                of the chunks to parse. A chunk has the lines that start in
+                the byte range [start, end) of the file.
+            workers (Optional[int], optional): Number of workers to parse
+                the chunks with. Refer `_parse_files`. Defaults to None.
+            executor (str, optional): Type of the workers. Refer
+                `_parse_files`. Defaults to "process".
+            ordered (bool, optional): Should the logs be returned in the
+                order of the chunks. Defaults to True.
+
+        Yields:
+            Iterator[LogType]: Iterator over the logs
+        """
+        if workers is None or workers <= 1:
+            for file_path, start, end in file_chunks:
+                yield from iterate_file_chunk(self.parse_line, file_path, start, end)
+            return
+
+        if executor not in EXECUTORS:
+            executor_string = ", ".join(EXECUTORS)
+            raise ValueError(
+                f"executor should be one of {executor_string}. Got {executor}"
+            )
+        max_pending_chunks = 2 * workers
+        pending_chunks: Deque["Future[List[LogType]]"] = deque()
+        with EXECUTORS[executor](max_workers=workers) as pool:
+            for file_path, start, end in file_chunks:
+                if len(pending_chunks) >= max_pending_chunks:
+                    yield from _pop_parsed_chunk(pending_chunks, ordered=ordered)
+                pending_chunks.append(
+                    pool.submit(
+                        parse_file_chunk, self.parse_line, file_path, start, end
+                    )
+                )
+            while pending_chunks:
+                yield from _pop_parsed_chunk(pending_chunks, ordered=ordered)
+
     def _wrap_parse_line(
         self, parser_functions: Dict[str, ParseLineFunctionType]
     ) -> ParseLineFunctionType:
-        def fn(line: str) -> Optional[LogType]:
-            log = None
-            for parser_type, parser_func in parser_functions.items():
-                log = parser_func(line)
-                if log is not None:
-                    if not isinstance(log, dict):
-                        log = {"data": log}
-                    if self.log_key not in log:
-                        log[self.log_key] = parser_type
-                    break
-            return log
-
-        return fn
+        return ParseLineWrapper(parser_functions=parser_functions, log_key=self.log_key)
+
+
+def _pop_parsed_chunk(
+    pending_chunks: Deque["Future[List[LogType]]"], ordered: bool
+) -> List[LogType]:
+    """Wait for a chunk to be parsed and remove it from the pending chunks.
+
+    Args:
+        pending_chunks (Deque[Future[List[LogType]]]): Chunks being parsed,
+            in the order they were submitted.
+        ordered (bool): If True, wait for the oldest chunk. Otherwise, wait
+            for the first chunk that is parsed.
+
+    Returns:
+        List[LogType]: Logs in the chunk
+    """
+    if ordered:
+        return pending_chunks.popleft().result()
+    done, _ = wait_for_futures(pending_chunks, return_when=FIRST_COMPLETED)
+    future = next(iter(done))
+    pending_chunks.remove(future)
+    return future.result()
@@ -0,0 +1,105 @@
+"""Functions to read the columnar (Arrow or Parquet) metric logs.
+
+The columnar files are written by `ml_logger.logger.columnar`. The Arrow
+files are memory mapped so reading them does not decode (or copy) the
+numeric columns. `pyarrow` is imported only when a columnar file is read.
+"""
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Union
+
+import pandas as pd
+
+from ml_logger.types import LogType
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+COLUMNAR_EXTENSIONS = (".arrow", ".parquet")
+
+
+def is_columnar_file(file_path: Union[str, Path]) -> bool:
+    """Check if a file is a columnar (Arrow or Parquet) log file."""
+    return str(file_path).endswith(COLUMNAR_EXTENSIONS)
+
+
+def _read_table(
+    file_path: Union[str, Path], columns: Optional[List[str]]
+) -> "pa.Table":
+    """Read a columnar log file as an Arrow table (memory mapped)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if str(file_path).endswith(".parquet"):
+        table = pq.read_table(file_path, memory_map=True)
+    else:
+        table = pa.ipc.open_file(pa.memory_map(str(file_path))).read_all()
+    if columns is not None:
+        # the missing columns are added (as NaN) by the callers.
+        table = table.select(
+            [column for column in columns if column in table.column_names]
+        )
+    return table
+
+
+def read_columnar_file(
+    file_path: Union[str, Path], columns: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """Read a columnar log file as a dataframe.
+
+    Args:
+        file_path (Union[str, Path]): Columnar log file to read
+        columns (Optional[List[str]], optional): Columns to read. The
+            columns that are not in the file are ignored. If None, all the
+            columns are read. Defaults to None.
+
+    Returns:
+        pd.DataFrame: Dataframe with one row per metric log
+    """
+    table = _read_table(file_path=file_path, columns=columns)
+    df: pd.DataFrame = table.to_pandas(split_blocks=True)
+    return df
+
+
+def read_columnar_files(
+    file_paths: Iterable[Union[str, Path]], columns: Optional[List[str]] = None
+) -> Optional[pd.DataFrame]:
+    """Read the columnar log files (sorted by their paths) as one dataframe.
+
+    Args:
+        file_paths (Iterable[Union[str, Path]]): Columnar log files to read
+        columns (Optional[List[str]], optional): Columns to read. The
+            columns that are not in any file are ignored. If None, all the
+            columns are read. Defaults to None.
+
+    Returns:
+        Optional[pd.DataFrame]: Dataframe with one row per metric log or
+            None if there are no files.
+    """
+    # the segments (of a logger) are numbered in the order they are written.
+    dfs = [
+        read_columnar_file(file_path, columns=columns)
+        for file_path in sorted(file_paths, key=str)
+    ]
+    if not dfs:
+        return None
+    if len(dfs) == 1:
+        return dfs[0]
+    return pd.concat(dfs, ignore_index=True)
+
+
+def iterate_columnar_file(file_path: Union[str, Path]) -> Iterator[LogType]:
+    """Iterate over the rows of a columnar log file as (flattened) logs.
+
+    The missing (null) values are not included in the logs.
+
+    Args:
+        file_path (Union[str, Path]): Columnar log file to read
+
+    Yields:
+        Iterator[LogType]: Iterator over the logs
+    """
+    table = _read_table(file_path=file_path, columns=None)
+    for batch in table.to_batches():
+        for row in batch.to_pylist():
+            yield {key: value for key, value in row.items() if value is not None}
@@ -0,0 +1,493 @@
+"""Functions to downsample the metric logs (eg for plotting).
+
+The functions that take an iterable of logs are streaming: they yield the
+selected (or aggregated) logs as soon as a bucket is complete, so only the
+logs of one (or two, for LTTB) buckets per group are held in memory. They
+can be passed to `metric.Parser.parse_as_df(downsample=...)` (using
+`functools.partial` to set their arguments) to downsample the logs while
+they are parsed.
+
+The buckets are contiguous ranges of `bucket_size` (in the units of the
+bucket key, eg steps or seconds) and are expected to be logged in order.
+A log for an earlier bucket (eg after a run was resumed) starts a new
+bucket. The logs without a numeric value for the bucket key (or for
+`y_key`) are dropped. The functions with the `_df` suffix downsample a
+dataframe (eg `Experiment.metrics["train"]`) instead.
+"""
+
+import math
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ml_logger.types import LogType
+
+DownsampleFunctionType = Callable[[Iterable[LogType]], Iterable[LogType]]
+
+
+def _get_number(log: LogType, key: str) -> Optional[float]:
+    """Get the numeric value of the key, if any."""
+    value = log.get(key)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if not math.isnan(value):
+            return float(value)
+    return None
+
+
+class _Downsampler(ABC):
+    """Downsampler for the logs of one group."""
+
+    @abstractmethod
+    def add(self, log: LogType) -> List[LogType]:
+        """Add a log and return the logs that are complete."""
+
+    def finish(self) -> List[LogType]:
+        """Return the remaining logs."""
+        return []
+
+
+def _downsample(
+    logs: Iterable[LogType],
+    make_downsampler: Callable[[], _Downsampler],
+    group_key: Optional[str],
+) -> Iterator[LogType]:
+    """Downsample the logs of every group (eg mode) separately."""
+    downsamplers: Dict[Any, _Downsampler] = {}
+    for log in logs:
+        group = log.get(group_key) if group_key is not None else None
+        if group not in downsamplers:
+            downsamplers[group] = make_downsampler()
+        yield from downsamplers[group].add(log)
+    for downsampler in downsamplers.values():
+        yield from downsampler.finish()
+
+
+class _EveryK(_Downsampler):
+    def __init__(self, k: int):
+        self.k = k
+        self.count = 0
+
+    def add(self, log: LogType) -> List[LogType]:
+        self.count += 1
+        if (self.count - 1) % self.k == 0:
+            return [log]
+        return []
+
+
+class _BucketDownsampler(_Downsampler):
+    """Downsampler that processes the logs one bucket at a time."""
+
+    def __init__(self, bucket_key: str, bucket_size: float):
+        if bucket_size <= 0:
+            raise ValueError(f"bucket_size should be positive. Got {bucket_size}")
+        self.bucket_key = bucket_key
+        self.bucket_size = bucket_size
+        self.bucket: Optional[int] = None
+
+    def add(self, log: LogType) -> List[LogType]:
+        x = _get_number(log, self.bucket_key)
+        if x is None or not self._is_valid(log):
+            return []
+        bucket = math.floor(x / self.bucket_size)
+        logs = []
+        if bucket != self.bucket:
+            if self.bucket is not None:
+                logs = self._finish_bucket()
+            self.bucket = bucket
+        self._add_to_bucket(log, x)
+        return logs
+
+    def finish(self) -> List[LogType]:
+        if self.bucket is None:
+            return []
+        return self._finish_bucket()
+
+    def _is_valid(self, log: LogType) -> bool:
+        return True
+
+    @abstractmethod
+    def _add_to_bucket(self, log: LogType, x: float) -> None:
+        """Add a log (with the value `x` of the bucket key) to the current bucket."""
+
+    @abstractmethod
+    def _finish_bucket(self) -> List[LogType]:
+        """Return the logs for the current bucket and reset it."""
+
+
+class _BucketMean(_BucketDownsampler):
+    def __init__(self, bucket_key: str, bucket_size: float):
+        super().__init__(bucket_key=bucket_key, bucket_size=bucket_size)
+        self.sums: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.last_values: LogType = {}
+        # keys of the logs, in the order they were seen.
+        self.keys: Dict[str, None] = {}
+
+    def _add_to_bucket(self, log: LogType, x: float) -> None:
+        for key, value in log.items():
+            self.keys[key] = None
+            number = _get_number(log, key)
+            if number is None:
+                self.last_values[key] = value
+            else:
+                self.sums[key] = self.sums.get(key, 0.0) + number
+                self.counts[key] = self.counts.get(key, 0) + 1
+
+    def _finish_bucket(self) -> List[LogType]:
+        log = {
+            key: (
+                self.sums[key] / self.counts[key]
+                if key in self.sums
+                else self.last_values[key]
+            )
+            for key in self.keys
+        }
+        assert self.bucket is not None  # noqa: S101
+        log[self.bucket_key] = self.bucket * self.bucket_size
+        self.sums, self.counts, self.last_values, self.keys = {}, {}, {}, {}
+        return [log]
+
+
+class _MinMax(_BucketDownsampler):
+    def __init__(self, bucket_key: str, y_key: str, bucket_size: float):
+        super().__init__(bucket_key=bucket_key, bucket_size=bucket_size)
+        self.y_key = y_key
+        # (x, y, log) of the logs with the min and max y in the bucket.
+        self.min_point: Optional[Tuple[float, float, LogType]] = None
+        self.max_point: Optional[Tuple[float, float, LogType]] = None
+
+    def _is_valid(self, log: LogType) -> bool:
+        return _get_number(log, self.y_key) is not None
+
+    def _add_to_bucket(self, log: LogType, x: float) -> None:
+        y = _get_number(log, self.y_key)
+        assert y is not None  # noqa: S101
+        if self.min_point is None or y < self.min_point[1]:
+            self.min_point = (x, y, log)
+        if self.max_point is None or y > self.max_point[1]:
+            self.max_point = (x, y, log)
+
+    def _finish_bucket(self) -> List[LogType]:
+        assert self.min_point is not None and self.max_point is not None  # noqa: S101
+        points = sorted(
+            {
+                id(point[2]): point for point in [self.min_point, self.max_point]
+            }.values(),
+            key=lambda point: point[0],
+        )
+        self.min_point, self.max_point = None, None
+        return [log for _, _, log in points]
+
+
+class _LTTB(_BucketDownsampler):
+    """Largest-Triangle-Three-Buckets with fixed-width buckets.
+
+    The point selected in a bucket forms the largest triangle with the
+    point selected in the previous bucket and the average of the points in
+    the next bucket. So a bucket is selected from once the next bucket is
+    complete. The first and the last points are always selected.
+    """
+
+    def __init__(self, bucket_key: str, y_key: str, bucket_size: float):
+        super().__init__(bucket_key=bucket_key, bucket_size=bucket_size)
+        self.y_key = y_key
+        self.selected_point: Optional[Tuple[float, float]] = None
+        self.previous_bucket: List[Tuple[float, float, LogType]] = []
+        self.bucket_points: List[Tuple[float, float, LogType]] = []
+
+    def _is_valid(self, log: LogType) -> bool:
+        return _get_number(log, self.y_key) is not None
+
+    def add(self, log: LogType) -> List[LogType]:
+        if self.selected_point is None and self._is_valid(log):
+            x = _get_number(log, self.bucket_key)
+            y = _get_number(log, self.y_key)
+            if x is not None and y is not None:
+                self.selected_point = (x, y)
+                return [log]
+        return super().add(log)
+
+    def _add_to_bucket(self, log: LogType, x: float) -> None:
+        y = _get_number(log, self.y_key)
+        assert y is not None  # noqa: S101
+        self.bucket_points.append((x, y, log))
+
+    def _select(self, next_point: Tuple[float, float]) -> List[LogType]:
+        """Select the point of the previous bucket (given the next point)."""
+        if not self.previous_bucket:
+            return []
+        assert self.selected_point is not None  # noqa: S101
+        (ax, ay), (cx, cy) = self.selected_point, next_point
+        x, y, log = max(
+            self.previous_bucket,
+            key=lambda point: abs(
+                (ax - cx) * (point[1] - ay) - (ax - point[0]) * (cy - ay)
+            ),
+        )
+        self.selected_point = (x, y)
+        return [log]
+
+    def _finish_bucket(self) -> List[LogType]:
+        points = self.bucket_points
+        logs = self._select(
+            (
+                sum(x for x, _, _ in points) / len(points),
+                sum(y for _, y, _ in points) / len(points),
+            )
+        )
+        self.previous_bucket, self.bucket_points = points, []
+        return logs
+
+    def finish(self) -> List[LogType]:
+        logs = super().finish()
+        if self.previous_bucket:
+            # the last point is always selected.
+            last_x, last_y, last_log = self.previous_bucket[-1]
+            if len(self.previous_bucket) > 1:
+                self.previous_bucket = self.previous_bucket[:-1]
+                logs.extend(self._select((last_x, last_y)))
+            logs.append(last_log)
+            self.previous_bucket = []
+        return logs
+
+
+def every_k(
+    logs: Iterable[LogType], k: int, group_key: Optional[str] = None
+) -> Iterator[LogType]:
+    """Select every k-th log (starting with the first log).
+
+    Args:
+        logs (Iterable[LogType]): Logs to downsample
+        k (int): Select one of every k logs
+        group_key (Optional[str], optional): Key (eg "mode") to group the
+            logs by. The logs of each group are downsampled separately.
+            Defaults to None.
+
+    Yields:
+        Iterator[LogType]: Iterator over the selected logs
+    """
+    yield from _downsample(logs, lambda: _EveryK(k=k), group_key=group_key)
+
+
+def bucket_mean(
+    logs: Iterable[LogType],
+    bucket_key: str = "step",
+    bucket_size: float = 1000,
+    group_key: Optional[str] = None,
+) -> Iterator[LogType]:
+    """Average the logs in every bucket (eg of steps or time).
+
+    Args:
+        logs (Iterable[LogType]): Logs to downsample
+        bucket_key (str, optional): Key to bucket the logs by. Defaults to
+            "step".
+        bucket_size (float, optional): Size of the buckets. Defaults to 1000.
+        group_key (Optional[str], optional): Key (eg "mode") to group the
+            logs by. Defaults to None.
+
+    Yields:
+        Iterator[LogType]: Iterator over one log per bucket with the mean
+            of the numeric values, the last of the other values and the
+            start of the bucket as the value of `bucket_key`.
+    """
+    yield from _downsample(
+        logs,
+        lambda: _BucketMean(bucket_key=bucket_key, bucket_size=bucket_size),
+        group_key=group_key,
+    )
+
+
+def min_max(
+    logs: Iterable[LogType],
+    y_key: str,
+    bucket_key: str = "step",
+    bucket_size: float = 1000,
+    group_key: Optional[str] = None,
+) -> Iterator[LogType]:
+    """Select the logs with the min and the max value of `y_key` in every bucket.
+
+    The selected logs preserve the envelope (eg spikes) of the metric.
+
+    Args:
+        logs (Iterable[LogType]): Logs to downsample
+        y_key (str): Key of the metric
+        bucket_key (str, optional): Key to bucket the logs by. Defaults to
+            "step".
+        bucket_size (float, optional): Size of the buckets. Defaults to 1000.
+        group_key (Optional[str], optional): Key (eg "mode") to group the
+            logs by. Defaults to None.
+
+    Yields:
+        Iterator[LogType]: Iterator over (at most) two logs per bucket
+    """
+    yield from _downsample(
+        logs,
+        lambda: _MinMax(bucket_key=bucket_key, y_key=y_key, bucket_size=bucket_size),
+        group_key=group_key,
+    )
+
+
+def lttb(
+    logs: Iterable[LogType],
+    y_key: str,
+    bucket_key: str = "step",
+    bucket_size: float = 1000,
+    group_key: Optional[str] = None,
+) -> Iterator[LogType]:
+    """Select one log per bucket using Largest-Triangle-Three-Buckets.
+
+    Unlike the usual LTTB, that splits a known number of points into
+    buckets of the same number of points, the buckets have the same width
+    (`bucket_size`), so the logs can be downsampled as they are parsed.
+
+    Args:
+        logs (Iterable[LogType]): Logs to downsample
+        y_key (str): Key of the metric
+        bucket_key (str, optional): Key to bucket the logs by (the x-axis).
+            Defaults to "step".
+        bucket_size (float, optional): Size of the buckets. Defaults to 1000.
+        group_key (Optional[str], optional): Key (eg "mode") to group the
+            logs by. Defaults to None.
+
+    Yields:
+        Iterator[LogType]: Iterator over the selected logs
+    """
+    yield from _downsample(
+        logs,
+        lambda: _LTTB(bucket_key=bucket_key, y_key=y_key, bucket_size=bucket_size),
+        group_key=group_key,
+    )
+
+
+def _apply_to_groups(
+    df: pd.DataFrame,
+    function: Callable[[pd.DataFrame], pd.DataFrame],
+    group_key: Optional[str],
+) -> pd.DataFrame:
+    """Apply the function to every group of the dataframe (in the original order)."""
+    if group_key is None:
+        return function(df)
+    dfs = [function(group_df) for _, group_df in df.groupby(group_key, sort=False)]
+    if not dfs:
+        return df.iloc[:0]
+    return pd.concat(dfs).sort_index()
+
+
+def every_k_df(
+    df: pd.DataFrame, k: int, group_key: Optional[str] = None
+) -> pd.DataFrame:
+    """Select every k-th row of the dataframe. Refer `every_k()`."""
+    return _apply_to_groups(df, lambda group_df: group_df.iloc[::k], group_key)
+
+
+def bucket_mean_df(
+    df: pd.DataFrame,
+    bucket_key: str = "step",
+    bucket_size: float = 1000,
+    group_key: Optional[str] = None,
+) -> pd.DataFrame:
+    """Average the rows in every bucket of the dataframe. Refer `bucket_mean()`.
+
+    Unlike `bucket_mean()`, the rows of a bucket do not have to be
+    contiguous.
+    """
+    df = df[df[bucket_key].notna()]
+    buckets = np.floor(df[bucket_key].to_numpy(dtype=float) / bucket_size)
+    keys = [buckets] if group_key is None else [df[group_key], buckets]
+    grouped = df.groupby(keys, sort=False)
+    numeric_columns = [
+        column
+        for column in df.select_dtypes(include="number").columns
+        if column != bucket_key and df[column].dtype != bool
+    ]
+    result = grouped[numeric_columns].mean()
+    other_columns = [
+        column
+        for column in df.columns
+        if column not in numeric_columns and column != bucket_key
+    ]
+    if other_columns:
+        result = result.join(grouped[other_columns].last())
+    result[bucket_key] = result.index.get_level_values(-1) * bucket_size
+    return result.reset_index(drop=True)[
+        [column for column in df.columns if column in result]
+    ]
+
+
+def min_max_df(
+    df: pd.DataFrame,
+    y_key: str,
+    bucket_key: str = "step",
+    bucket_size: float = 1000,
+    group_key: Optional[str] = None,
+) -> pd.DataFrame:
+    """Select the rows with the min and max `y_key` in every bucket. Refer `min_max()`."""
+    df = df[df[bucket_key].notna() & df[y_key].notna()]
+    buckets = np.floor(df[bucket_key].to_numpy(dtype=float) / bucket_size)
+    keys = [buckets] if group_key is None else [df[group_key], buckets]
+    grouped = df[y_key].groupby(keys, sort=False)
+    indices = pd.Index(grouped.idxmin()).union(pd.Index(grouped.idxmax()))
+    return df.loc[indices]
+
+
+def _lttb_indices(
+    x: "np.ndarray[Any, Any]", y: "np.ndarray[Any, Any]", num_points: int
+) -> "np.ndarray[Any, Any]":
+    """Get the indices of the points selected by LTTB."""
+    num_values = len(x)
+    if num_points >= num_values or num_points < 3:
+        return np.arange(num_values)
+    # the first and the last points are selected; the other points are split
+    # into num_points - 2 buckets (of the same number of points).
+    edges = np.linspace(1, num_values - 1, num_points - 1).astype(int)
+    indices = np.empty(num_points, dtype=int)
+    indices[0], indices[-1] = 0, num_values - 1
+    selected = 0
+    for bucket in range(num_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_start = end
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else num_values
+        cx, cy = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        ax, ay = x[selected], y[selected]
+        areas = np.abs(
+            (ax - cx) * (y[start:end] - ay) - (ax - x[start:end]) * (cy - ay)
+        )
+        selected = start + int(np.argmax(areas))
+        indices[bucket + 1] = selected
+    return indices
+
+
+def lttb_df(
+    df: pd.DataFrame,
+    y_key: str,
+    num_points: int,
+    x_key: str = "step",
+    group_key: Optional[str] = None,
+) -> pd.DataFrame:
+    """Select `num_points` rows (per group) using Largest-Triangle-Three-Buckets.
+
+    Args:
+        df (pd.DataFrame): Dataframe to downsample. The rows are expected
+            to be sorted by `x_key`.
+        y_key (str): Column of the metric
+        num_points (int): Number of rows to select
+        x_key (str, optional): Column of the x-axis. Defaults to "step".
+        group_key (Optional[str], optional): Column (eg "mode") to group
+            the rows by. Defaults to None.
+
+    Returns:
+        pd.DataFrame: Selected rows
+    """
+
+    def _lttb(group_df: pd.DataFrame) -> pd.DataFrame:
+        group_df = group_df[group_df[x_key].notna() & group_df[y_key].notna()]
+        indices = _lttb_indices(
+            group_df[x_key].to_numpy(dtype=float),
+            group_df[y_key].to_numpy(dtype=float),
+            num_points=num_points,
+        )
+        return group_df.iloc[indices]
+
+    return _apply_to_groups(df, _lttb, group_key)
@@ -1,5 +1,9 @@
 """Module to interact with the experiment data."""
+
+from ml_logger.parser.experiment.cache import ParseCache  # noqa:F401
+from ml_logger.parser.experiment.catalog import Catalog  # noqa:F401
 from ml_logger.parser.experiment.experiment import Experiment  # noqa:F401
 from ml_logger.parser.experiment.experiment import ExperimentSequence  # noqa:F401
+from ml_logger.parser.experiment.experiment import LazyExperimentSequence  # noqa:F401
 from ml_logger.parser.experiment.experiment import deserialize  # noqa:F401
 from ml_logger.parser.experiment.parser import Parser  # noqa:F401
@@ -0,0 +1,374 @@
+"""Functions to aggregate the metrics across experiments (eg seeds).
+
+The metrics of the experiments (runs) are aligned on a step key, as a 2D
+(runs x steps) array, and the statistics are computed in one vectorized
+pass over the array. Use `aggregate_metric_statistics` as the
+`aggregate_metrics` function of `ExperimentSequence.aggregate()`:
+
+    experiments.aggregate(
+        aggregate_metrics=functools.partial(
+            aggregate_metric_statistics, statistics=["mean", "sem"]
+        )
+    )
+"""
+
+import warnings
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ml_logger.parser.experiment.experiment import ExperimentMetricType
+
+FILL_METHODS = ("interpolate", "ffill", None)
+
+STATISTICS = ("mean", "std", "sem", "min", "max", "median", "count")
+
+# Number of the bootstrapped means (samples x steps) computed at once.
+BOOTSTRAP_CHUNK_SIZE = 2**22
+
+
+def _get_run(
+    df: pd.DataFrame, column: str, step_key: str
+) -> Tuple["np.ndarray[Any, Any]", "np.ndarray[Any, Any]"]:
+    """Get the (sorted, unique) steps and the values of a run."""
+    if column not in df or step_key not in df:
+        return np.empty(0), np.empty(0)
+    steps = df[step_key].to_numpy(dtype=float)
+    values = df[column].to_numpy(dtype=float)
+    is_valid = ~(np.isnan(steps) | np.isnan(values))
+    if not is_valid.all():
+        steps, values = steps[is_valid], values[is_valid]
+    if not (np.diff(steps) > 0).all():
+        # for the repeated steps, the last logged value is used.
+        order = np.argsort(steps, kind="stable")
+        steps, values = steps[order], values[order]
+        is_last = np.append(steps[1:] != steps[:-1], True)
+        steps, values = steps[is_last], values[is_last]
+    return steps, values
+
+
+def _find_slice(
+    grid: "np.ndarray[Any, Any]", steps: "np.ndarray[Any, Any]"
+) -> Optional[int]:
+    """Find the start of the steps in the grid, if the steps are a slice of it.
+
+    This is the common case, eg for the runs that logged the same steps but
+    stopped early.
+    """
+    if len(steps) == 0:
+        return 0
+    start = int(np.searchsorted(grid, steps[0]))
+    end = start + len(steps)
+    if np.array_equal(grid[start:end], steps):
+        return start
+    return None
+
+
+def _align_run(
+    steps: "np.ndarray[Any, Any]",
+    values: "np.ndarray[Any, Any]",
+    grid: "np.ndarray[Any, Any]",
+    fill: Optional[str],
+) -> "np.ndarray[Any, Any]":
+    """Align the values of a run (at the sorted, unique `steps`) to the grid."""
+    aligned = np.full(len(grid), np.nan)
+    if len(steps) == 0:
+        return aligned
+    start = _find_slice(grid, steps)
+    if start is not None:
+        positions = np.arange(start, start + len(steps))
+    else:
+        positions = np.searchsorted(grid, steps)
+    aligned[positions] = values
+    if fill == "interpolate":
+        # the values are not extrapolated (beyond the steps of the run).
+        start, end = positions[0], positions[-1] + 1
+        aligned[start:end] = np.interp(grid[start:end], steps, values)
+    elif fill == "ffill":
+        indices = np.full(len(grid), -1)
+        indices[positions] = np.arange(len(steps))
+        indices = np.maximum.accumulate(indices)
+        is_valid = indices >= 0
+        aligned[is_valid] = values[indices[is_valid]]
+    return aligned
+
+
+def align_runs(
+    dfs: Sequence[pd.DataFrame],
+    column: str,
+    step_key: str = "step",
+    fill: Optional[str] = "interpolate",
+) -> Tuple["np.ndarray[Any, Any]", "np.ndarray[Any, Any]"]:
+    """Align a metric of the runs on the step key.
+
+    Args:
+        dfs (Sequence[pd.DataFrame]): Metric dataframes of the runs
+        column (str): Column (metric) to align. The runs without the
+            column have only missing values.
+        step_key (str, optional): Column to align the runs on. Defaults
+            to "step".
+        fill (Optional[str], optional): How to fill the values at the
+            steps that a run did not log: "interpolate" (linearly, within
+            the steps of the run), "ffill" (carry the last logged value
+            forward, eg for the runs that stopped early) or None (missing).
+            For the repeated steps, the last logged value is used.
+            Defaults to "interpolate".
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Sorted union of the steps (of the
+            runs) and the (runs x steps) array of the values. Missing values
+            are NaN.
+    """
+    if fill not in FILL_METHODS:
+        raise ValueError(f"fill should be one of {FILL_METHODS}. Got {fill}")
+    runs = [_get_run(df=df, column=column, step_key=step_key) for df in dfs]
+    longest_steps = max((steps for steps, _ in runs), key=len, default=np.empty(0))
+    if all(_find_slice(longest_steps, steps) is not None for steps, _ in runs):
+        grid = longest_steps
+    else:
+        grid = np.unique(np.concatenate([steps for steps, _ in runs]))
+    values = np.stack(
+        [_align_run(steps, run_values, grid, fill) for steps, run_values in runs]
+        or [np.empty(0)]
+    )
+    return grid, values
+
+
+def _nanquantile(
+    values: "np.ndarray[Any, Any]", quantiles: Sequence[float]
+) -> "np.ndarray[Any, Any]":
+    """Compute the quantiles over axis 0, ignoring missing values.
+
+    Unlike `np.nanquantile`, that computes the quantiles column by column
+    when there are missing values, the quantiles of all the columns are
+    computed at once (with the linear interpolation). The columns are
+    sorted as the (contiguous) rows of the transposed array.
+    """
+    # the missing values are sorted last.
+    sorted_values = np.sort(np.ascontiguousarray(values.T), axis=1)
+    count = (~np.isnan(sorted_values)).sum(axis=1)
+    results = []
+    for quantile in quantiles:
+        position = quantile * np.maximum(count - 1, 0)
+        low = np.floor(position).astype(int)
+        high = np.ceil(position).astype(int)
+        low_values = np.take_along_axis(sorted_values, low[:, None], axis=1)[:, 0]
+        high_values = np.take_along_axis(sorted_values, high[:, None], axis=1)[:, 0]
+        result = low_values + (high_values - low_values) * (position - low)
+        results.append(np.where(count > 0, result, np.nan))
+    return np.array(results)
+
+
+def _compute_statistic(
+    values: "np.ndarray[Any, Any]", statistic: str, count: "np.ndarray[Any, Any]"
+) -> "np.ndarray[Any, Any]":
+    """Compute a statistic over axis 0, ignoring missing values."""
+    if statistic == "count":
+        return count
+    if statistic == "std":
+        std: "np.ndarray[Any, Any]" = np.nanstd(values, axis=0, ddof=1)
+        return std
+    if statistic == "sem":
+        sem: "np.ndarray[Any, Any]" = np.nanstd(values, axis=0, ddof=1) / np.sqrt(count)
+        return sem
+    if statistic == "median":
+        median: "np.ndarray[Any, Any]" = _nanquantile(values, [0.5])[0]
+        return median
+    result: "np.ndarray[Any, Any]" = getattr(np, f"nan{statistic}")(values, axis=0)
+    return result
+
+
+def compute_statistics(
+    values: "np.ndarray[Any, Any]",
+    statistics: Sequence[str] = ("mean", "std", "sem"),
+    quantiles: Sequence[float] = (),
+    confidence: Optional[float] = None,
+    num_bootstrap: int = 1000,
+    seed: Optional[int] = None,
+) -> Dict[str, "np.ndarray[Any, Any]"]:
+    """Compute the statistics over the runs (axis 0), ignoring missing values.
+
+    Args:
+        values (np.ndarray): (runs x steps) array of the values
+        statistics (Sequence[str], optional): Statistics to compute. Refer
+            `STATISTICS`. "std" and "sem" use one degree of freedom.
+            Defaults to ("mean", "std", "sem").
+        quantiles (Sequence[float], optional): Quantiles (in [0, 1]) to
+            compute. Defaults to ().
+        confidence (Optional[float], optional): If set (eg 0.95), compute
+            the bootstrapped confidence interval of the mean ("ci_low" and
+            "ci_high"). Defaults to None.
+        num_bootstrap (int, optional): Number of bootstrap samples.
+            Defaults to 1000.
+        seed (Optional[int], optional): Seed for the bootstrap samples.
+            Defaults to None.
+
+    Returns:
+        Dict[str, np.ndarray]: Mapping of the statistics to their values
+            (per step). Quantiles are named as "q<quantile>" (eg "q0.25").
+    """
+    for statistic in statistics:
+        if statistic not in STATISTICS:
+            raise ValueError(
+                f"statistic should be one of {STATISTICS}. Got {statistic}"
+            )
+    is_valid = ~np.isnan(values)
+    count = is_valid.sum(axis=0)
+    results: Dict[str, "np.ndarray[Any, Any]"] = {}
+    with warnings.catch_warnings():
+        # the steps without any value (or a single value for std) are NaN.
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        for statistic in statistics:
+            results[statistic] = _compute_statistic(values, statistic, count)
+        if quantiles:
+            quantile_values = _nanquantile(values, quantiles)
+            for quantile, quantile_value in zip(quantiles, quantile_values):
+                results[f"q{quantile:g}"] = quantile_value
+        if confidence is not None:
+            results["ci_low"], results["ci_high"] = _bootstrap_ci(
+                values=values,
+                is_valid=is_valid,
+                confidence=confidence,
+                num_bootstrap=num_bootstrap,
+                seed=seed,
+            )
+    return results
+
+
+def _bootstrap_ci(
+    values: "np.ndarray[Any, Any]",
+    is_valid: "np.ndarray[Any, Any]",
+    confidence: float,
+    num_bootstrap: int,
+    seed: Optional[int],
+) -> Tuple["np.ndarray[Any, Any]", "np.ndarray[Any, Any]"]:
+    """Compute the bootstrapped confidence interval of the mean (per step).
+
+    Every bootstrap sample is represented by the number of times each run
+    is drawn, so the means of all the samples are computed with two matrix
+    products, ie (samples x runs) @ (runs x steps). The steps are processed
+    in chunks to bound the memory used by the (samples x steps) means.
+    """
+    num_runs, num_steps = values.shape
+    rng = np.random.default_rng(seed)
+    weights = rng.multinomial(
+        num_runs, np.full(num_runs, 1.0 / num_runs), size=num_bootstrap
+    ).astype(float)
+    values = np.where(is_valid, values, 0.0)
+    alpha = (1.0 - confidence) / 2.0
+    low, high = np.empty(num_steps), np.empty(num_steps)
+    chunk_size = max(1, BOOTSTRAP_CHUNK_SIZE // max(num_bootstrap, 1))
+    for start in range(0, num_steps, chunk_size):
+        end = start + chunk_size
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = (weights @ values[:, start:end]) / (
+                weights @ is_valid[:, start:end]
+            )
+        low[start:end], high[start:end] = _nanquantile(means, [alpha, 1.0 - alpha])
+    return low, high
+
+
+def aggregate_runs(
+    dfs: Sequence[pd.DataFrame],
+    step_key: str = "step",
+    columns: Optional[List[str]] = None,
+    fill: Optional[str] = "interpolate",
+    statistics: Sequence[str] = ("mean", "std", "sem"),
+    quantiles: Sequence[float] = (),
+    confidence: Optional[float] = None,
+    num_bootstrap: int = 1000,
+    seed: Optional[int] = None,
+) -> pd.DataFrame:
+    """Aggregate the metric dataframes of the runs, aligned on the step key.
+
+    Args:
+        dfs (Sequence[pd.DataFrame]): Metric dataframes of the runs
+        step_key (str, optional): Column to align the runs on. Defaults
+            to "step".
+        columns (Optional[List[str]], optional): Columns to aggregate. If
+            None, all the numeric columns (except the step key) are
+            aggregated. Defaults to None.
+        fill (Optional[str], optional): How to fill the steps that a run
+            did not log. Refer `align_runs()`. Defaults to "interpolate".
+        statistics, quantiles, confidence, num_bootstrap, seed: Refer
+            `compute_statistics()`.
+
+    Returns:
+        pd.DataFrame: Dataframe with one row per step, the step key column
+            and one column per (column, statistic), named as
+            "<column>_<statistic>" (eg "loss_mean").
+    """
+    if columns is None:
+        columns_dict: Dict[str, None] = {}
+        for df in dfs:
+            columns_dict.update(
+                dict.fromkeys(df.select_dtypes(include="number").columns)
+            )
+        columns = [column for column in columns_dict if column != step_key]
+    column_dfs = []
+    for column in columns:
+        grid, values = align_runs(dfs=dfs, column=column, step_key=step_key, fill=fill)
+        column_statistics = compute_statistics(
+            values=values,
+            statistics=statistics,
+            quantiles=quantiles,
+            confidence=confidence,
+            num_bootstrap=num_bootstrap,
+            seed=seed,
+        )
+        column_dfs.append(
+            pd.DataFrame(
+                {
+                    f"{column}_{statistic}": statistic_values
+                    for statistic, statistic_values in column_statistics.items()
+                },
+                index=pd.Index(grid, name=step_key),
+            )
+        )
+    if not column_dfs:
+        return pd.DataFrame({step_key: []})
+    # the columns can be logged at different steps.
+    return pd.concat(column_dfs, axis=1).reset_index()
+
+
+def aggregate_metric_statistics(
+    metric_list: List[ExperimentMetricType],
+    step_key: str = "step",
+    columns: Optional[List[str]] = None,
+    fill: Optional[str] = "interpolate",
+    statistics: Sequence[str] = ("mean", "std", "sem"),
+    quantiles: Sequence[float] = (),
+    confidence: Optional[float] = None,
+    num_bootstrap: int = 1000,
+    seed: Optional[int] = None,
+) -> ExperimentMetricType:
+    """Aggregate the metrics of the experiments, per metric key.
+
+    This function can be used as the `aggregate_metrics` function of
+    `ExperimentSequence.aggregate()`. The metric keys of the first
+    experiment are aggregated. Refer `aggregate_runs()` for the arguments.
+
+    Args:
+        metric_list (List[ExperimentMetricType]): Metrics of the experiments
+
+    Returns:
+        ExperimentMetricType: Mapping of the metric keys to the dataframes
+            of the statistics.
+    """
+    if not metric_list:
+        return {}
+    return {
+        key: aggregate_runs(
+            dfs=[metrics[key] for metrics in metric_list if key in metrics],
+            step_key=step_key,
+            columns=columns,
+            fill=fill,
+            statistics=statistics,
+            quantiles=quantiles,
+            confidence=confidence,
+            num_bootstrap=num_bootstrap,
+            seed=seed,
+        )
+        for key in metric_list[0]
+    }
@@ -0,0 +1,274 @@
+"""Cache of the parsed experiments, keyed by the state of their log files.
+
+`ParseCache.parse` returns the same experiment as `Parser.parse`, but it
+serializes the parsed experiment in the cache directory along with the
+state (device, inode, checksum of the first line, size, modification time
+and offset of the last complete line) of every log file. When the log
+files are parsed again:
+
+* If no file changed, the experiment is deserialized from the cache.
+* If the (jsonl) files were only appended to (or new files were added),
+  only the new lines are parsed and appended to the cached experiment.
+* Otherwise (eg a file was removed, truncated or replaced, or a
+  compressed segment was appended to), the files are parsed again.
+
+Only the complete lines (ie lines that end with a newline) are parsed, so
+a line that is still being written is parsed once it is complete. The
+cache keeps at most `max_entries` experiments and removes the least
+recently used experiments.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from ml_logger import utils
+from ml_logger.parser.base import DEFAULT_BLOCK_SIZE, FileChunkType
+from ml_logger.parser.columnar import is_columnar_file
+from ml_logger.parser.experiment.experiment import Experiment, deserialize
+from ml_logger.parser.experiment.parser import Parser
+from ml_logger.parser.metric import concat_dfs
+from ml_logger.segment import is_compressed_file
+
+# Number of bytes (of the first line) used to identify a log file.
+_FINGERPRINT_SIZE = 1024
+
+STATE_FILENAME = "state.json"
+
+FileStateType = Dict[str, int]
+
+
+def _get_complete_lines_end(file_path: Path, size: int) -> int:
+    """Get the offset after the last newline in the first `size` bytes of a file."""
+    with open(file_path, "rb") as f:
+        end = size
+        while end > 0:
+            start = max(0, end - DEFAULT_BLOCK_SIZE)
+            f.seek(start)
+            block = f.read(end - start)
+            index = block.rfind(b"\n")
+            if index >= 0:
+                return start + index + 1
+            end = start
+    return 0
+
+
+def get_file_state(file_path: Path) -> FileStateType:
+    """Get the state of a log file.
+
+    The `offset` is the number of bytes of the complete lines of the file.
+    """
+    with open(file_path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        fingerprint = zlib.crc32(f.readline(_FINGERPRINT_SIZE))
+    if is_columnar_file(file_path) or is_compressed_file(file_path):
+        # the columnar files are written atomically and the compressed
+        # segments are parsed as a whole.
+        offset = stat.st_size
+    else:
+        offset = _get_complete_lines_end(file_path, stat.st_size)
+    return {
+        "device": stat.st_dev,
+        "inode": stat.st_ino,
+        "fingerprint": fingerprint,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "offset": offset,
+    }
+
+
+def _is_appended(old_state: FileStateType, new_state: FileStateType) -> bool:
+    """Check if a file was only appended to (since the old state)."""
+    return all(
+        old_state[key] == new_state[key] for key in ("device", "inode", "fingerprint")
+    ) and (old_state["offset"] <= new_state["offset"])
+
+
+def _get_ranges(
+    state: Dict[str, FileStateType],
+) -> Tuple[List[FileChunkType], List[Path]]:
+    """Get the byte ranges (of the complete lines) and the columnar files to parse."""
+    file_chunks: List[FileChunkType] = [
+        (path, 0, file_state["offset"])
+        for path, file_state in state.items()
+        if not is_columnar_file(path) and file_state["offset"] > 0
+    ]
+    columnar_paths = [Path(path) for path in state if is_columnar_file(path)]
+    return file_chunks, columnar_paths
+
+
+def _get_new_ranges(
+    old_state: Dict[str, FileStateType], new_state: Dict[str, FileStateType]
+) -> Optional[Tuple[List[FileChunkType], List[Path]]]:
+    """Get the byte ranges and the columnar files to parse since the old state.
+
+    Returns None if the files have to be parsed again, ie if a file was
+    removed, truncated or replaced (or a columnar file or a compressed
+    segment changed).
+    """
+    if not set(old_state) <= set(new_state):
+        return None
+    for path, old_file_state in old_state.items():
+        file_state = new_state[path]
+        if not _is_appended(old_file_state, file_state) or (
+            (is_columnar_file(path) or is_compressed_file(path))
+            and old_file_state != file_state
+        ):
+            return None
+    file_chunks: List[FileChunkType] = []
+    columnar_paths = []
+    for path, file_state in new_state.items():
+        if is_columnar_file(path):
+            if path not in old_state:
+                columnar_paths.append(Path(path))
+            continue
+        start = old_state[path]["offset"] if path in old_state else 0
+        if file_state["offset"] > start:
+            file_chunks.append((path, start, file_state["offset"]))
+    return file_chunks, columnar_paths
+
+
+def _merge_experiments(experiment: Experiment, new_experiment: Experiment) -> None:
+    """Append the configs, metrics and info of `new_experiment` to `experiment`."""
+    experiment.configs.extend(new_experiment.configs)
+    all_metrics = [experiment.metrics, new_experiment.metrics]
+    experiment.metrics = {
+        key: concat_dfs([metrics[key] for metrics in all_metrics if key in metrics])
+        for key in dict.fromkeys([*experiment.metrics, *new_experiment.metrics])
+    }
+    for key, logs in new_experiment.info.items():
+        experiment.info.setdefault(key, []).extend(logs)
+
+
+class ParseCache:
+    """Cache of the parsed experiments, keyed by the state of their log files."""
+
+    def __init__(
+        self, cache_dir: str, parser: Optional[Parser] = None, max_entries: int = 256
+    ):
+        """Initialise the cache.
+
+        Args:
+            cache_dir (str): Directory to store the parsed experiments in.
+            parser (Optional[Parser], optional): Parser to parse the
+                experiments with. If None, the default experiment parser
+                is used. Defaults to None.
+            max_entries (int, optional): Maximum number of experiments to
+                keep in the cache. The least recently used experiments are
+                removed. Defaults to 256.
+        """
+        self.cache_dir = cache_dir
+        self.parser = parser if parser is not None else Parser()
+        self.max_entries = max_entries
+        utils.make_dir(cache_dir)
+
+    def _get_entry_dir(self, filepath_pattern: Union[str, Path]) -> str:
+        key = str(filepath_pattern)
+        if os.path.isdir(filepath_pattern):
+            key = os.path.abspath(filepath_pattern)
+        return os.path.join(
+            self.cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+        )
+
+    def _load_state(self, entry_dir: str) -> Optional[Dict[str, FileStateType]]:
+        try:
+            with open(os.path.join(entry_dir, STATE_FILENAME)) as f:
+                state: Dict[str, FileStateType] = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return state
+
+    def parse(
+        self,
+        filepath_pattern: Union[str, Path],
+        workers: Optional[int] = None,
+        executor: str = "process",
+    ) -> Experiment:
+        """Load one experiment from the log dir, using the cache.
+
+        Args:
+            filepath_pattern (Union[str, Path]): filepath pattern to glob
+                or instance of Path (directory) object. Refer
+                `Parser.parse()`.
+            workers (Optional[int], optional): Number of workers to parse
+                the (new lines of the) files with. Refer `Parser.parse()`.
+                Defaults to None.
+            executor (str, optional): Type of the workers. Refer
+                `Parser.parse()`. Defaults to "process".
+
+        Returns:
+            Experiment
+        """
+        entry_dir = self._get_entry_dir(filepath_pattern)
+        old_state = self._load_state(entry_dir)
+        new_state = {}
+        for path in self.parser._get_paths(filepath_pattern):
+            try:
+                new_state[str(path)] = get_file_state(path)
+            except FileNotFoundError:
+                # the file was removed after globbing.
+                continue
+        if old_state == new_state:
+            os.utime(os.path.join(entry_dir, STATE_FILENAME))
+            return deserialize(os.path.join(entry_dir, "experiment"))
+        experiment: Optional[Experiment] = None
+        ranges = None
+        if old_state is not None:
+            ranges = _get_new_ranges(old_state, new_state)
+        if ranges is None:
+            ranges = _get_ranges(new_state)
+        else:
+            experiment = deserialize(os.path.join(entry_dir, "experiment"))
+        file_chunks, columnar_paths = ranges
+        new_experiment = self.parser._make_experiment(
+            logs=self.parser._parse_file_chunks(
+                file_chunks=file_chunks, workers=workers, executor=executor
+            ),
+            columnar_paths=columnar_paths,
+        )
+        if experiment is None:
+            experiment = new_experiment
+        else:
+            _merge_experiments(experiment, new_experiment)
+        self._write_entry(entry_dir, experiment, new_state)
+        return experiment
+
+    def _write_entry(
+        self, entry_dir: str, experiment: Experiment, state: Dict[str, FileStateType]
+    ) -> None:
+        """Write the experiment and the state (last) in the cache, atomically."""
+        temp_dir = f"{entry_dir}.{os.getpid()}.tmp"
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        experiment.serialize(os.path.join(temp_dir, "experiment"))
+        with open(os.path.join(temp_dir, STATE_FILENAME), "w") as f:
+            json.dump(state, f)
+        old_dir = f"{entry_dir}.{os.getpid()}.old"
+        if os.path.isdir(entry_dir):
+            os.replace(entry_dir, old_dir)
+        os.replace(temp_dir, entry_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        self._evict()
+
+    def _evict(self) -> None:
+        """Remove the least recently used experiments (beyond `max_entries`)."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            state_path = os.path.join(self.cache_dir, name, STATE_FILENAME)
+            if "." not in name and os.path.isfile(state_path):
+                entries.append((os.stat(state_path).st_mtime_ns, name))
+        entries.sort()
+        for _, name in entries[: max(0, len(entries) - self.max_entries)]:
+            shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+
+    def __len__(self) -> int:
+        """Return the number of cached experiments."""
+        return sum(
+            1
+            for name in os.listdir(self.cache_dir)
+            if "." not in name
+            and os.path.isfile(os.path.join(self.cache_dir, name, STATE_FILENAME))
+        )
@@ -0,0 +1,320 @@
+"""SQLite catalog of the serialized experiments.
+
+The catalog has one row per serialized experiment (ie a directory written
+by `Experiment.serialize`) with the following columns:
+
+* `path`: path to the directory of the experiment.
+* `signature`: modification times and sizes of the files of the
+  experiment, used to update the catalog incrementally.
+* `config.<key>`: values of the (last) config of the experiment, flattened
+  using "." as the separator.
+* `metric.<metric key>.<column>.<stat>`: summary statistics (`min`, `max`
+  and `last`) of the numeric columns of the metrics.
+
+The columns are added as new keys are seen. Use `select()` to find the
+experiments that match some conditions, without deserializing them, and
+`load()` to deserialize only the matching experiments.
+"""
+
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from ml_logger.parser.experiment.experiment import (
+    Experiment,
+    ExperimentSequence,
+    LazyExperimentSequence,
+    deserialize,
+)
+from ml_logger.utils import flatten_dict
+
+ConditionType = Union[Any, Tuple[str, Any]]
+
+OPERATORS = ("==", "!=", "<", "<=", ">", ">=", "in")
+
+TABLE = "experiments"
+
+
+def _quote(name: str) -> str:
+    """Quote an identifier (eg a column name) for SQLite."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _to_sql_value(value: object) -> object:
+    """Convert a value to a type that SQLite supports."""
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    if hasattr(value, "item"):
+        # numpy scalars.
+        return value.item()
+    return json.dumps(value)
+
+
+def get_signature(dir_path: str) -> str:
+    """Get the signature (modification times and sizes) of the files of an experiment."""
+    paths = [Path(dir_path) / "config.jsonl", Path(dir_path) / "info.gzip"]
+    metric_dir = Path(dir_path) / "metric"
+    if metric_dir.is_dir():
+        paths.extend(sorted(metric_dir.iterdir()))
+    signature = []
+    for path in paths:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        signature.append(f"{path.name}:{stat.st_mtime_ns}:{stat.st_size}")
+    return ",".join(signature)
+
+
+def summarize_experiment(experiment: Experiment) -> Dict[str, Any]:
+    """Get the row (of the catalog) for an experiment.
+
+    Args:
+        experiment (Experiment): Experiment to summarize
+
+    Returns:
+        Dict[str, Any]: Mapping of the columns to the values
+    """
+    row = {
+        f"config.{key}": _to_sql_value(value)
+        for key, value in flatten_dict(experiment.config or {}, sep=".").items()
+    }
+    for metric_key in experiment.metrics:
+        df = experiment.metrics[metric_key].select_dtypes(include="number")
+        if df.empty:
+            continue
+        stats = {
+            "min": df.min(),
+            "max": df.max(),
+            "last": df.ffill().iloc[-1],
+        }
+        for stat, values in stats.items():
+            for column, value in values.items():
+                if not pd.isna(value):
+                    row[f"metric.{metric_key}.{column}.{stat}"] = _to_sql_value(value)
+    return row
+
+
+class Catalog:
+    """SQLite catalog of the serialized experiments."""
+
+    def __init__(self, path: str):
+        """Initialise the catalog.
+
+        Args:
+            path (str): Path to the SQLite database. It is created if it
+                does not exist.
+        """
+        self.path = path
+        self._connection = sqlite3.connect(path)
+        with self._connection:
+            self._connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {TABLE} "
+                "(path TEXT PRIMARY KEY, signature TEXT)"
+            )
+
+    @property
+    def columns(self) -> List[str]:
+        """Columns of the catalog."""
+        cursor = self._connection.execute(f"PRAGMA table_info({TABLE})")
+        return [row[1] for row in cursor.fetchall()]
+
+    def _add_columns(self, columns: Iterable[str]) -> None:
+        existing_columns = set(self.columns)
+        for column in columns:
+            if column not in existing_columns:
+                self._connection.execute(
+                    f"ALTER TABLE {TABLE} ADD COLUMN {_quote(column)}"
+                )
+                existing_columns.add(column)
+
+    def add(self, dir_path: str, experiment: Optional[Experiment] = None) -> None:
+        """Add (or replace) a serialized experiment to the catalog.
+
+        Args:
+            dir_path (str): Directory of the serialized experiment.
+            experiment (Optional[Experiment], optional): The experiment, if
+                it is already loaded. If None, the experiment is
+                deserialized. Defaults to None.
+        """
+        if experiment is None:
+            experiment = deserialize(dir_path, lazy=True)
+        row = summarize_experiment(experiment)
+        row["path"] = os.path.abspath(dir_path)
+        row["signature"] = get_signature(dir_path)
+        with self._connection:
+            self._add_columns(row)
+            self._connection.execute(
+                f"INSERT OR REPLACE INTO {TABLE} "
+                f"({', '.join(_quote(column) for column in row)}) "
+                f"VALUES ({', '.join('?' for _ in row)})",
+                list(row.values()),
+            )
+
+    def remove(self, dir_path: str) -> None:
+        """Remove an experiment from the catalog.
+
+        Args:
+            dir_path (str): Directory of the serialized experiment.
+        """
+        with self._connection:
+            self._connection.execute(
+                f"DELETE FROM {TABLE} WHERE path = ?", (os.path.abspath(dir_path),)
+            )
+
+    def update(self, dir_paths: Iterable[str], remove_missing: bool = False) -> int:
+        """Add the new (or modified) serialized experiments to the catalog.
+
+        The experiments whose files have not changed (since they were
+        added) are not deserialized again.
+
+        Args:
+            dir_paths (Iterable[str]): Directories of the serialized
+                experiments.
+            remove_missing (bool, optional): Remove the experiments (from
+                the catalog) that are not in `dir_paths`. Defaults to False.
+
+        Returns:
+            int: Number of experiments that were added (or replaced).
+        """
+        signatures = dict(
+            self._connection.execute(f"SELECT path, signature FROM {TABLE}")
+        )
+        paths = set()
+        num_added = 0
+        for dir_path in dir_paths:
+            path = os.path.abspath(dir_path)
+            paths.add(path)
+            if signatures.get(path) != get_signature(dir_path):
+                self.add(dir_path)
+                num_added += 1
+        if remove_missing:
+            for path in set(signatures) - paths:
+                self.remove(path)
+        return num_added
+
+    def update_from_root(self, root: str) -> int:
+        """Update the catalog with the serialized experiments under a directory.
+
+        The experiments that are no longer under the directory are removed.
+
+        Args:
+            root (str): Directory to search (recursively) for the
+                serialized experiments, ie directories with a
+                `config.jsonl` file.
+
+        Returns:
+            int: Number of experiments that were added (or replaced).
+        """
+        dir_paths = sorted(
+            str(path.parent) for path in Path(root).glob("**/config.jsonl")
+        )
+        return self.update(dir_paths, remove_missing=True)
+
+    def select(
+        self, conditions: Optional[Dict[str, ConditionType]] = None
+    ) -> List[str]:
+        """Select the experiments that match all the conditions.
+
+        Args:
+            conditions (Optional[Dict[str, ConditionType]], optional):
+                Mapping of the columns to the conditions. A condition is
+                either a value (to compare for equality) or a tuple of an
+                operator (one of "==", "!=", "<", "<=", ">", ">=" and "in")
+                and a value (a list of values for "in"). For example,
+                `{"config.lr": ("<", 1e-3), "config.dataset": "mnist"}`.
+                Conditions on the missing columns do not match any
+                experiment. If None, all the experiments are selected.
+                Defaults to None.
+
+        Returns:
+            List[str]: Directories of the matching experiments (sorted)
+        """
+        clauses = []
+        params: List[Any] = []
+        columns = set(self.columns)
+        for column, condition in (conditions or {}).items():
+            operator, value = "==", condition
+            if isinstance(condition, tuple) and len(condition) == 2:
+                operator, value = condition
+            if operator not in OPERATORS:
+                operator_string = ", ".join(OPERATORS)
+                raise ValueError(
+                    f"operator should be one of {operator_string}. Got {operator}"
+                )
+            if column not in columns:
+                return []
+            if operator == "in":
+                values = [_to_sql_value(_value) for _value in value]
+                placeholders = ", ".join("?" for _ in values)
+                clauses.append(f"{_quote(column)} IN ({placeholders})")
+                params.extend(values)
+            else:
+                clauses.append(f"{_quote(column)} {operator} ?")
+                params.append(_to_sql_value(value))
+        query = f"SELECT path FROM {TABLE}"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY path"
+        return [row[0] for row in self._connection.execute(query, params)]
+
+    def load(
+        self,
+        conditions: Optional[Dict[str, ConditionType]] = None,
+        lazy: bool = False,
+    ) -> ExperimentSequence:
+        """Deserialize the experiments that match all the conditions.
+
+        Args:
+            conditions (Optional[Dict[str, ConditionType]], optional):
+                Conditions to select the experiments. Refer `select()`.
+                Defaults to None.
+            lazy (bool, optional): Load the metrics and info of the
+                experiments on first access. Refer `deserialize()`.
+                Defaults to False.
+
+        Returns:
+            ExperimentSequence: Matching experiments
+        """
+        return ExperimentSequence(
+            [
+                deserialize(dir_path, lazy=lazy)
+                for dir_path in self.select(conditions=conditions)
+            ]
+        )
+
+    def stream(
+        self,
+        conditions: Optional[Dict[str, ConditionType]] = None,
+        cache_size: int = 0,
+    ) -> LazyExperimentSequence:
+        """Get a lazy sequence of the experiments that match all the conditions.
+
+        The catalog is queried when the sequence is first used and the
+        experiments are deserialized as they are accessed.
+
+        Args:
+            conditions (Optional[Dict[str, ConditionType]], optional):
+                Conditions to select the experiments. Refer `select()`.
+                Defaults to None.
+            cache_size (int, optional): Maximum number of experiments to
+                cache. Refer `LazyExperimentSequence`. Defaults to 0.
+
+        Returns:
+            LazyExperimentSequence: Matching experiments
+        """
+        return LazyExperimentSequence(
+            source=lambda: self.select(conditions=conditions), cache_size=cache_size
+        )
+
+    def to_df(self) -> pd.DataFrame:
+        """Get the catalog as a dataframe (one row per experiment)."""
+        return pd.read_sql_query(f"SELECT * FROM {TABLE}", self._connection)
+
+    def close(self) -> None:
+        """Close the connection to the database."""
+        self._connection.close()
@@ -1,19 +1,44 @@
 """Container for the experiment data."""
 
+import glob
 import gzip
 import json
-from collections import UserList
+from collections import OrderedDict, UserList
+from concurrent.futures import as_completed
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    overload,
+)
 
 import pandas as pd
 
 from ml_logger import utils
+from ml_logger.parser.base import EXECUTORS
 from ml_logger.types import ConfigType
 
-ExperimentMetricType = Dict[str, pd.DataFrame]
+ExperimentMetricType = MutableMapping[str, pd.DataFrame]
 ExperimentInfoType = Dict[Any, Any]
 
+# Function called with the number of completed tasks and the total number of
+# tasks, eg to report the progress.
+ProgressFunctionType = Callable[[int, int], None]
+
+_InputType = TypeVar("_InputType")
+_OutputType = TypeVar("_OutputType")
+
 
 class Experiment:
     def __init__(
@@ -47,12 +72,23 @@ class Experiment:
             return self.configs[-1]
         return None
 
-    def serialize(self, dir_path: str) -> None:
+    def serialize(
+        self, dir_path: str, metric_compression: Optional[str] = None
+    ) -> None:
         """Serialize the experiment data and store at `dir_path`.
 
         * configs are stored as jsonl (since there are only a few configs per experiment) in a file called `config.jsonl`.
         * metrics are stored in [`feather` format](https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.DataFrame.to_feather.html).
         * info is stored in the gzip format.
+
+        Args:
+            dir_path (str): Directory to store the experiment data in.
+            metric_compression (Optional[str], optional): Compression of
+                the feather files: "uncompressed", "lz4" or "zstd". The
+                uncompressed files can be memory mapped (without copying
+                the data) by `deserialize(dir_path, lazy=True)`. If None,
+                the default compression (of `pyarrow`) is used. Defaults
+                to None.
         """
         utils.make_dir(dir_path)
         path_to_save = f"{dir_path}/config.jsonl"
@@ -66,8 +102,12 @@ class Experiment:
             path_to_save = f"{metric_dir}/{key}"
             if self.metrics[key].empty:
                 pass
-            else:
+            elif metric_compression is None:
                 self.metrics[key].to_feather(path=path_to_save)
+            else:
+                self.metrics[key].to_feather(
+                    path=path_to_save, compression=metric_compression
+                )
 
         path_to_save = f"{dir_path}/info.gzip"
         with gzip.open(path_to_save, "wb") as f:  # type: ignore[assignment]
@@ -88,30 +128,237 @@ class Experiment:
         )
 
 
-def deserialize(dir_path: str) -> Experiment:
-    """Deserialize the experiment data stored at `dir_path` and return an Experiment object."""
+def _load_configs(dir_path: str) -> List[ConfigType]:
     path_to_load_from = f"{dir_path}/config.jsonl"
     configs = []
     with open(path_to_load_from) as f:
         for line in f:
             configs.append(json.loads(line))
+    return configs
 
-    metrics = {}
+
+def _get_metric_paths(dir_path: str) -> Dict[str, Path]:
+    """Get the paths to the metric files, keyed by the metric keys."""
     dir_to_load_from = Path(f"{dir_path}/metric/")
-    for path_to_load_metric in dir_to_load_from.iterdir():
-        if path_to_load_metric.is_file():
-            key = path_to_load_metric.parts[-1]
-            metrics[key] = pd.read_feather(path_to_load_metric)
+    return {
+        path_to_load_metric.parts[-1]: path_to_load_metric
+        for path_to_load_metric in dir_to_load_from.iterdir()
+        if path_to_load_metric.is_file()
+    }
+
+
+def _load_info(dir_path: str) -> ExperimentInfoType:
+    path_to_load_from = f"{dir_path}/info.gzip"
+    with gzip.open(path_to_load_from, "rb") as f:
+        info: ExperimentInfoType = json.loads(f.read().decode("utf-8"))
+    return info
+
+
+def _memory_map_feather(path: Union[str, Path]) -> pd.DataFrame:
+    """Read a feather file by memory mapping it.
+
+    The (numeric) columns of uncompressed files without missing values are
+    not copied.
+    """
+    from pyarrow import feather
+
+    table = feather.read_table(str(path), memory_map=True)
+    df: pd.DataFrame = table.to_pandas(split_blocks=True)
+    return df
+
+
+class LazyMetricDict(MutableMapping[str, pd.DataFrame]):
+    """Mapping of the metric keys to the dataframes, loaded on first access."""
+
+    def __init__(self, dir_path: str):
+        """Map the metric keys to the dataframes, loaded on first access.
+
+        Args:
+            dir_path (str): Directory with the serialized experiment.
+        """
+        self.dir_path = dir_path
+        self._paths: Optional[Dict[str, Path]] = None
+        self._metrics: Dict[str, pd.DataFrame] = {}
+
+    @property
+    def paths(self) -> Dict[str, Path]:
+        """Paths to the metric files that are not loaded yet."""
+        if self._paths is None:
+            self._paths = _get_metric_paths(self.dir_path)
+            if not self._paths:
+                self._metrics["all"] = pd.DataFrame()
+        return self._paths
+
+    def __getitem__(self, key: str) -> pd.DataFrame:
+        """Get the dataframe for the key, loading it if required."""
+        if key not in self._metrics and key in self.paths:
+            self._metrics[key] = _memory_map_feather(self.paths.pop(key))
+        return self._metrics[key]
+
+    def __setitem__(self, key: str, value: pd.DataFrame) -> None:
+        """Set the dataframe for the key."""
+        self.paths.pop(key, None)
+        self._metrics[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        """Remove the key (and its dataframe)."""
+        if key in self.paths:
+            del self.paths[key]
+        else:
+            del self._metrics[key]
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the keys, without loading the dataframes."""
+        return iter([*self._metrics, *self.paths])
+
+    def __len__(self) -> int:
+        """Return the number of keys."""
+        return len(self._metrics) + len(self.paths)
+
+    def __contains__(self, key: object) -> bool:
+        """Check if the key exists, without loading the dataframe."""
+        return key in self._metrics or key in self.paths
+
+
+class LazyExperiment(Experiment):
+    """Experiment whose metrics and info are loaded on first access."""
+
+    def __init__(self, dir_path: str):
+        """Load the metrics and info of an experiment on first access.
+
+        The configs are loaded when the experiment is created. Every
+        metric dataframe is loaded (by memory mapping its feather file)
+        when it is accessed for the first time. The info is loaded when it
+        is accessed for the first time.
+
+        Args:
+            dir_path (str): Directory with the serialized experiment.
+        """
+        super().__init__(
+            configs=_load_configs(dir_path), metrics=LazyMetricDict(dir_path)
+        )
+        self.dir_path = dir_path
+        self._info: Optional[ExperimentInfoType] = None
+
+    @property
+    def info(self) -> ExperimentInfoType:
+        """Access the info, loading it if required."""
+        if self._info is None:
+            self._info = _load_info(self.dir_path)
+        return self._info
+
+    @info.setter
+    def info(self, info: ExperimentInfoType) -> None:
+        self._info = info
+
+
+def deserialize(dir_path: str, lazy: bool = False) -> Experiment:
+    """Deserialize the experiment data stored at `dir_path` and return an Experiment object.
+
+    Args:
+        dir_path (str): Directory with the serialized experiment.
+        lazy (bool, optional): If True, return a `LazyExperiment`, that
+            reads only the configs (`config.jsonl`) right away and loads
+            the metrics (by memory mapping the feather files) and the info
+            on first access. Defaults to False.
+
+    Returns:
+        Experiment
+    """
+    if lazy:
+        return LazyExperiment(dir_path=dir_path)
+    configs = _load_configs(dir_path)
+
+    metrics: ExperimentMetricType = {
+        key: pd.read_feather(path) for key, path in _get_metric_paths(dir_path).items()
+    }
     if not metrics:
         metrics["all"] = pd.DataFrame()
 
-    path_to_load_from = f"{dir_path}/info.gzip"
-    with gzip.open(path_to_load_from, "rb") as f:  # type: ignore[assignment]
-        info = json.loads(f.read().decode("utf-8"))  # type: ignore[attr-defined]
+    info = _load_info(dir_path)
+
+    return Experiment(configs=configs, metrics=metrics, info=info)
+
+
+def _map_in_order(
+    function: Callable[[_InputType], _OutputType],
+    inputs: Iterable[_InputType],
+    workers: Optional[int],
+    executor: str,
+    progress: Optional[ProgressFunctionType],
+) -> List[_OutputType]:
+    """Apply the function to the inputs, optionally in parallel.
 
+    The outputs are returned in the order of the inputs. `progress` is
+    called as the tasks complete.
+    """
+    inputs = list(inputs)
+    if workers is None or workers <= 1:
+        outputs = []
+        for _input in inputs:
+            outputs.append(function(_input))
+            if progress is not None:
+                progress(len(outputs), len(inputs))
+        return outputs
+    if executor not in EXECUTORS:
+        executor_string = ", ".join(EXECUTORS)
+        raise ValueError(f"executor should be one of {executor_string}. Got {executor}")
+    ordered_outputs: Dict[int, _OutputType] = {}
+    with EXECUTORS[executor](max_workers=workers) as pool:
+        futures = {
+            pool.submit(function, _input): index for index, _input in enumerate(inputs)
+        }
+        for future in as_completed(futures):
+            ordered_outputs[futures[future]] = future.result()
+            if progress is not None:
+                progress(len(ordered_outputs), len(inputs))
+    return [ordered_outputs[index] for index in range(len(inputs))]
+
+
+def _deserialize_as_arrow(
+    dir_path: str,
+) -> Tuple[List[ConfigType], Dict[str, Any], ExperimentInfoType]:
+    """Deserialize an experiment with the metrics as Arrow IPC buffers.
+
+    The buffers are sent from the worker processes to the parent process
+    as bytes, without pickling the dataframes.
+    """
+    import pyarrow as pa
+    from pyarrow import feather
+
+    metrics = {}
+    for key, path in _get_metric_paths(dir_path).items():
+        table = feather.read_table(str(path), memory_map=True)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        metrics[key] = sink.getvalue()
+    return _load_configs(dir_path), metrics, _load_info(dir_path)
+
+
+def _experiment_from_arrow(
+    data: Tuple[List[ConfigType], Dict[str, Any], ExperimentInfoType],
+) -> Experiment:
+    """Create the experiment returned by `_deserialize_as_arrow`."""
+    import pyarrow as pa
+
+    configs, buffers, info = data
+    metrics: ExperimentMetricType = {
+        key: pa.ipc.open_stream(buffer).read_all().to_pandas()
+        for key, buffer in buffers.items()
+    }
+    if not metrics:
+        metrics["all"] = pd.DataFrame()
     return Experiment(configs=configs, metrics=metrics, info=info)
 
 
+def _serialize(args: Tuple[Experiment, str, Optional[str]]) -> str:
+    """Serialize the experiment (in a worker) and return the directory."""
+    experiment, dir_path, metric_compression = args
+    experiment.serialize(dir_path=dir_path, metric_compression=metric_compression)
+    return dir_path
+
+
 def return_first_config(config_lists: List[List[ConfigType]]) -> List[ConfigType]:
     """Return the first config list, from a list of list of configs, else return empty list.
 
@@ -163,6 +410,108 @@ class ExperimentSequence(UserList):  # type: ignore
         """List-like interface to a collection of Experiments."""
         super().__init__(experiments)
 
+    @classmethod
+    def from_dirs(
+        cls: Type["ExperimentSequence"],
+        dir_paths: Iterable[str],
+        workers: Optional[int] = None,
+        executor: str = "process",
+        progress: Optional[ProgressFunctionType] = None,
+    ) -> "ExperimentSequence":
+        """Deserialize the experiments, optionally in parallel.
+
+        Args:
+            dir_paths (Iterable[str]): Directories of the serialized
+                experiments.
+            workers (Optional[int], optional): Number of workers to
+                deserialize the experiments with. The experiments are
+                deserialized in the current thread if workers is None or 1.
+                Defaults to None.
+            executor (str, optional): Type of the workers: "process" or
+                "thread". The processes send the metrics back as Arrow
+                buffers (instead of pickled dataframes). Reading the
+                feather files releases the GIL, so "thread" is suitable
+                when the experiments have small configs and infos.
+                Defaults to "process".
+            progress (Optional[ProgressFunctionType], optional): Function
+                called with the number of deserialized experiments and the
+                total number of experiments, as the experiments are
+                deserialized. Defaults to None.
+
+        Returns:
+            ExperimentSequence: Experiments in the order of `dir_paths`
+        """
+        if workers is not None and workers > 1 and executor == "process":
+            data = _map_in_order(
+                _deserialize_as_arrow,
+                dir_paths,
+                workers=workers,
+                executor=executor,
+                progress=progress,
+            )
+            return cls([_experiment_from_arrow(_data) for _data in data])
+        return cls(
+            _map_in_order(
+                deserialize,
+                dir_paths,
+                workers=workers,
+                executor=executor,
+                progress=progress,
+            )
+        )
+
+    def serialize_all(
+        self,
+        root: str,
+        dir_names: Optional[List[str]] = None,
+        metric_compression: Optional[str] = None,
+        workers: Optional[int] = None,
+        executor: str = "process",
+        progress: Optional[ProgressFunctionType] = None,
+    ) -> List[str]:
+        """Serialize the experiments (in the sequence), optionally in parallel.
+
+        Args:
+            root (str): Directory to serialize the experiments in.
+            dir_names (Optional[List[str]], optional): Names of the
+                directories (in `root`) of the experiments. If None, the
+                experiments are serialized in directories named by their
+                index in the sequence. Defaults to None.
+            metric_compression (Optional[str], optional): Compression of
+                the feather files. Refer `Experiment.serialize()`. Defaults
+                to None.
+            workers (Optional[int], optional): Number of workers to
+                serialize the experiments with. The experiments are
+                serialized in the current thread if workers is None or 1.
+                Defaults to None.
+            executor (str, optional): Type of the workers: "process" or
+                "thread". Defaults to "process".
+            progress (Optional[ProgressFunctionType], optional): Function
+                called with the number of serialized experiments and the
+                total number of experiments, as the experiments are
+                serialized. Defaults to None.
+
+        Returns:
+            List[str]: Directories of the experiments, in the order of the
+                sequence.
+        """
+        if dir_names is None:
+            dir_names = [str(index) for index in range(len(self.data))]
+        if len(dir_names) != len(self.data):
+            raise ValueError(
+                f"Expected {len(self.data)} dir_names. Got {len(dir_names)}"
+            )
+        return _map_in_order(
+            _serialize,
+            [
+                (experiment, f"{root}/{dir_name}", metric_compression)
+                for experiment, dir_name in zip(self.data, dir_names)
+            ],
+            workers=workers,
+            executor=executor,
+            progress=progress,
+        )
+
     def groupby(
         self, group_fn: Callable[[Experiment], str]
     ) -> Dict[str, "ExperimentSequence"]:
@@ -226,7 +575,233 @@ class ExperimentSequence(UserList):  # type: ignore
             Experiment: Aggregated Experiment.
         """
         return Experiment(
-            configs=aggregate_configs(*[exp.config for exp in self.data]),
-            metrics=aggregate_metrics(*[exp.metrics for exp in self.data]),
-            info=aggregate_infos(*[exp.info for exp in self.data]),
+            configs=aggregate_configs([exp.configs for exp in self.data]),
+            metrics=aggregate_metrics([exp.metrics for exp in self.data]),
+            info=aggregate_infos([exp.info for exp in self.data]),
         )
+
+
+# A glob pattern (of the experiment directories), a list of experiment
+# directories or a function returning the experiment directories.
+ExperimentSourceType = Union[
+    str, Iterable[Union[str, Path]], Callable[[], Iterable[Union[str, Path]]]
+]
+
+
+class ExperimentCache:
+    """LRU cache of the (deserialized) experiments, keyed by their directories."""
+
+    def __init__(self, max_size: int = 0, lazy: bool = True):
+        """Initialise the cache.
+
+        Args:
+            max_size (int, optional): Maximum number of experiments to keep
+                in the cache. If 0, the experiments are not cached.
+                Defaults to 0.
+            lazy (bool, optional): Deserialize the experiments lazily.
+                Refer `deserialize()`. Defaults to True.
+        """
+        self.max_size = max_size
+        self.lazy = lazy
+        self._experiments: "OrderedDict[str, Experiment]" = OrderedDict()
+
+    def get(self, dir_path: str) -> Experiment:
+        """Get the experiment, deserializing it if it is not in the cache."""
+        if dir_path in self._experiments:
+            self._experiments.move_to_end(dir_path)
+            return self._experiments[dir_path]
+        experiment = deserialize(dir_path, lazy=self.lazy)
+        if self.max_size > 0:
+            self._experiments[dir_path] = experiment
+            if len(self._experiments) > self.max_size:
+                self._experiments.popitem(last=False)
+        return experiment
+
+    def __len__(self) -> int:
+        """Return the number of cached experiments."""
+        return len(self._experiments)
+
+
+class LazyExperimentSequence(Sequence[Experiment]):
+    """Sequence of serialized experiments that are loaded as they are accessed.
+
+    Unlike `ExperimentSequence`, the experiments are not held in memory:
+    `filter` and `groupby` return new lazy sequences and the experiments
+    are deserialized (and released) as they stream through. Recently used
+    experiments can be kept in a bounded LRU cache, shared by the sequences
+    derived from this sequence.
+    """
+
+    def __init__(
+        self, source: ExperimentSourceType, cache_size: int = 0, lazy: bool = True
+    ):
+        """Initialise the sequence.
+
+        Args:
+            source (ExperimentSourceType): Glob pattern of the directories
+                of the serialized experiments (sorted), list of the
+                directories or a function returning the directories (eg
+                `lambda: catalog.select(conditions)`). The source is
+                evaluated when the sequence is first used.
+            cache_size (int, optional): Maximum number of (deserialized)
+                experiments to cache. If 0, the experiments are not cached.
+                Defaults to 0.
+            lazy (bool, optional): Deserialize the experiments lazily, ie
+                load their metrics and info on first access. Refer
+                `deserialize()`. Defaults to True.
+        """
+        self._source = source
+        self._paths: Optional[List[str]] = None
+        self._filter_fns: List[Callable[[Experiment], bool]] = []
+        self._cache = ExperimentCache(max_size=cache_size, lazy=lazy)
+
+    def _get_source_paths(self) -> List[str]:
+        """Get the directories of the experiments, before the filters."""
+        if self._paths is None:
+            paths: Iterable[Union[str, Path]]
+            if isinstance(self._source, str):
+                paths = sorted(
+                    path for path in glob.glob(self._source) if Path(path).is_dir()
+                )
+            elif callable(self._source):
+                paths = self._source()
+            else:
+                paths = self._source
+            self._paths = [str(path) for path in paths]
+        return self._paths
+
+    def _derive(
+        self,
+        paths: List[str],
+        filter_fns: Optional[List[Callable[[Experiment], bool]]] = None,
+    ) -> "LazyExperimentSequence":
+        """Create a sequence (sharing the cache) over the given directories."""
+        sequence = LazyExperimentSequence(source=paths)
+        sequence._paths = paths
+        sequence._filter_fns = filter_fns or []
+        sequence._cache = self._cache
+        return sequence
+
+    def _iterate(self) -> Iterator[Tuple[str, Experiment]]:
+        """Iterate over the directories and experiments (that pass the filters)."""
+        for path in self._get_source_paths():
+            experiment = self._cache.get(path)
+            if all(filter_fn(experiment) for filter_fn in self._filter_fns):
+                yield path, experiment
+
+    @property
+    def paths(self) -> List[str]:
+        """Directories of the experiments in the sequence.
+
+        If the sequence is filtered, the experiments are streamed through
+        the filters.
+        """
+        if not self._filter_fns:
+            return list(self._get_source_paths())
+        return [path for path, _ in self._iterate()]
+
+    def __iter__(self) -> Iterator[Experiment]:
+        """Iterate over the experiments, deserializing them one at a time."""
+        for _, experiment in self._iterate():
+            yield experiment
+
+    def __len__(self) -> int:
+        """Return the number of experiments."""
+        if not self._filter_fns:
+            return len(self._get_source_paths())
+        return sum(1 for _ in self._iterate())
+
+    @overload
+    def __getitem__(self, index: int) -> Experiment:
+        """Get an experiment."""
+
+    @overload
+    def __getitem__(self, index: slice) -> "LazyExperimentSequence":
+        """Get a lazy sequence of the experiments in the slice."""
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[Experiment, "LazyExperimentSequence"]:
+        """Get an experiment (or a lazy sequence for a slice)."""
+        if isinstance(index, slice):
+            return self._derive(self.paths[index])
+        if not self._filter_fns or index < 0:
+            return self._cache.get(self.paths[index])
+        for current_index, experiment in enumerate(self):
+            if current_index == index:
+                return experiment
+        raise IndexError("sequence index out of range")
+
+    def groupby(
+        self, group_fn: Callable[[Experiment], str]
+    ) -> Dict[str, "LazyExperimentSequence"]:
+        """Group experiments in the sequence.
+
+        The experiments are streamed through `group_fn` once and only their
+        directories are kept.
+
+        Args:
+            group_fn: Function to assign a string group id to the experiment
+
+        Returns:
+            Dict[str, LazyExperimentSequence]: A dictionary mapping the
+            string group id to a lazy sequence of experiments
+        """
+        grouped_paths: Dict[str, List[str]] = {}
+        for path, experiment in self._iterate():
+            grouped_paths.setdefault(group_fn(experiment), []).append(path)
+        return {key: self._derive(paths) for key, paths in grouped_paths.items()}
+
+    def filter(
+        self, filter_fn: Callable[[Experiment], bool]
+    ) -> "LazyExperimentSequence":
+        """Filter experiments in the sequence.
+
+        The filter is applied when the returned sequence is iterated.
+
+        Args:
+            filter_fn: Function to filter an experiment
+
+        Returns:
+            LazyExperimentSequence: A lazy sequence of experiments for
+            which the filter condition is true
+        """
+        return self._derive(
+            self._get_source_paths(), filter_fns=[*self._filter_fns, filter_fn]
+        )
+
+    def aggregate(
+        self,
+        aggregate_configs: Callable[
+            [List[List[ConfigType]]], List[ConfigType]
+        ] = return_first_config,
+        aggregate_metrics: Callable[
+            [List[ExperimentMetricType]], ExperimentMetricType
+        ] = concat_metrics,
+        aggregate_infos: Callable[
+            [List[ExperimentInfoType]], ExperimentInfoType
+        ] = return_first_infos,
+    ) -> Experiment:
+        """Aggregate a sequence of experiments into a single experiment.
+
+        Refer `ExperimentSequence.aggregate()`. The experiments are
+        streamed, but the aggregate functions receive the lists of the
+        configs, metrics and infos of all the experiments.
+
+        Returns:
+            Experiment: Aggregated Experiment.
+        """
+        configs, metrics, infos = [], [], []
+        for experiment in self:
+            configs.append(experiment.configs)
+            metrics.append(experiment.metrics)
+            infos.append(experiment.info)
+        return Experiment(
+            configs=aggregate_configs(configs),
+            metrics=aggregate_metrics(metrics),
+            info=aggregate_infos(infos),
+        )
+
+    def materialize(self) -> ExperimentSequence:
+        """Load all the experiments (that pass the filters) in an `ExperimentSequence`."""
+        return ExperimentSequence(list(self))
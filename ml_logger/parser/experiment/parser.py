@@ -3,19 +3,22 @@
 import glob
 import os
 from pathlib import Path
-from typing import Any, Dict, Union
+from typing import Any, Dict, Iterable, List, Optional, Union
 
+from ml_logger.index import is_index_file
 from ml_logger.parser import base as base_parser
+from ml_logger.parser.columnar import is_columnar_file, read_columnar_files
 from ml_logger.parser.config import (
     parse_json_and_match_value as default_config_line_parser,
 )
 from ml_logger.parser.experiment.experiment import Experiment
-from ml_logger.parser.metric import metrics_to_df
+from ml_logger.parser.metric import concat_dfs, metrics_to_df
 from ml_logger.parser.metric import (
     parse_json_and_match_value as default_metric_line_parser,
 )
 from ml_logger.parser.utils import parse_json
-from ml_logger.types import ParseLineFunctionType
+from ml_logger.segment import get_sort_key
+from ml_logger.types import LogType, ParseLineFunctionType
 
 
 class Parser(base_parser.Parser):
@@ -49,18 +52,40 @@ class Parser(base_parser.Parser):
             }
         )
 
-    def parse(self, filepath_pattern: Union[str, Path]) -> Experiment:
+    def parse(
+        self,
+        filepath_pattern: Union[str, Path],
+        workers: Optional[int] = None,
+        executor: str = "process",
+    ) -> Experiment:
         """Load one experiment from the log dir.
 
         Args:
             filepath_pattern (Union[str, Path]): filepath pattern to glob
                 or instance of Path (directory) object.
+            workers (Optional[int], optional): Number of workers to parse
+                the files with. The files are parsed in the current thread
+                if workers is None or 1. Defaults to None.
+            executor (str, optional): Type of the workers: "process" or
+                "thread". "process" requires the line parsing functions to
+                be picklable (eg not lambdas). Defaults to "process".
         Returns:
             Experiment
         """
-        configs = []
-        metric_logs = []
-        info: Dict[Any, Any] = {}
+        paths = self._get_paths(filepath_pattern)
+        # the columnar log files (with the metric logs) are read directly as
+        # dataframes.
+        columnar_paths = [_path for _path in paths if is_columnar_file(_path)]
+        paths = [_path for _path in paths if not is_columnar_file(_path)]
+        return self._make_experiment(
+            logs=self._parse_files(
+                file_paths=paths, workers=workers, executor=executor
+            ),
+            columnar_paths=columnar_paths,
+        )
+
+    def _get_paths(self, filepath_pattern: Union[str, Path]) -> List[Path]:
+        """Get the log files to parse (for the `parse` method)."""
         # check if filepath_pattern is a directory
         if os.path.isdir(filepath_pattern):
             filepath_pattern = Path(filepath_pattern)
@@ -73,20 +98,32 @@ class Parser(base_parser.Parser):
                 paths = [filepath_pattern]
         else:
             paths = [Path(_path) for _path in glob.glob(filepath_pattern)]
-        paths = [_path for _path in paths if _path.is_file()]
-        for file_path in paths:
-            for log in self._parse_file(file_path=file_path):
-                # At this point, if log is not None, it will have a key self.log_key
-                if log is not None:
-                    if log[self.log_key] == "config":
-                        configs.append(log)
-                    elif log[self.log_key] == "metric":
-                        metric_logs.append(log)
-                    else:
-                        info_key = log[self.log_key]
-                        if info_key not in info:
-                            info[info_key] = []
-                        info[info_key].append(log)
-        return Experiment(
-            configs=configs, metrics=metrics_to_df(metric_logs=metric_logs), info=info
+        # the segments of a log file are parsed in order.
+        return sorted(
+            (_path for _path in paths if _path.is_file() and not is_index_file(_path)),
+            key=get_sort_key,
         )
+
+    def _make_experiment(
+        self, logs: Iterable[LogType], columnar_paths: List[Path]
+    ) -> Experiment:
+        """Make an experiment from the (parsed) logs and the columnar log files."""
+        configs = []
+        metric_logs = []
+        info: Dict[Any, Any] = {}
+        for log in logs:
+            # At this point, log will have a key self.log_key
+            if log[self.log_key] == "config":
+                configs.append(log)
+            elif log[self.log_key] == "metric":
+                metric_logs.append(log)
+            else:
+                info_key = log[self.log_key]
+                if info_key not in info:
+                    info[info_key] = []
+                info[info_key].append(log)
+        metrics = metrics_to_df(metric_logs=metric_logs)
+        columnar_df = read_columnar_files(columnar_paths)
+        if columnar_df is not None:
+            metrics["all"] = concat_dfs([metrics["all"], columnar_df])
+        return Experiment(configs=configs, metrics=metrics, info=info)
@@ -1,16 +1,78 @@
 """Implementation of Parser to parse the logs."""
 
+import fnmatch
 import glob
+import itertools
+import os
+import re
+import time
+import zlib
+from collections import deque
 from pathlib import Path
-from typing import Iterator, Optional, Union
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
+from ml_logger.index import get_index, is_index_file
+from ml_logger.parser.base import DEFAULT_CHUNK_SIZE, FileChunkType
 from ml_logger.parser.base import Parser as BaseParser
+from ml_logger.parser.columnar import is_columnar_file
 from ml_logger.parser.utils import parse_json
-from ml_logger.types import LogType, ParseLineFunctionType
+from ml_logger.segment import (
+    get_sort_key,
+    is_compressed_file,
+    iterate_lines,
+    parse_segment_path,
+)
+from ml_logger.types import CheckpointType, LogType, NumType, ParseLineFunctionType
+
+# Matches the "logbook_type" key and its (string) value in a line that does
+# not have escape characters.
+_LOGBOOK_TYPE_PATTERN = re.compile(r'"logbook_type"[ \t\n\r]*:[ \t\n\r]*"([^"]*)"')
+
+# Maximum number of bytes (of the first line) used to identify a file when
+# parsing the logs incrementally.
+_FINGERPRINT_SIZE = 1024
+
+
+def _is_logbook_type_mismatch(line: str, value: str) -> bool:
+    """Check, without decoding the line, that the log is not of type `value`.
+
+    The check scans the raw line for the `"logbook_type": "<type>"` token.
+    It returns True only when the line can not be a log of type `value`.
+    It returns False whenever the line is ambiguous (eg the line has
+    escape characters or the key appears more than once), in which case
+    the line should be decoded.
+
+    Args:
+        line (str): Line to check
+        value (str): Expected value of the logbook type
+
+    Returns:
+        bool: True if the line is certainly not a log of type `value`
+    """
+    if "\\" in line:
+        # escaped characters can hide (or fake) the key.
+        return False
+    # Without escape characters, every quote delimits a string so the
+    # pattern only matches complete keys and values.
+    matches = _LOGBOOK_TYPE_PATTERN.findall(line)
+    if not matches:
+        # the log does not have a logbook_type key with a string value.
+        # Lines without a colon (eg empty logs) are decoded to keep the
+        # behaviour of `parse_json`.
+        return ":" in line
+    # If the key belongs to a nested log, the top-level log does not have
+    # the logbook_type key and a mismatch is still correct.
+    return len(matches) == 1 and matches[0] != value
 
 
 def parse_json_and_match_value(line: str, value: str) -> Optional[LogType]:
-    """Parse a line as JSON log and check if it a valid log."""
+    """Parse a line as JSON log and check if it a valid log.
+
+    Lines that are certainly not logs of type `value` are skipped without
+    decoding them.
+    """
+    if _is_logbook_type_mismatch(line=line, value=value):
+        return None
     log = parse_json(line)
     if log:
         key = "logbook_type"
@@ -19,6 +81,42 @@ def parse_json_and_match_value(line: str, value: str) -> Optional[LogType]:
     return log
 
 
+def _glob_segments(filepath_pattern: str) -> Iterator[str]:
+    """Glob the segments of the log files that match the pattern."""
+    root, extension = os.path.splitext(filepath_pattern)
+    if not extension:
+        return
+    for file_path in glob.iglob(f"{root}.[0-9]*{extension}*"):
+        parsed = parse_segment_path(file_path)
+        if parsed is not None and fnmatch.fnmatch(parsed[0], filepath_pattern):
+            yield file_path
+
+
+def glob_log_files(filepath_pattern: str) -> Iterator[str]:
+    """Glob the files matching the pattern, except the sidecar index files.
+
+    The segments of a log file (refer `ml_logger.segment`) match the
+    pattern of the log file too (eg `metric_log.*.jsonl.gz` matches
+    `metric_log.jsonl`). The files are sorted so that the segments of a log
+    file are in order, after the log file.
+    """
+    file_paths = {
+        file_path
+        for file_path in itertools.chain(
+            glob.iglob(filepath_pattern), _glob_segments(filepath_pattern)
+        )
+        if not is_index_file(file_path)
+    }
+    return iter(sorted(file_paths, key=get_sort_key))
+
+
+def _get_file_id(file_checkpoint: Dict[str, int]) -> Tuple[int, ...]:
+    """Get the identity of a file from its checkpoint."""
+    return tuple(
+        file_checkpoint.get(key, -1) for key in ("device", "inode", "fingerprint")
+    )
+
+
 class Parser(BaseParser):
     """Class to parse the log files."""
 
@@ -50,16 +148,56 @@ class Parser(BaseParser):
         Yields:
             Iterator[Optional[LogType]]: Iterator over the logs
         """
+        if is_columnar_file(file_path):
+            yield from self._parse_columnar_file(file_path=file_path)
+            return
+        if is_compressed_file(file_path):
+            for raw_line in iterate_lines(file_path):
+                yield self.parse_line(raw_line.decode("utf-8"))
+            return
         with open(file_path) as f:
             for line in f:
                 log = self.parse_line(line)
                 yield log
 
-    def parse(self, filepath_pattern: str) -> Iterator[LogType]:
+    def parse(
+        self,
+        filepath_pattern: str,
+        workers: Optional[int] = None,
+        executor: str = "process",
+        ordered: bool = True,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        step_range: Optional[Tuple[NumType, NumType]] = None,
+        step_key: str = "step",
+    ) -> Iterator[LogType]:
         """Open a log file, parse its contents and return `logs`.
 
         Args:
             filepath_pattern (str): filepath pattern to glob
+            workers (Optional[int], optional): Number of workers to parse
+                the files with. The files are parsed in the current thread
+                if workers is None or 1. Defaults to None.
+            executor (str, optional): Type of the workers: "process" or
+                "thread". Use "process" when decoding the logs is the
+                bottleneck and "thread" when reading the files is the
+                bottleneck. "process" requires the `parse_line` function
+                to be picklable (eg not a lambda). Defaults to "process".
+            ordered (bool, optional): Should the logs be returned in the
+                file order. If False, the logs are returned as soon as
+                they are parsed. Defaults to True.
+            chunk_size (int, optional): Number of bytes (of a file) parsed
+                by a worker in one task. This bounds the memory used by the
+                workers. Defaults to DEFAULT_CHUNK_SIZE.
+            step_range (Optional[Tuple[NumType, NumType]], optional):
+                Smallest and largest step (both inclusive) of the logs to
+                return. Only the blocks of the files that can have these
+                steps are parsed, using the sidecar index of the files
+                (refer `ml_logger.index`). The index is rebuilt if it is
+                missing or stale. The logs without a (numeric) step are
+                not returned. If None, all the logs are returned. Defaults
+                to None.
+            step_key (str, optional): Key of the step in the logs. It is
+                used only if `step_range` is set. Defaults to "step".
 
         Returns:
             Iterator[LogType]: Iterator over the logs
@@ -67,11 +205,67 @@ class Parser(BaseParser):
         Yields:
             Iterator[LogType]: Iterator over the logs
         """
-        paths = glob.iglob(filepath_pattern)
-        for file_path in paths:
-            for log in self._parse_file(file_path):
-                if log is not None:
-                    yield log
+        paths = glob_log_files(filepath_pattern)
+        if step_range is not None:
+            return self._parse_step_range(
+                file_paths=paths,
+                step_range=step_range,
+                step_key=step_key,
+                workers=workers,
+                executor=executor,
+                ordered=ordered,
+            )
+        return self._parse_files(
+            file_paths=paths,
+            workers=workers,
+            executor=executor,
+            ordered=ordered,
+            chunk_size=chunk_size,
+        )
+
+    def _parse_step_range(
+        self,
+        file_paths: Iterable[str],
+        step_range: Tuple[NumType, NumType],
+        step_key: str,
+        workers: Optional[int],
+        executor: str,
+        ordered: bool,
+    ) -> Iterator[LogType]:
+        """Parse the logs (of the files) with the steps in the range."""
+        min_step, max_step = step_range
+        file_chunks: List[FileChunkType] = []
+        columnar_file_paths = []
+        for file_path in file_paths:
+            if is_columnar_file(file_path):
+                columnar_file_paths.append(file_path)
+                continue
+            if is_compressed_file(file_path):
+                # the compressed segments are not indexed.
+                file_chunks.append((file_path, 0, os.path.getsize(file_path)))
+                continue
+            index = get_index(file_path=file_path, step_key=step_key)
+            byte_ranges = index.get_byte_ranges(
+                step_range=step_range, file_size=os.path.getsize(file_path)
+            )
+            file_chunks.extend((file_path, start, end) for start, end in byte_ranges)
+        logs = itertools.chain(
+            self._parse_file_chunks(
+                file_chunks=file_chunks,
+                workers=workers,
+                executor=executor,
+                ordered=ordered,
+            ),
+            *(map(self._parse_columnar_file, columnar_file_paths)),
+        )
+        for log in logs:
+            step = log.get(step_key)
+            if (
+                isinstance(step, (int, float))
+                and not isinstance(step, bool)
+                and min_step <= step <= max_step
+            ):
+                yield log
 
     def parse_first_log(self, filepath_pattern: str) -> Optional[LogType]:
         """Return the first log from a file.
@@ -87,7 +281,7 @@ class Parser(BaseParser):
             LogType: First instance of a log
 
         """
-        paths = glob.iglob(filepath_pattern)
+        paths = glob_log_files(filepath_pattern)
         for file_path in paths:
             for log in self._parse_file(file_path):
                 if log is not None:
@@ -97,8 +291,9 @@ class Parser(BaseParser):
     def parse_last_log(self, filepath_pattern: str) -> Optional[LogType]:
         """Return the last log from a file.
 
-        Like `parse()` method, it will iterate over the entire log file
-        but will not keep all the logs in memory (thus saving memory).
+        Unlike `parse()` method, the files are read backwards (starting
+        from the last file) and the method returns after finding the last
+        log (thus saving memory and time).
 
         Args:
             filepath_pattern (str): filepath pattern to glob
@@ -107,10 +302,230 @@ class Parser(BaseParser):
             LogType: Last instance of a log
 
         """
-        last_log: Optional[LogType] = None
-        paths = glob.iglob(filepath_pattern)
-        for file_path in paths:
-            for log in self._parse_file(file_path=file_path):
+        logs = self.parse_last_n_logs(filepath_pattern=filepath_pattern, n=1)
+        if logs:
+            return logs[0]
+        return None
+
+    def parse_last_n_logs(self, filepath_pattern: str, n: int) -> List[LogType]:
+        """Return the last `n` logs from a file.
+
+        The files are read backwards (starting from the last file) till
+        `n` logs are found. Files that can not be read backwards (eg named
+        pipes) are read from the start.
+
+        Args:
+            filepath_pattern (str): filepath pattern to glob
+            n (int): Number of logs to return
+
+        Returns:
+            List[LogType]: Last `n` logs, in the same order as `parse()`
+
+        """
+        # logs are collected in the reverse order.
+        logs: List[LogType] = []
+        paths = list(glob_log_files(filepath_pattern))
+        for file_path in reversed(paths):
+            if len(logs) >= n:
+                break
+            logs.extend(
+                self._parse_last_n_logs_in_file(file_path=file_path, n=n - len(logs))
+            )
+        logs.reverse()
+        return logs
+
+    def _parse_last_n_logs_in_file(
+        self, file_path: Union[str, Path], n: int
+    ) -> List[LogType]:
+        """Return the last `n` logs from a file, in the reverse order."""
+        logs: List[LogType] = []
+        if n <= 0:
+            return logs
+        if (
+            os.path.isfile(file_path)
+            and not is_columnar_file(file_path)
+            and not is_compressed_file(file_path)
+        ):
+            for log in self._parse_file_in_reverse(file_path=file_path):
+                if log is not None:
+                    logs.append(log)
+                    if len(logs) == n:
+                        break
+            return logs
+        last_logs: Deque[LogType] = deque(maxlen=n)
+        for log in self._parse_file(file_path=file_path):
+            if log is not None:
+                last_logs.append(log)
+        logs.extend(reversed(last_logs))
+        return logs
+
+    def parse_since(
+        self, filepath_pattern: str, checkpoint: CheckpointType
+    ) -> Iterator[LogType]:
+        """Parse the logs that were appended since the checkpoint.
+
+        The checkpoint maps the path of every file (matching the pattern)
+        to the file's identity (device, inode and a checksum of its first
+        line) and the offset (in bytes) till which it has been parsed. It
+        is updated in place, before a log is yielded, and can be persisted
+        (eg as JSON) to resume parsing later. Pass an empty dict to parse
+        the files from the start.
+
+        A partially written line at the end of a file is not parsed till
+        it is complete. A file is parsed from the start if it is replaced
+        (even if the new file reuses the inode) or truncated. If a file is
+        renamed to another path that matches the pattern, its parsing
+        resumes from the checkpointed offset. Note that a file that is
+        truncated and rewritten with the same first line can not be
+        detected. Files that are removed while parsing are skipped. The
+        columnar log files (refer `ml_logger.parser.columnar`) are parsed
+        as a whole, once. The offsets of the compressed segments (refer
+        `ml_logger.segment`) are in decompressed bytes, so a compressed
+        segment is decompressed from the start when new lines are parsed.
+
+        Args:
+            filepath_pattern (str): filepath pattern to glob
+            checkpoint (CheckpointType): Checkpoint to resume parsing from.
+
+        Returns:
+            Iterator[LogType]: Iterator over the new logs
+
+        Yields:
+            Iterator[LogType]: Iterator over the new logs
+        """
+        offset_for_file_id = {
+            _get_file_id(file_checkpoint): file_checkpoint["offset"]
+            for file_checkpoint in checkpoint.values()
+        }
+        file_paths = list(glob_log_files(filepath_pattern))
+        for file_path in file_paths:
+            yield from self._parse_file_since(
+                file_path=file_path,
+                checkpoint=checkpoint,
+                offset_for_file_id=offset_for_file_id,
+            )
+        for file_path in set(checkpoint) - set(file_paths):
+            del checkpoint[file_path]
+
+    def _parse_file_since(
+        self,
+        file_path: str,
+        checkpoint: CheckpointType,
+        offset_for_file_id: Dict[Tuple[int, ...], int],
+    ) -> Iterator[LogType]:
+        """Parse the complete lines of a file that are not checkpointed."""
+        if is_compressed_file(file_path):
+            yield from self._parse_compressed_file_since(
+                file_path=file_path,
+                checkpoint=checkpoint,
+                offset_for_file_id=offset_for_file_id,
+            )
+            return
+        try:
+            f = open(file_path, "rb")
+        except FileNotFoundError:
+            # the file was removed after globbing.
+            checkpoint.pop(file_path, None)
+            return
+        with f:
+            stat = os.fstat(f.fileno())
+            # Only complete lines are checkpointed, so the first line does
+            # not change once the offset is non-zero.
+            file_checkpoint = {
+                "device": stat.st_dev,
+                "inode": stat.st_ino,
+                "fingerprint": zlib.crc32(f.readline(_FINGERPRINT_SIZE)),
+            }
+            offset = offset_for_file_id.get(_get_file_id(file_checkpoint), 0)
+            if offset > stat.st_size:
+                # the file was truncated.
+                offset = 0
+            if is_columnar_file(file_path):
+                # the columnar files are written atomically, so they are
+                # parsed (and checkpointed) as a whole.
+                checkpoint[file_path] = {**file_checkpoint, "offset": stat.st_size}
+                if offset == 0:
+                    yield from self._parse_columnar_file(file_path=file_path)
+                return
+            f.seek(offset)
+            checkpoint[file_path] = {**file_checkpoint, "offset": offset}
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # the line is still being written.
+                    break
+                checkpoint[file_path] = {**file_checkpoint, "offset": f.tell()}
+                log = self.parse_line(line.decode("utf-8"))
                 if log is not None:
-                    last_log = log
-        return last_log
+                    yield log
+
+    def _parse_compressed_file_since(
+        self,
+        file_path: str,
+        checkpoint: CheckpointType,
+        offset_for_file_id: Dict[Tuple[int, ...], int],
+    ) -> Iterator[LogType]:
+        """Parse the complete (decompressed) lines of a segment that are not checkpointed."""
+        try:
+            stat = os.stat(file_path)
+            first_line = next(iterate_lines(file_path), b"")
+        except FileNotFoundError:
+            checkpoint.pop(file_path, None)
+            return
+        file_checkpoint = {
+            "device": stat.st_dev,
+            "inode": stat.st_ino,
+            "fingerprint": zlib.crc32(first_line[:_FINGERPRINT_SIZE]),
+        }
+        offset = offset_for_file_id.get(_get_file_id(file_checkpoint), 0)
+        checkpoint[file_path] = {**file_checkpoint, "offset": offset}
+        position = 0
+        for line in iterate_lines(file_path):
+            if not line.endswith(b"\n"):
+                # the line is still being written.
+                break
+            position += len(line)
+            if position <= offset:
+                continue
+            checkpoint[file_path] = {**file_checkpoint, "offset": position}
+            log = self.parse_line(line.decode("utf-8"))
+            if log is not None:
+                yield log
+
+    def follow(
+        self,
+        filepath_pattern: str,
+        checkpoint: Optional[CheckpointType] = None,
+        poll_interval: float = 1.0,
+    ) -> Iterator[LogType]:
+        """Parse the logs as they are appended to the files.
+
+        This generator never returns. It calls `parse_since()` and waits
+        for `poll_interval` seconds (when there are no new logs) in a loop.
+        The files matching the pattern are globbed in every iteration so
+        new files are also parsed.
+
+        Args:
+            filepath_pattern (str): filepath pattern to glob
+            checkpoint (Optional[CheckpointType], optional): Checkpoint to
+                resume parsing from. It is updated in place. If None, the
+                files are parsed from the start. Defaults to None.
+            poll_interval (float, optional): Number of seconds to wait
+                before checking the files for new logs. Defaults to 1.0.
+
+        Returns:
+            Iterator[LogType]: Iterator over the new logs
+
+        Yields:
+            Iterator[LogType]: Iterator over the new logs
+        """
+        if checkpoint is None:
+            checkpoint = {}
+        while True:
+            has_new_logs = False
+            for log in self.parse_since(
+                filepath_pattern=filepath_pattern, checkpoint=checkpoint
+            ):
+                has_new_logs = True
+                yield log
+            if not has_new_logs:
+                time.sleep(poll_interval)
@@ -1,11 +1,35 @@
 """Implementation of Parser to parse metrics from logs."""
 
-from typing import Callable, Dict, List, Optional
+from array import array
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Union,
+)
 
+import numpy as np
 import pandas as pd
 
 from ml_logger.parser import log as log_parser
-from ml_logger.types import LogType, MetricType, ParseLineFunctionType
+from ml_logger.parser.columnar import (
+    is_columnar_file,
+    iterate_columnar_file,
+    read_columnar_files,
+)
+from ml_logger.parser.downsample import DownsampleFunctionType
+from ml_logger.parser.reducer import KeyFunctionType, ReducerSpecType, reduce_metrics
+from ml_logger.parser.utils import flatten_log
+from ml_logger.types import LogType, MetricType, ParseLineFunctionType, ValueType
+
+PredicateType = Union[Dict[str, ValueType], Callable[[LogType], bool]]
 
 
 def parse_json_and_match_value(line: str) -> Optional[LogType]:
@@ -41,6 +65,151 @@ def aggregate_metrics(metrics: List[MetricType]) -> List[MetricType]:
     return metrics
 
 
+# The arguments of `Parser.parse_as_df` shadow the default functions.
+_group_metrics = group_metrics
+_aggregate_metrics = aggregate_metrics
+
+
+class _Column:
+    """Buffer for the values of one column.
+
+    Integers and floats are stored in typed arrays (8 bytes per value).
+    The column switches to a list of objects when it gets other values.
+    """
+
+    def __init__(self, num_missing_values: int):
+        self.kind = "int"
+        self.values: Any = array("q")
+        for _ in range(num_missing_values):
+            self.append_missing_value()
+
+    def append(self, value: object) -> None:
+        if value is None:
+            self.append_missing_value()
+            return
+        kind = "object"
+        if isinstance(value, int) and not isinstance(value, bool):
+            kind = "int"
+        elif isinstance(value, float):
+            kind = "float"
+        if kind != self.kind:
+            self._promote(kind)
+        try:
+            self.values.append(value)
+        except OverflowError:
+            # integer that does not fit in 64 bits.
+            self._promote("object")
+            self.values.append(value)
+
+    def append_missing_value(self) -> None:
+        if self.kind == "int":
+            self._promote("float")
+        self.values.append(np.nan if self.kind == "float" else None)
+
+    def _promote(self, kind: str) -> None:
+        """Change the kind of the column to a more general kind."""
+        if self.kind == "object" or kind == "int":
+            return
+        if self.kind == "int" and kind == "float":
+            self.values = array("d", self.values)
+        else:
+            self.values = list(self.values)
+            kind = "object"
+        self.kind = kind
+
+    def to_array(self) -> Union["np.ndarray[Any, Any]", List[object]]:
+        if self.kind == "int":
+            return np.frombuffer(self.values, dtype=np.int64)
+        if self.kind == "float":
+            return np.frombuffer(self.values, dtype=np.float64)
+        # let pandas infer the type of the column.
+        values: List[object] = self.values
+        return values
+
+
+class ColumnBuffer:
+    """Accumulate logs as columns instead of rows."""
+
+    def __init__(self, columns: Optional[List[str]] = None):
+        """Accumulate logs as columns instead of rows.
+
+        Nested logs are flattened, using "." as the separator (like
+        `pd.json_normalize`).
+
+        Args:
+            columns (Optional[List[str]], optional): Columns to retain.
+                If None, all the columns are retained. Defaults to None.
+        """
+        self.columns = columns
+        self.num_rows = 0
+        self._columns: Dict[str, _Column] = {}
+        if columns is not None:
+            self._columns = {
+                column: _Column(num_missing_values=0) for column in columns
+            }
+
+    def append(self, log: LogType) -> None:
+        """Append a log as a row.
+
+        Args:
+            log (LogType): Log to append
+        """
+        self.append_row(flatten_log(log, sep="."))
+
+    def append_row(self, row: LogType) -> None:
+        """Append a flattened log as a row.
+
+        Args:
+            row (LogType): Flattened log to append. The row is modified.
+        """
+        for key, column in self._columns.items():
+            if key in row:
+                column.append(row.pop(key))
+            else:
+                column.append_missing_value()
+        if self.columns is None:
+            for key, value in row.items():
+                column = _Column(num_missing_values=self.num_rows)
+                column.append(value)
+                self._columns[key] = column
+        self.num_rows += 1
+
+    def to_df(self) -> pd.DataFrame:
+        """Convert the columns into a dataframe.
+
+        Returns:
+            pd.DataFrame: Dataframe with one row per log
+        """
+        return pd.DataFrame(
+            {key: column.to_array() for key, column in self._columns.items()},
+            index=pd.RangeIndex(self.num_rows),
+        )
+
+
+def _make_predicate(conditions: Dict[str, ValueType]) -> Callable[[LogType], bool]:
+    """Make a function that checks if a (flattened) log matches the conditions."""
+    items = list(conditions.items())
+
+    def predicate(row: LogType) -> bool:
+        return all(key in row and row[key] == value for key, value in items)
+
+    return predicate
+
+
+def _get_top_level_keys(keys: Iterable[str], sep: str = ".") -> Set[str]:
+    """Get the top-level keys (of a log) that the flattened keys can come from.
+
+    For example, the flattened key "a.b.c" can come from the top-level keys
+    "a", "a.b" or "a.b.c".
+    """
+    top_level_keys = set()
+    for key in keys:
+        parts = key.split(sep)
+        for index in range(1, len(parts) + 1):
+            top_level_keys.add(sep.join(parts[:index]))
+    return top_level_keys
+
+
 class Parser(log_parser.Parser):
     """Class to parse the metrics from the logs."""
 
@@ -56,6 +225,17 @@ class Parser(log_parser.Parser):
         super().__init__(parse_line)
         self.log_type = "metric"
 
+    def _parse_columnar_file(self, file_path: Union[str, Path]) -> Iterator[LogType]:
+        """Parse the (flattened) metric logs from a columnar log file.
+
+        Args:
+            file_path (Union[str, Path]): Columnar log file to read from
+
+        Returns:
+            Iterator[LogType]: Iterator over the logs
+        """
+        return iterate_columnar_file(file_path=file_path)
+
     def parse_as_df(
         self,
         filepath_pattern: str,
@@ -63,16 +243,22 @@ class Parser(log_parser.Parser):
             [List[LogType]], Dict[str, List[LogType]]
         ] = group_metrics,
         aggregate_metrics: Callable[[List[LogType]], List[LogType]] = aggregate_metrics,
+        downsample: Optional[DownsampleFunctionType] = None,
     ) -> Dict[str, pd.DataFrame]:
         """Create a dict of (metric_name, dataframe).
 
         Method that:
-        (i) reads metrics from the filesystem
+        (i) reads metrics from the filesystem (and downsamples them)
         (ii) groups metrics
         (iii) aggregates all the metrics within a group,
         (iv) converts the aggregate metrics into dataframes and returns a \
             dictionary of dataframes
 
+        The columnar log files (refer `ml_logger.parser.columnar`) are
+        read directly as dataframes when the default `group_metrics` and
+        `aggregate_metrics` are used (and `downsample` is None). Otherwise,
+        their rows are parsed as (flattened) logs.
+
         Args:
             filepath_pattern (str): filepath pattern to glob
             group_metrics (Callable[[List[LogType]], Dict[str, List[LogType]]], optional):
@@ -80,14 +266,182 @@ class Parser(log_parser.Parser):
                 (key, list of grouped metrics). Defaults to group_metrics.
             aggregate_metrics (Callable[[List[LogType]], List[LogType]], optional):
                 Function to aggregate a list of metrics. Defaults to aggregate_metrics.
+            downsample (Optional[DownsampleFunctionType], optional): Function
+                to downsample the metrics as they are parsed, before they
+                are grouped (eg `functools.partial(downsample.lttb,
+                y_key="loss", group_key="mode")`). Refer
+                `ml_logger.parser.downsample`. Defaults to None.
 
         """
-        metric_logs = list(self.parse(filepath_pattern))
-        return metrics_to_df(
+        file_paths = list(log_parser.glob_log_files(filepath_pattern))
+        columnar_file_paths: List[str] = []
+        if (
+            group_metrics is _group_metrics
+            and aggregate_metrics is _aggregate_metrics
+            and downsample is None
+        ):
+            columnar_file_paths = [
+                path for path in file_paths if is_columnar_file(path)
+            ]
+        logs: Iterable[LogType] = self._parse_files(
+            [path for path in file_paths if path not in columnar_file_paths]
+        )
+        if downsample is not None:
+            logs = downsample(logs)
+        metric_logs = list(logs)
+        metric_dfs = metrics_to_df(
             metric_logs=metric_logs,
             group_metrics=group_metrics,
             aggregate_metrics=aggregate_metrics,
         )
+        columnar_df = read_columnar_files(columnar_file_paths)
+        if columnar_df is not None:
+            metric_dfs["all"] = concat_dfs([metric_dfs["all"], columnar_df])
+        return metric_dfs
+
+    def parse_as_reduced_df(
+        self,
+        filepath_pattern: str,
+        reducers: Dict[str, Sequence[ReducerSpecType]],
+        group_by: Optional[KeyFunctionType] = None,
+        index_by: Optional[KeyFunctionType] = None,
+        workers: Optional[int] = None,
+        executor: str = "process",
+    ) -> Dict[Any, pd.DataFrame]:
+        """Create a dict of (group, dataframe) of the aggregated metrics.
+
+        Unlike `parse_as_df()`, the metrics are not accumulated as a list
+        of logs. The reducers (eg `mean` of the `loss`) of the group of
+        each log are updated as soon as it is parsed, so the memory scales
+        with the number of groups (and rows). Refer
+        `ml_logger.parser.reducer`.
+
+        Args:
+            filepath_pattern (str): filepath pattern to glob
+            reducers (Dict[str, Sequence[ReducerSpecType]]): Mapping of the
+                keys to the reducers for their values (eg
+                `{"loss": ["mean", "max"]}`). Refer `GroupReducer`.
+            group_by (Optional[KeyFunctionType], optional): Key (or
+                function) to group the metrics by. If None, all the metrics
+                are in the group "all". Defaults to None.
+            index_by (Optional[KeyFunctionType], optional): Key (or
+                function) to group the metrics (of a group) into rows, eg
+                "epoch". If None, every dataframe has one row. Defaults to
+                None.
+            workers (Optional[int], optional): Number of workers to parse
+                the files with. Refer `parse()`. Defaults to None.
+            executor (str, optional): Type of the workers. Refer `parse()`.
+                Defaults to "process".
+
+        Returns:
+            Dict[Any, pd.DataFrame]: Mapping of the groups to the dataframes
+        """
+        return reduce_metrics(
+            logs=self.parse(filepath_pattern, workers=workers, executor=executor),
+            reducers=reducers,
+            group_by=group_by,
+            index_by=index_by,
+        )
+
+    def parse_as_columnar_df(
+        self,
+        filepath_pattern: str,
+        columns: Optional[List[str]] = None,
+        where: Optional[PredicateType] = None,
+    ) -> pd.DataFrame:
+        """Parse the metrics into a dataframe, without keeping the logs in memory.
+
+        Unlike `parse_as_df()`, the metrics are not accumulated as a list
+        of logs. Each log is filtered (using `where`), projected (using
+        `columns`) and appended to typed column buffers as soon as it is
+        parsed. The dataframe is created once, from the column buffers.
+
+        Nested logs are flattened, using "." as the separator (like
+        `pd.json_normalize`). When `columns` is set, only the top-level
+        keys that the columns (and the conditions in `where`) can come
+        from are flattened.
+
+        Note that every metric log is still decoded, so this method bounds
+        the memory used for the result but not the cost of decoding the
+        lines. The columnar log files (refer `ml_logger.parser.columnar`)
+        are read directly as dataframes, unless `where` is a function (in
+        which case it gets the flattened logs of these files).
+
+        Args:
+            filepath_pattern (str): filepath pattern to glob
+            columns (Optional[List[str]], optional): Columns (flattened
+                keys) to retain. If None, all the columns are retained.
+                Defaults to None.
+            where (Optional[PredicateType], optional): Predicate to select
+                the logs. It can be a dictionary mapping the flattened keys
+                to their expected values (eg `{"mode": "train"}` or
+                `{"nested.acc": 1}`) or a function that takes a log (not
+                flattened) and returns a bool. If None, all the logs are
+                selected. Defaults to None.
+
+        Returns:
+            pd.DataFrame: Dataframe with one row per (selected) metric log
+        """
+        column_buffer = ColumnBuffer(columns=columns)
+        conditions = where if isinstance(where, dict) else {}
+        predicate = _make_predicate(conditions)
+        keys_to_flatten = None
+        if columns is not None:
+            keys_to_flatten = _get_top_level_keys([*columns, *conditions])
+        file_paths = list(log_parser.glob_log_files(filepath_pattern))
+        columnar_file_paths: List[str] = []
+        if not callable(where):
+            columnar_file_paths = [
+                path for path in file_paths if is_columnar_file(path)
+            ]
+        logs = self._parse_files(
+            [path for path in file_paths if path not in columnar_file_paths]
+        )
+        for log in logs:
+            if callable(where) and not where(log):
+                continue
+            if keys_to_flatten is not None:
+                log = {key: log[key] for key in keys_to_flatten if key in log}
+            row = flatten_log(log, sep=".")
+            if predicate(row):
+                column_buffer.append_row(row)
+        df = column_buffer.to_df()
+        columnar_df = _read_columnar_df(
+            file_paths=columnar_file_paths, columns=columns, conditions=conditions
+        )
+        if columnar_df is None:
+            return df
+        return concat_dfs([df, columnar_df])
+
+
+def _read_columnar_df(
+    file_paths: List[str],
+    columns: Optional[List[str]],
+    conditions: Dict[str, ValueType],
+) -> Optional[pd.DataFrame]:
+    """Read the rows (of the columnar log files) that match the conditions."""
+    columns_to_read = None
+    if columns is not None:
+        columns_to_read = list(dict.fromkeys([*columns, *conditions]))
+    df = read_columnar_files(file_paths, columns=columns_to_read)
+    if df is None:
+        return None
+    for key, value in conditions.items():
+        if key not in df:
+            df = df.iloc[:0]
+            break
+        df = df[df[key] == value]
+    if columns is not None:
+        df = df.reindex(columns=columns)
+    return df
+
+
+def concat_dfs(dfs: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate the dataframes (ignoring the empty ones) with a new index."""
+    non_empty_dfs = [df for df in dfs if len(df.columns) > 0]
+    if not non_empty_dfs:
+        return dfs[0]
+    return pd.concat(non_empty_dfs, ignore_index=True, sort=False)
 
 
 def metrics_to_df(
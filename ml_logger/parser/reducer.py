@@ -0,0 +1,385 @@
+"""Reducers to group and aggregate the metric logs incrementally.
+
+Unlike `metric.metrics_to_df`, which groups and aggregates a list of all
+the logs, `GroupReducer` updates the reducers (eg `mean` of the `loss` of
+each `mode`) as the logs are parsed, so only the state of the reducers is
+held in memory. The memory scales with the number of groups (times the
+number of rows per group, when `index_by` is set), not with the number of
+logs. For example, to get the mean and the max `loss` per `epoch` of
+every `mode`:
+
+    reduce_metrics(
+        logs=metric.Parser().parse(filepath_pattern),
+        reducers={"loss": ["mean", "max"]},
+        group_by="mode",
+        index_by="epoch",
+    )
+"""
+
+import bisect
+import math
+from abc import ABC, abstractmethod
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import pandas as pd
+
+from ml_logger.types import LogType
+
+KeyFunctionType = Union[str, Callable[[LogType], Optional[Hashable]]]
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class Reducer(ABC):
+    """Reducer that aggregates the values of a key incrementally."""
+
+    name: str = ""
+
+    __slots__ = ()
+
+    @abstractmethod
+    def add(self, value: Any) -> None:
+        """Add a (non-None) value to the reducer."""
+
+    @abstractmethod
+    def result(self) -> Any:
+        """Get the aggregated value."""
+
+
+class Count(Reducer):
+    """Number of values."""
+
+    name = "count"
+
+    __slots__ = ("count",)
+
+    def __init__(self) -> None:
+        """Initialise the reducer."""
+        self.count = 0
+
+    def add(self, value: Any) -> None:
+        """Add a value to the reducer."""
+        self.count += 1
+
+    def result(self) -> int:
+        """Get the number of values."""
+        return self.count
+
+
+class Sum(Reducer):
+    """Sum of the numeric values."""
+
+    name = "sum"
+
+    __slots__ = ("sum",)
+
+    def __init__(self) -> None:
+        """Initialise the reducer."""
+        self.sum = 0.0
+
+    def add(self, value: Any) -> None:
+        """Add a value to the reducer. Non-numeric values are ignored."""
+        if _is_number(value):
+            self.sum += value
+
+    def result(self) -> float:
+        """Get the sum of the values."""
+        return self.sum
+
+
+class Mean(Reducer):
+    """Mean of the numeric values."""
+
+    name = "mean"
+
+    __slots__ = ("sum", "count")
+
+    def __init__(self) -> None:
+        """Initialise the reducer."""
+        self.sum = 0.0
+        self.count = 0
+
+    def add(self, value: Any) -> None:
+        """Add a value to the reducer. Non-numeric values are ignored."""
+        if _is_number(value):
+            self.sum += value
+            self.count += 1
+
+    def result(self) -> float:
+        """Get the mean of the values (nan if there are no values)."""
+        return self.sum / self.count if self.count else math.nan
+
+
+class Last(Reducer):
+    """Last value."""
+
+    name = "last"
+
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        """Initialise the reducer."""
+        self.value: Any = None
+
+    def add(self, value: Any) -> None:
+        """Add a value to the reducer."""
+        self.value = value
+
+    def result(self) -> Any:
+        """Get the last value."""
+        return self.value
+
+
+class Min(Reducer):
+    """Min of the numeric values."""
+
+    name = "min"
+
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        """Initialise the reducer."""
+        self.value = math.inf
+
+    def add(self, value: Any) -> None:
+        """Add a value to the reducer. Non-numeric values are ignored."""
+        if _is_number(value) and value < self.value:
+            self.value = value
+
+    def result(self) -> float:
+        """Get the min of the values (nan if there are no values)."""
+        return self.value if self.value != math.inf else math.nan
+
+
+class Max(Reducer):
+    """Max of the numeric values."""
+
+    name = "max"
+
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        """Initialise the reducer."""
+        self.value = -math.inf
+
+    def add(self, value: Any) -> None:
+        """Add a value to the reducer. Non-numeric values are ignored."""
+        if _is_number(value) and value > self.value:
+            self.value = value
+
+    def result(self) -> float:
+        """Get the max of the values (nan if there are no values)."""
+        return self.value if self.value != -math.inf else math.nan
+
+
+class Histogram(Reducer):
+    """Histogram of the numeric values.
+
+    Use `functools.partial(Histogram, bin_edges=...)` as the reducer.
+    """
+
+    name = "histogram"
+
+    __slots__ = ("bin_edges", "counts")
+
+    def __init__(self, bin_edges: Sequence[float]):
+        """Initialise the reducer.
+
+        Args:
+            bin_edges (Sequence[float]): Edges of the bins, in increasing
+                order. Like `np.histogram`, the bins are half-open except
+                the last bin, which includes its right edge. The values
+                outside the bins are ignored.
+        """
+        if len(bin_edges) < 2:
+            raise ValueError(
+                f"bin_edges should have at least two edges. Got {bin_edges}"
+            )
+        self.bin_edges = list(bin_edges)
+        self.counts = [0] * (len(self.bin_edges) - 1)
+
+    def add(self, value: Any) -> None:
+        """Add a value to the reducer. Non-numeric values are ignored."""
+        if not _is_number(value):
+            return
+        if value == self.bin_edges[-1]:
+            self.counts[-1] += 1
+            return
+        index = bisect.bisect_right(self.bin_edges, value) - 1
+        if 0 <= index < len(self.counts):
+            self.counts[index] += 1
+
+    def result(self) -> List[int]:
+        """Get the number of values in every bin."""
+        return list(self.counts)
+
+
+REDUCERS: Dict[str, Callable[[], Reducer]] = {
+    reducer.name: reducer for reducer in [Count, Sum, Mean, Last, Min, Max]
+}
+
+ReducerSpecType = Union[str, Callable[[], Reducer]]
+
+
+def _get_reducer_factory(reducer: ReducerSpecType) -> Callable[[], Reducer]:
+    if callable(reducer):
+        return reducer
+    if reducer not in REDUCERS:
+        reducer_string = ", ".join(REDUCERS)
+        raise ValueError(f"reducer should be one of {reducer_string}. Got {reducer}")
+    return REDUCERS[reducer]
+
+
+def _get_key_function(key: KeyFunctionType) -> Callable[[LogType], Any]:
+    if callable(key):
+        return key
+    return lambda log: log.get(key)
+
+
+class GroupReducer:
+    """Group the logs and aggregate the values of every group incrementally."""
+
+    def __init__(
+        self,
+        reducers: Dict[str, Sequence[ReducerSpecType]],
+        group_by: Optional[KeyFunctionType] = None,
+        index_by: Optional[KeyFunctionType] = None,
+    ):
+        """Initialise the reducer.
+
+        Args:
+            reducers (Dict[str, Sequence[ReducerSpecType]]): Mapping of the
+                keys (of the logs) to the reducers for their values. A
+                reducer is either the name of a reducer (one of "count",
+                "sum", "mean", "last", "min" and "max") or a function that
+                returns a `Reducer` (eg `functools.partial(Histogram,
+                bin_edges=[0, 1, 2])`). The result of a reducer is in the
+                column `<key>_<reducer name>`.
+            group_by (Optional[KeyFunctionType], optional): Key (or
+                function of the log) to group the logs by. Every group
+                gets a dataframe. The logs without the key (or for which
+                the function returns None) are ignored. If None, all the
+                logs are in the group "all". Defaults to None.
+            index_by (Optional[KeyFunctionType], optional): Key (or
+                function of the log) to group the logs (of a group) into
+                the rows of the dataframe. The values of the key are in
+                the first column (named after the key, or "index" for a
+                function). The logs without the key are ignored. If None,
+                every dataframe has one row. Defaults to None.
+        """
+        self.reducer_factories = {
+            key: [_get_reducer_factory(reducer) for reducer in key_reducers]
+            for key, key_reducers in reducers.items()
+        }
+        self.group_by = group_by
+        self.index_by = index_by
+        self._get_group = _get_key_function(group_by) if group_by else None
+        self._get_index = _get_key_function(index_by) if index_by else None
+        self._states: Dict[Any, Dict[Any, List[Tuple[str, List[Reducer]]]]] = {}
+
+    def _make_state(self) -> List[Tuple[str, List[Reducer]]]:
+        return [
+            (key, [factory() for factory in factories])
+            for key, factories in self.reducer_factories.items()
+        ]
+
+    def add(self, log: LogType) -> None:
+        """Add a log to its group.
+
+        Args:
+            log (LogType): Log to add
+        """
+        group: Any = "all"
+        if self._get_group is not None:
+            group = self._get_group(log)
+            if group is None:
+                return
+        index = None
+        if self._get_index is not None:
+            index = self._get_index(log)
+            if index is None:
+                return
+        rows = self._states.get(group)
+        if rows is None:
+            rows = self._states[group] = {}
+        state = rows.get(index)
+        if state is None:
+            state = rows[index] = self._make_state()
+        for key, reducers in state:
+            value = log.get(key)
+            if value is not None:
+                for reducer in reducers:
+                    reducer.add(value)
+
+    def update(self, logs: Iterable[LogType]) -> None:
+        """Add the logs to their groups.
+
+        Args:
+            logs (Iterable[LogType]): Logs to add
+        """
+        for log in logs:
+            self.add(log)
+
+    def to_dfs(self) -> Dict[Any, pd.DataFrame]:
+        """Get the aggregated values as a dict of (group, dataframe).
+
+        Returns:
+            Dict[Any, pd.DataFrame]: Mapping of the groups to the dataframes
+                with one row per index value (in the order they were seen)
+        """
+        index_column = None
+        if self.index_by is not None:
+            index_column = self.index_by if isinstance(self.index_by, str) else "index"
+        dfs = {}
+        for group, rows in self._states.items():
+            records = []
+            for index, state in rows.items():
+                record = {} if index_column is None else {index_column: index}
+                for key, reducers in state:
+                    for reducer in reducers:
+                        record[f"{key}_{reducer.name}"] = reducer.result()
+                records.append(record)
+            dfs[group] = pd.DataFrame.from_records(records)
+        return dfs
+
+
+def reduce_metrics(
+    logs: Iterable[LogType],
+    reducers: Dict[str, Sequence[ReducerSpecType]],
+    group_by: Optional[KeyFunctionType] = None,
+    index_by: Optional[KeyFunctionType] = None,
+) -> Dict[Any, pd.DataFrame]:
+    """Group the logs and aggregate the values of every group incrementally.
+
+    Args:
+        logs (Iterable[LogType]): Logs to aggregate (eg the iterator
+            returned by `Parser.parse()`)
+        reducers (Dict[str, Sequence[ReducerSpecType]]): Mapping of the
+            keys to the reducers for their values. Refer `GroupReducer`.
+        group_by (Optional[KeyFunctionType], optional): Key (or function)
+            to group the logs by. Refer `GroupReducer`. Defaults to None.
+        index_by (Optional[KeyFunctionType], optional): Key (or function)
+            to group the logs (of a group) into rows. Refer
+            `GroupReducer`. Defaults to None.
+
+    Returns:
+        Dict[Any, pd.DataFrame]: Mapping of the groups to the dataframes
+    """
+    group_reducer = GroupReducer(
+        reducers=reducers, group_by=group_by, index_by=index_by
+    )
+    group_reducer.update(logs)
+    return group_reducer.to_dfs()
@@ -2,8 +2,11 @@
 import json
 from typing import Any, List, Optional, Tuple
 
+from ml_logger.serializer import get_serializer
 from ml_logger.types import LogType
 
+_serializer = get_serializer()
+
 
 def flatten_log(d: LogType, parent_key: str = "", sep: str = "#") -> LogType:
     """Flatten a log using a separator.
@@ -77,10 +80,14 @@ def compare_logs(
 
 
 def parse_json(line: str) -> Optional[LogType]:
-    """Parse a line as JSON string."""
+    """Parse a line as JSON string.
+
+    The line is parsed using the fastest installed serializer (refer
+    `ml_logger.serializer.get_serializer`).
+    """
     log: Optional[LogType]
     try:
-        log = json.loads(line)
+        log = _serializer.loads(line)
     except json.JSONDecodeError:
         log = None
     return log
@@ -0,0 +1,159 @@
+"""Rotated (and compressed) segments of the JSONL log files.
+
+When the filesystem logger rotates (or compresses) a log file
+`<name>.jsonl`, the lines are written to numbered segments
+`<name>.<segment number>.jsonl`, with the `.gz` (gzip) or `.zst` (zstd)
+suffix when they are compressed. Every flush of the logger writes the
+buffered lines as one complete gzip member (or zstd frame), so a segment
+that is being written can be read (the readers decompress the members
+one after the other) and a crash loses at most the member being written.
+
+The parsers read the segments (of a log file) in order, after the
+unsegmented file, if any. `zstandard` is imported only when a zstd
+segment is written or read.
+"""
+
+import gzip
+import os
+import re
+import zlib
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Tuple, Union
+
+# Mapping of the compression methods to the suffixes of the segments.
+COMPRESSIONS = {"gzip": ".gz", "zstd": ".zst"}
+
+# Number of (decompressed) bytes read at a time from a compressed segment.
+_READ_SIZE = 1024 * 1024
+
+_SEGMENT_PATTERN = re.compile(r"(.*)\.(\d{6,})(\.[^./\\]+)(\.gz|\.zst)?")
+
+
+def is_compressed_file(file_path: Union[str, Path]) -> bool:
+    """Check if a file is a compressed segment."""
+    return str(file_path).endswith(tuple(COMPRESSIONS.values()))
+
+
+def get_segment_path(
+    file_path: str, segment_number: int, compression: Optional[str] = None
+) -> str:
+    """Get the path to a segment of a log file.
+
+    Args:
+        file_path (str): Path to the (unsegmented) log file, eg
+            `logs/metric_log.jsonl`.
+        segment_number (int): Number of the segment.
+        compression (Optional[str], optional): Compression method of the
+            segment ("gzip" or "zstd"). Defaults to None.
+
+    Returns:
+        str: Path to the segment, eg `logs/metric_log.000001.jsonl.gz`
+    """
+    root, extension = os.path.splitext(file_path)
+    suffix = COMPRESSIONS[compression] if compression is not None else ""
+    return f"{root}.{segment_number:06d}{extension}{suffix}"
+
+
+def parse_segment_path(file_path: Union[str, Path]) -> Optional[Tuple[str, int]]:
+    """Get the path to the log file and the number of a segment.
+
+    Returns None if the file is not a segment.
+    """
+    match = _SEGMENT_PATTERN.fullmatch(str(file_path))
+    if match is None:
+        return None
+    return match.group(1) + match.group(3), int(match.group(2))
+
+
+def get_last_segment_number(file_path: str) -> int:
+    """Get the number of the last segment (of a log file), or -1 if there are none."""
+    directory = os.path.dirname(file_path) or "."
+    segment_numbers = [-1]
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            parsed = parse_segment_path(os.path.join(os.path.dirname(file_path), name))
+            if parsed is not None and parsed[0] == file_path:
+                segment_numbers.append(parsed[1])
+    return max(segment_numbers)
+
+
+def get_sort_key(file_path: Union[str, Path]) -> Tuple[str, int]:
+    """Get the key to sort the log files by, so the segments are in order."""
+    parsed = parse_segment_path(file_path)
+    if parsed is None:
+        return str(file_path), -1
+    return parsed
+
+
+def get_compressor(compression: str) -> Callable[[bytes], bytes]:
+    """Get a function that compresses the bytes as one gzip member (or zstd frame).
+
+    Raises:
+        ValueError: If the compression method is not supported.
+    """
+    if compression not in COMPRESSIONS:
+        compression_string = ", ".join(COMPRESSIONS)
+        raise ValueError(
+            f"compression should be one of {compression_string}. Got {compression}"
+        )
+    if compression == "zstd":
+        import zstandard
+
+        compressor = zstandard.ZstdCompressor()
+        return compressor.compress  # type: ignore[no-any-return]
+    # mtime=0 keeps the output deterministic and compresslevel=6 is the
+    # zlib default (gzip.compress defaults to 9, which is much slower).
+    return lambda data: gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def _iterate_zstd_lines(file_path: Union[str, Path]) -> Iterator[bytes]:
+    import zstandard
+
+    with open(file_path, "rb") as f:
+        reader = zstandard.ZstdDecompressor().stream_reader(f, read_across_frames=True)
+        pending = b""
+        while True:
+            try:
+                data = reader.read(_READ_SIZE)
+            except zstandard.ZstdError:
+                # the last frame is still being written (or was truncated).
+                break
+            if not data:
+                break
+            lines = (pending + data).split(b"\n")
+            pending = lines.pop()
+            for line in lines:
+                yield line + b"\n"
+        if pending:
+            yield pending
+
+
+def _iterate_gzip_lines(file_path: Union[str, Path]) -> Iterator[bytes]:
+    with gzip.open(file_path, "rb") as f:
+        try:
+            yield from f
+        except (EOFError, gzip.BadGzipFile, zlib.error):
+            # the last member is still being written (or was truncated).
+            return
+
+
+def iterate_lines(file_path: Union[str, Path]) -> Iterator[bytes]:
+    """Iterate over the lines (including the newlines) of a log file or segment.
+
+    The compressed segments are decompressed as they are read. An
+    incomplete member (or frame) at the end of a compressed segment is
+    ignored.
+
+    Args:
+        file_path (Union[str, Path]): Log file (or segment) to read from
+
+    Yields:
+        Iterator[bytes]: Iterator over the lines
+    """
+    if str(file_path).endswith(COMPRESSIONS["zstd"]):
+        yield from _iterate_zstd_lines(file_path)
+    elif str(file_path).endswith(COMPRESSIONS["gzip"]):
+        yield from _iterate_gzip_lines(file_path)
+    else:
+        with open(file_path, "rb") as f:
+            yield from f
@@ -0,0 +1,246 @@
+"""JSON serializers used for writing and parsing the logs.
+
+The stdlib `json` module is always available. Faster serializers
+(`orjson`, `msgspec` and `ujson`) are used, when installed, by the
+default serializer (see `get_serializer`).
+
+Some fast serializers write `NaN` and `Infinity` as `null`. To preserve
+these values, the objects with non-finite floats are serialized using the
+stdlib serializer (which writes them as `NaN` and `Infinity`). All the
+serializers can read the logs written by any other serializer.
+
+"""
+
+import json
+import math
+from abc import ABCMeta, abstractmethod
+from typing import Any, Callable, Dict, Iterable, Optional, Union
+
+import numpy as np
+
+
+def to_json_serializable(val: Any) -> Any:
+    """Serialize values as json.
+
+    This function is used as the `default` hook of the serializers and
+    raises TypeError for the values that can not be serialized.
+    """
+    if isinstance(val, np.floating):
+        return float(val)
+    if isinstance(val, np.integer):
+        return int(val)
+    if isinstance(val, np.bool_):
+        return bool(val)
+    if isinstance(val, np.ndarray):
+        return val.tolist()
+    raise TypeError(f"Object of type {type(val).__name__} is not JSON serializable")
+
+
+def has_non_finite_float(obj: object) -> bool:
+    """Check if the object has a `NaN` or an infinite float (at any depth).
+
+    Dictionaries, lists, tuples and numpy arrays are checked recursively.
+    """
+    values: Iterable[object]
+    if isinstance(obj, (float, np.floating)):
+        return not math.isfinite(obj)
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.kind in "fc":
+            return not bool(np.isfinite(obj).all())
+        values = obj.tolist() if obj.dtype.kind == "O" else []
+    elif isinstance(obj, dict):
+        values = obj.values()
+    elif isinstance(obj, (list, tuple)):
+        values = obj
+    else:
+        return False
+    return any(has_non_finite_float(value) for value in values)
+
+
+class Serializer(metaclass=ABCMeta):
+    """Abstract Serializer Class."""
+
+    name = "base"
+
+    @abstractmethod
+    def dumps(self, obj: Any) -> str:
+        """Serialize an object into a JSON string.
+
+        Args:
+            obj (Any): Object to serialize
+
+        Returns:
+            str: JSON serialized string
+        """
+        pass
+
+    @abstractmethod
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """Deserialize a JSON string.
+
+        Args:
+            data (Union[str, bytes]): JSON string to deserialize
+
+        Raises:
+            json.JSONDecodeError: If `data` is not a valid JSON string
+
+        Returns:
+            Any: Deserialized object
+        """
+        pass
+
+
+class JsonSerializer(Serializer):
+    """Serializer that uses the stdlib `json` module."""
+
+    name = "json"
+
+    def dumps(self, obj: Any) -> str:
+        """Serialize an object into a JSON string."""
+        return json.dumps(obj, default=to_json_serializable)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """Deserialize a JSON string."""
+        return json.loads(data)
+
+
+class _FastSerializer(Serializer):
+    """Base class for the serializers that fallback to the stdlib `json` module.
+
+    The fast serializers do not support some inputs (eg non-string keys,
+    very large integers, `NaN` while reading) and some of them write `NaN`
+    and `Infinity` as `null`. These inputs are handled by the stdlib
+    `json` module.
+    """
+
+    def __init__(self) -> None:
+        self._fallback = JsonSerializer()
+
+    @abstractmethod
+    def _dumps(self, obj: Any) -> str:
+        pass
+
+    @abstractmethod
+    def _loads(self, data: Union[str, bytes]) -> Any:
+        pass
+
+    def dumps(self, obj: Any) -> str:
+        """Serialize an object into a JSON string."""
+        try:
+            data = self._dumps(obj)
+        except (TypeError, ValueError, OverflowError):
+            return self._fallback.dumps(obj)
+        # Non-finite floats are written as null by some serializers.
+        if "null" in data and has_non_finite_float(obj):
+            return self._fallback.dumps(obj)
+        return data
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """Deserialize a JSON string."""
+        try:
+            return self._loads(data)
+        except ValueError:
+            return self._fallback.loads(data)
+
+
+class OrjsonSerializer(_FastSerializer):
+    """Serializer that uses `orjson`.
+
+    numpy scalars and arrays are serialized natively.
+    """
+
+    name = "orjson"
+
+    def __init__(self) -> None:
+        import orjson
+
+        super().__init__()
+        self._orjson = orjson
+        self._option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def _dumps(self, obj: Any) -> str:
+        return self._orjson.dumps(
+            obj, default=to_json_serializable, option=self._option
+        ).decode("utf-8")
+
+    def _loads(self, data: Union[str, bytes]) -> Any:
+        return self._orjson.loads(data)
+
+
+class MsgspecSerializer(_FastSerializer):
+    """Serializer that uses `msgspec`."""
+
+    name = "msgspec"
+
+    def __init__(self) -> None:
+        import msgspec
+
+        super().__init__()
+        self._encoder = msgspec.json.Encoder(enc_hook=to_json_serializable)
+        self._decoder = msgspec.json.Decoder()
+
+    def _dumps(self, obj: Any) -> str:
+        data: bytes = self._encoder.encode(obj)
+        return data.decode("utf-8")
+
+    def _loads(self, data: Union[str, bytes]) -> Any:
+        return self._decoder.decode(data)
+
+
+class UjsonSerializer(_FastSerializer):
+    """Serializer that uses `ujson`."""
+
+    name = "ujson"
+
+    def __init__(self) -> None:
+        import ujson
+
+        super().__init__()
+        self._ujson = ujson
+
+    def _dumps(self, obj: Any) -> str:
+        data: str = self._ujson.dumps(obj, default=to_json_serializable)
+        return data
+
+    def _loads(self, data: Union[str, bytes]) -> Any:
+        return self._ujson.loads(data)
+
+
+SERIALIZERS: Dict[str, Callable[[], Serializer]] = {
+    "orjson": OrjsonSerializer,
+    "msgspec": MsgspecSerializer,
+    "ujson": UjsonSerializer,
+    "json": JsonSerializer,
+}
+
+_serializers: Dict[str, Serializer] = {}
+
+
+def get_serializer(name: Optional[str] = None) -> Serializer:
+    """Get a serializer.
+
+    Args:
+        name (Optional[str], optional): Name of the serializer. One of
+            "orjson", "msgspec", "ujson" and "json". If None, the first
+            serializer (in that order) that is installed is returned.
+            Defaults to None.
+
+    Raises:
+        ValueError: If the serializer is not supported.
+        ImportError: If the library needed by the serializer is not installed.
+
+    Returns:
+        Serializer: Serializer instance
+    """
+    if name is None:
+        for _name in SERIALIZERS:
+            try:
+                return get_serializer(name=_name)
+            except ImportError:
+                pass
+    if name not in SERIALIZERS:
+        serializer_string = ", ".join(SERIALIZERS)
+        raise ValueError(f"serializer should be one of {serializer_string}. Got {name}")
+    if name not in _serializers:
+        _serializers[name] = SERIALIZERS[name]()
+    return _serializers[name]
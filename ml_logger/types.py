@@ -1,12 +1,14 @@
 """Types used in the package."""
-from typing import Any, Callable, Dict, Optional, Union
+from typing import Any, Callable, Dict, Mapping, Optional, Union
 
 NumType = Union[int, float]
 ValueType = Union[str, int, float]
 LogType = Dict[str, Any]
+ReadOnlyLogType = Mapping[str, Any]
 ParseLineFunctionType = Callable[[str], Optional[LogType]]
 ConfigType = LogType
 MetricType = LogType
 ModelType = Any
 ComparisonOpType = Callable[[ValueType, ValueType], bool]
 KeyMapType = Dict[str, str]
+CheckpointType = Dict[str, Dict[str, int]]
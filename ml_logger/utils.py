@@ -1,6 +1,7 @@
 """Utility Methods."""
+
 import pathlib
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Mapping, Tuple
 
 
 def flatten_dict(
@@ -39,6 +40,6 @@ def make_dir(path: str) -> None:
     pathlib.Path(path).mkdir(parents=True, exist_ok=True)
 
 
-def compare_keys_in_dict(dict1: Dict[Any, Any], dict2: Dict[Any, Any]) -> bool:
+def compare_keys_in_dict(dict1: Mapping[Any, Any], dict2: Mapping[Any, Any]) -> bool:
     """Check that the two dicts have the same set of keys."""
     return set(dict1.keys()) == set(dict2.keys())
@@ -0,0 +1,271 @@
+"""Implementation of the AsyncWriter and ClientWriter classes.
+
+AsyncWriter wraps a logger and writes the logs on a dedicated background
+thread, so that slow backends (mlflow, wandb, mongodb, etc) do not block
+the training loop.
+
+ClientWriter sends the logs to an aggregator process (refer
+`ml_logger.aggregator`) that owns the loggers, so that many processes can
+share the same backends.
+
+"""
+
+import queue
+import threading
+import time
+from multiprocessing.connection import Client, Connection
+from typing import Any, List, Optional, Union
+
+from ml_logger.logger.base import Logger as LoggerType
+from ml_logger.types import ReadOnlyLogType
+
+QUEUE_POLICIES = ("block", "drop_oldest", "drop_newest")
+
+_FLUSH = object()
+_CLOSE = object()
+
+# A queue item is a log, a batch of logs or one of the sentinels.
+_QueueItemType = Union[ReadOnlyLogType, List[ReadOnlyLogType], object]
+
+
+def _count_logs(item: _QueueItemType) -> int:
+    """Count the number of logs in a queue item."""
+    if isinstance(item, list):
+        return len(item)
+    if item is _FLUSH or item is _CLOSE:
+        return 0
+    return 1
+
+
+class _LogQueue(queue.Queue):  # type: ignore
+    """Queue that can drop the oldest log without dropping the sentinels."""
+
+    def drop_oldest_logs(self) -> int:
+        """Remove the oldest log (or batch of logs) from the queue.
+
+        Returns:
+            int: Number of logs removed. It is 0 if the queue has only
+                the sentinels.
+        """
+        with self.mutex:
+            for index, item in enumerate(self.queue):
+                if item is not _FLUSH and item is not _CLOSE:
+                    del self.queue[index]
+                    self.unfinished_tasks -= 1
+                    if self.unfinished_tasks == 0:
+                        self.all_tasks_done.notify_all()
+                    self.not_full.notify()
+                    return _count_logs(item)
+        return 0
+
+
+class AsyncWriter:
+    """Write logs to a logger using a background thread."""
+
+    def __init__(
+        self,
+        logger: LoggerType,
+        queue_size: int = 1000,
+        queue_policy: str = "block",
+    ):
+        """Write logs to a logger using a background thread.
+
+        Args:
+            logger (LoggerType): Logger to write the logs to.
+            queue_size (int, optional): Maximum number of items that can
+                be waiting to be written. An item is a log (see `write()`)
+                or a batch of logs (see `write_batch()`). Defaults to 1000.
+            queue_policy (str, optional): What to do when the queue is
+                full. "block" waits for a free slot, "drop_oldest" discards
+                the oldest queued item and "drop_newest" discards the
+                incoming item. Defaults to "block".
+        """
+        if queue_policy not in QUEUE_POLICIES:
+            policy_string = ", ".join(QUEUE_POLICIES)
+            raise ValueError(
+                f"queue_policy should be one of {policy_string}. Got {queue_policy}"
+            )
+        self.logger = logger
+        self.queue_policy = queue_policy
+        self.num_dropped_logs = 0
+        self._queue = _LogQueue(maxsize=queue_size)
+        self._error: Optional[BaseException] = None
+        self._is_closed = False
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"ml_logger_writer_{type(logger).__module__}",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def _run(self) -> None:
+        """Drain the queue and write the logs to the logger."""
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _CLOSE:
+                    return
+                if item is _FLUSH:
+                    self.logger.flush()
+                elif isinstance(item, list):
+                    self.logger.write_batch(logs=item)
+                else:
+                    self.logger.write(log=item)
+            except Exception as error:
+                if self._error is None:
+                    self._error = error
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self) -> None:
+        """Raise the (first) error encountered by the background thread."""
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _put(self, item: _QueueItemType) -> None:
+        """Put an item in the queue, respecting the queue policy.
+
+        The sentinels (used by `flush()` and `close()`) are never dropped.
+        """
+        if self.queue_policy == "block":
+            self._queue.put(item)
+            return
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                if self.queue_policy == "drop_newest":
+                    self.num_dropped_logs += _count_logs(item)
+                    return
+            num_dropped_logs = self._queue.drop_oldest_logs()
+            if num_dropped_logs == 0:
+                # the queue has only the sentinels, wait for a free slot.
+                self._queue.put(item)
+                return
+            self.num_dropped_logs += num_dropped_logs
+
+    def write(self, log: ReadOnlyLogType) -> None:
+        """Enqueue the log to be written by the background thread.
+
+        Args:
+            log (ReadOnlyLogType): Log to write
+        """
+        if self._is_closed:
+            raise RuntimeError("Can not write to a closed AsyncWriter.")
+        self._raise_error()
+        self._put(log)
+
+    def write_batch(self, logs: List[ReadOnlyLogType]) -> None:
+        """Enqueue a batch of logs to be written by the background thread.
+
+        The batch occupies a single slot in the queue.
+
+        Args:
+            logs (List[ReadOnlyLogType]): Logs to write
+        """
+        if self._is_closed:
+            raise RuntimeError("Can not write to a closed AsyncWriter.")
+        self._raise_error()
+        self._put(logs)
+
+    def flush(self) -> None:
+        """Block till all the enqueued logs are written (and flushed)."""
+        if not self._is_closed:
+            self._queue.put(_FLUSH)
+            self._queue.join()
+        self._raise_error()
+
+    def close(self) -> None:
+        """Write all the enqueued logs and stop the background thread."""
+        if self._is_closed:
+            return
+        self._is_closed = True
+        self._queue.put(_FLUSH)
+        self._queue.put(_CLOSE)
+        self._thread.join()
+        self.logger.close()
+        self._raise_error()
+
+
+def _connect(address: Any, timeout: float) -> Connection:
+    """Connect to the address, retrying till the timeout (in seconds) expires."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return Client(address)
+        except (FileNotFoundError, ConnectionRefusedError):
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.05)
+
+
+class ClientWriter:
+    """Send logs to the aggregator process that writes them to the loggers."""
+
+    def __init__(self, address: Any, connect_timeout: float = 0.0):
+        """Send logs to the aggregator process that writes them to the loggers.
+
+        The logs of a client are written in the order they are sent. Use
+        the batched mode of the LogBook (`batch_size`) to send many logs
+        in one message.
+
+        Args:
+            address (Any): Address of the aggregator (refer
+                `ml_logger.aggregator.LogAggregator`), eg the path of a
+                Unix socket.
+            connect_timeout (float, optional): Keep trying to connect to
+                the aggregator for these many seconds, if it is not
+                listening yet. Defaults to 0.0.
+        """
+        self.address = address
+        self._connection = _connect(address, connect_timeout)
+        # The lock guards the connection as the LogBook can write a batch
+        # from the timer thread.
+        self._lock = threading.Lock()
+
+    def _send(self, message: Any) -> None:
+        if self._connection.closed:
+            raise RuntimeError("Can not write to a closed ClientWriter.")
+        with self._lock:
+            self._connection.send(message)
+
+    def write(self, log: ReadOnlyLogType) -> None:
+        """Send the log to the aggregator.
+
+        Args:
+            log (ReadOnlyLogType): Log to write
+        """
+        self._send(("logs", [dict(log)]))
+
+    def write_batch(self, logs: List[ReadOnlyLogType]) -> None:
+        """Send a batch of logs to the aggregator, in one message.
+
+        Args:
+            logs (List[ReadOnlyLogType]): Logs to write
+        """
+        self._send(("logs", [dict(log) for log in logs]))
+
+    def flush(self) -> None:
+        """Block till the aggregator has written (and flushed) the sent logs.
+
+        Raises:
+            RuntimeError: If the aggregator failed to write some logs.
+        """
+        if self._connection.closed:
+            return
+        with self._lock:
+            self._connection.send(("flush", None))
+            _, error = self._connection.recv()
+        if error is not None:
+            raise RuntimeError(f"The aggregator failed to write the logs: {error}")
+
+    def close(self) -> None:
+        """Close the connection to the aggregator.
+
+        The logs sent before closing are written by the aggregator.
+        """
+        with self._lock:
+            if not self._connection.closed:
+                self._connection.close()
@@ -1,6 +1,22 @@
+import gc
+import json
+import math
+import threading
+import time
+import weakref
+from types import MappingProxyType
+from unittest import mock
+
+import numpy as np
 import pytest
 
-from tests.utils import get_logs, get_logs_and_types, make_logbook
+from ml_logger.aggregator import LogAggregator
+from ml_logger.logger.filesystem import Logger as FilesystemLogger
+from ml_logger.metrics import MaxMetric, MinMetric
+from ml_logger.parser.metric import Parser as MetricParser
+from ml_logger.serializer import SERIALIZERS
+from ml_logger.writer import AsyncWriter
+from tests.utils import get_logs, get_logs_and_types, make_logbook, make_logbook_config
 
 
 @pytest.mark.parametrize("logs", get_logs(log_type="config", valid=True))
@@ -76,3 +92,523 @@ def test_logger_with_invalid_logs(tmp_path, logs, log_type):
     with pytest.raises(TypeError):
         for log in logs:
             logbook.write(log, log_type)
+
+
+@pytest.mark.parametrize("logs, log_type", get_logs_and_types(valid=True))
+def test_async_logger_with_valid_logs(tmp_path, logs, log_type):
+    logbook = make_logbook(tmp_path, async_write=True, write_to_console=False)
+    for log in logs:
+        logbook.write(log, log_type)
+    logbook.close()
+    with open(tmp_path / f"{log_type}_log.jsonl") as f:
+        assert len(f.readlines()) == len(logs)
+
+
+@pytest.mark.parametrize("queue_policy", ["drop_oldest", "drop_newest"])
+def test_async_logger_drops_logs_when_queue_is_full(tmp_path, queue_policy):
+    logbook = make_logbook(
+        tmp_path,
+        async_write=True,
+        queue_size=1,
+        queue_policy=queue_policy,
+        write_to_console=False,
+    )
+    writer = logbook.writers[0]
+    writer.logger.write = lambda log: time.sleep(0.01)
+    num_logs = 20
+    for step in range(num_logs):
+        logbook.write_metric({"step": step})
+    logbook.close()
+    assert 0 < writer.num_dropped_logs < num_logs
+
+
+class _SlowLogger:
+    def __init__(self):
+        self.release = threading.Event()
+        self.steps = []
+        self.num_flushes = 0
+
+    def write(self, log):
+        self.release.wait()
+        self.steps.append(log["step"])
+
+    def flush(self):
+        self.num_flushes += 1
+
+    def close(self):
+        self.flush()
+
+
+def test_async_writer_does_not_drop_the_sentinels():
+    logger = _SlowLogger()
+    writer = AsyncWriter(logger=logger, queue_size=2, queue_policy="drop_oldest")
+    writer.write({"step": 0})
+    # wait for the background thread to block on the first log.
+    while writer._queue.qsize():
+        time.sleep(0.001)
+    flush_thread = threading.Thread(target=writer.flush)
+    flush_thread.start()
+    while not writer._queue.qsize():
+        time.sleep(0.001)
+    for step in range(1, 10):
+        writer.write({"step": step})
+    assert writer.num_dropped_logs == 8
+    logger.release.set()
+    flush_thread.join()
+    assert logger.num_flushes == 1
+    writer.close()
+    assert logger.steps == [0, 9]
+    assert logger.num_flushes == 3
+
+
+def test_logbook_is_closed_when_garbage_collected(tmp_path):
+    logbook = make_logbook(tmp_path, flush_every_n_lines=10, write_to_console=False)
+    logbook.write_metric({"step": 0})
+    logbook_ref = weakref.ref(logbook)
+    del logbook
+    gc.collect()
+    assert logbook_ref() is None
+    assert _count_lines(tmp_path / "metric_log.jsonl") == 1
+
+
+def test_write_to_closed_logbook(tmp_path):
+    logbook = make_logbook(tmp_path, write_to_console=False)
+    logbook.close()
+    with pytest.raises(RuntimeError):
+        logbook.write_metric({"step": 0})
+
+
+def test_async_logger_with_invalid_queue_policy(tmp_path):
+    with pytest.raises(ValueError):
+        make_logbook(tmp_path, async_write=True, queue_policy="invalid")
+
+
+@pytest.mark.parametrize("async_write", [False, True])
+@pytest.mark.parametrize("batch_size", [2, 3, 100])
+def test_logger_with_batched_writes(tmp_path, async_write, batch_size):
+    logbook = make_logbook(
+        tmp_path,
+        async_write=async_write,
+        batch_size=batch_size,
+        write_to_console=False,
+    )
+    num_logs = 10
+    for step in range(num_logs):
+        logbook.write_metric({"step": step})
+    logbook.flush()
+    with open(tmp_path / "metric_log.jsonl") as f:
+        steps = [json.loads(line)["step"] for line in f]
+    assert steps == list(range(num_logs))
+    logbook.close()
+
+
+def test_logger_with_batch_timeout(tmp_path):
+    logbook = make_logbook(
+        tmp_path, batch_size=100, batch_timeout_ms=0, write_to_console=False
+    )
+    logbook.write_metric({"step": 0})
+    with open(tmp_path / "metric_log.jsonl") as f:
+        assert len(f.readlines()) == 1
+    logbook.close()
+
+
+def test_logger_with_batch_timeout_and_no_more_writes(tmp_path):
+    logbook = make_logbook(
+        tmp_path, batch_size=100, batch_timeout_ms=10, write_to_console=False
+    )
+    logbook.write_metric({"step": 0})
+    path = tmp_path / "metric_log.jsonl"
+    for _ in range(200):
+        if _count_lines(path) == 1:
+            break
+        time.sleep(0.01)
+    assert _count_lines(path) == 1
+    logbook.close()
+
+
+def test_mongo_logger_writes_batches(monkeypatch):
+    pytest.importorskip("pymongo")
+    from ml_logger.logger import mongo as mongo_logger
+
+    client = mock.MagicMock()
+    monkeypatch.setattr(mongo_logger, "MongoClient", lambda host, port: client)
+    logger = mongo_logger.Logger(
+        config={
+            "host": "localhost",
+            "port": 27017,
+            "db": "db",
+            "collection": "collection",
+            "logbook_key_map": None,
+            "logbook_key_prefix": None,
+        }
+    )
+    logs = [
+        MappingProxyType({"step": 0, "logbook_type": "metric"}),
+        MappingProxyType({"lr": 0.1, "logbook_type": "config"}),
+        MappingProxyType({"message": "done", "logbook_type": "message"}),
+    ]
+    logger.write_batch(logs)
+    collection = client["db"]["collection"]
+    collection.insert_many.assert_called_once()
+    documents = collection.insert_many.call_args[0][0]
+    assert documents == [dict(log) for log in logs[1:]]
+    assert all(isinstance(document, dict) for document in documents)
+    collection.insert_many.reset_mock()
+    logger.write_batch(logs[:1])
+    collection.insert_many.assert_not_called()
+
+
+def test_mlflow_logger_writes_batches(monkeypatch):
+    mlflow = pytest.importorskip("mlflow")
+    from ml_logger.logbook import TIME_FORMAT
+    from ml_logger.logger import mlflow as mlflow_logger
+
+    run = mock.MagicMock()
+    run.info.run_id = "run_id"
+    client = mock.MagicMock()
+    monkeypatch.setattr(mlflow, "create_experiment", lambda **kwargs: None)
+    monkeypatch.setattr(mlflow, "active_run", lambda: None)
+    monkeypatch.setattr(mlflow, "start_run", lambda: run)
+    monkeypatch.setattr(mlflow_logger, "MlflowClient", lambda: client)
+    monkeypatch.setattr(mlflow_logger, "MAX_METRICS_PER_BATCH", 3)
+    logger = mlflow_logger.Logger(
+        config={
+            "name": "experiment",
+            "logbook_key_map": None,
+            "logbook_key_prefix": None,
+        }
+    )
+    start_time = int(time.time()) - 100
+    logs = [
+        MappingProxyType(
+            {
+                "step": step,
+                "loss": 0.1,
+                "acc": 0.5,
+                "logbook_id": "0",
+                "logbook_timestamp": time.strftime(
+                    TIME_FORMAT, time.localtime(start_time + step)
+                ),
+                "logbook_type": "metric",
+            }
+        )
+        for step in range(3)
+    ]
+    logs.append(MappingProxyType({"lr": 0.1, "logbook_type": "config"}))
+    logger.write_batch(logs)
+
+    calls = client.log_batch.call_args_list
+    assert [call.kwargs["run_id"] for call in calls] == ["run_id"] * 3
+    assert [param.key for param in calls[0].kwargs["params"]] == ["lr"]
+    metrics = [metric for call in calls[1:] for metric in call.kwargs["metrics"]]
+    assert [len(call.kwargs["metrics"]) for call in calls[1:]] == [3, 3]
+    assert [(metric.step, metric.key) for metric in metrics] == [
+        (step, key) for step in range(3) for key in ["loss", "acc"]
+    ]
+    # every metric is timestamped with the time of its log.
+    assert [metric.timestamp for metric in metrics] == [
+        (start_time + step) * 1000 for step in range(3) for _ in range(2)
+    ]
+
+
+def test_tensorboard_logger_filters_the_config(monkeypatch):
+    pytest.importorskip("tensorboardX")
+    from ml_logger.logger import tensorboard as tensorboard_logger
+
+    summary_writer = mock.MagicMock()
+    monkeypatch.setattr(
+        tensorboard_logger, "SummaryWriter", lambda **kwargs: summary_writer
+    )
+    logger = tensorboard_logger.Logger(
+        config={"logbook_key_map": None, "logbook_key_prefix": None}
+    )
+    log = MappingProxyType(
+        {"lr": 0.1, "name": "run", "logbook_id": "0", "logbook_type": "config"}
+    )
+    logger.write(log)
+    logger.write_config(config=dict(log))
+    for call in summary_writer.add_hparams.call_args_list:
+        assert call.kwargs["hparam_dict"] == {"lr": 0.1}
+        assert call.kwargs["name"] == "run"
+    assert summary_writer.add_hparams.call_count == 2
+    assert "name" in log
+
+
+def test_logger_does_not_modify_the_log(tmp_path):
+    logbook = make_logbook(tmp_path, write_to_console=False)
+    log = {"step": 1, "nested": {"loss": 0.1}}
+    logbook.write_metric(log)
+    assert log == {"step": 1, "nested": {"loss": 0.1}}
+    processed_log = logbook._process_log(log, "metric")
+    with pytest.raises(TypeError):
+        processed_log["step"] = 2
+
+
+def test_prepare_metric_log_does_not_modify_the_log(tmp_path):
+    config = make_logbook_config(tmp_path)["loggers"]["filesystem"]
+    config["logbook_key_map"] = {"epoch": "step"}
+    logger = FilesystemLogger(config=config)
+    logger.keys_to_skip = ["logbook_id"]
+    log = MappingProxyType({"epoch": 1, "loss": 0.1, "logbook_id": "0"})
+    assert logger._prepare_metric_log_to_write(log) == {"step": 1, "loss": 0.1}
+    assert log == {"epoch": 1, "loss": 0.1, "logbook_id": "0"}
+
+
+def _count_lines(path):
+    with open(path) as f:
+        return len(f.readlines())
+
+
+def test_filesystem_logger_flushes_every_n_lines(tmp_path):
+    logbook = make_logbook(tmp_path, flush_every_n_lines=3, write_to_console=False)
+    path = tmp_path / "metric_log.jsonl"
+    for step in range(5):
+        logbook.write_metric({"step": step})
+    assert _count_lines(path) == 3
+    logbook.flush()
+    assert _count_lines(path) == 5
+    logbook.write_metric({"step": 5})
+    logbook.loggers[0].fsync()
+    assert _count_lines(path) == 6
+    logbook.close()
+
+
+def test_filesystem_logger_flushes_after_interval_with_no_more_writes(tmp_path):
+    logbook = make_logbook(
+        tmp_path, flush_every_n_lines=100, flush_interval=0.01, write_to_console=False
+    )
+    logbook.write_metric({"step": 0})
+    path = tmp_path / "metric_log.jsonl"
+    for _ in range(200):
+        if _count_lines(path) == 1:
+            break
+        time.sleep(0.01)
+    assert _count_lines(path) == 1
+    logbook.close()
+
+
+def test_filesystem_logger_writes_to_console(tmp_path, capsys):
+    logbook = make_logbook(tmp_path, write_to_console=True)
+    logbook.write_metric({"step": 0})
+    logbook.close()
+    assert json.loads(capsys.readouterr().err)["step"] == 0
+
+
+def test_filesystem_logger_with_single_file_preserves_order(tmp_path):
+    logbook = make_logbook(
+        tmp_path,
+        create_multiple_log_files=False,
+        batch_size=10,
+        write_to_console=False,
+    )
+    log_types = ["config", "metric", "metadata", "metric"]
+    for step, log_type in enumerate(log_types):
+        logbook.write({"step": step}, log_type=log_type)
+    logbook.close()
+    with open(tmp_path / "log.jsonl") as f:
+        logs = [json.loads(line) for line in f]
+    assert [log["logbook_type"] for log in logs] == log_types
+
+
+@pytest.mark.parametrize("serializer", list(SERIALIZERS))
+def test_write_non_finite_floats(tmp_path, serializer):
+    if serializer != "json":
+        pytest.importorskip(serializer)
+    logbook = make_logbook(tmp_path, write_to_console=False, serializer=serializer)
+    logbook.write_metric(
+        {
+            "loss": float("nan"),
+            "acc": np.float32("inf"),
+            "best_loss": MinMetric("best_loss").get_val(),
+            "best_acc": MaxMetric("best_acc").get_val(),
+            "none": None,
+        }
+    )
+    logbook.close()
+    log = MetricParser().parse_last_log(str(tmp_path / "metric_log.jsonl"))
+    assert math.isnan(log["loss"])
+    assert log["acc"] == math.inf
+    assert log["best_loss"] == math.inf
+    assert log["best_acc"] == -math.inf
+    assert log["none"] is None
+
+
+def test_columnar_logger_rolls_segments(tmp_path):
+    pytest.importorskip("pyarrow")
+    from ml_logger.parser.columnar import read_columnar_file
+
+    columnar_config = {
+        "rows_per_batch": 2,
+        "segment_max_bytes": 1,
+        "segment_max_seconds": 0.01,
+    }
+    logbook = make_logbook(
+        tmp_path, write_to_console=False, columnar_config=dict(columnar_config)
+    )
+    # the segment is written once the record batch is full.
+    logbook.write_metric({"step": 0, "loss": 1})
+    logbook.write_metric({"step": 1, "loss": 0.5, "acc": np.float32(0.5)})
+    # the segment is written by the timer, with no more writes.
+    logbook.write_metric({"step": 2, "loss": None, "config": {"lr": 0.1}})
+    for _ in range(200):
+        if len(list(tmp_path.glob("*.arrow"))) == 2:
+            break
+        time.sleep(0.01)
+    logbook.close()
+    file_paths = sorted(tmp_path.glob("*.arrow"))
+    assert [path.name for path in file_paths] == [
+        "metric_log.000000.arrow",
+        "metric_log.000001.arrow",
+    ]
+    df = read_columnar_file(file_paths[0])
+    assert df["loss"].tolist() == [1.0, 0.5]
+    assert np.isnan(df["acc"][0]) and df["acc"][1] == 0.5
+    df = read_columnar_file(file_paths[1])
+    assert df["step"].tolist() == [2] and df["config.lr"].tolist() == [0.1]
+
+    # the segments are numbered after the existing segments.
+    logbook = make_logbook(
+        tmp_path, write_to_console=False, columnar_config=dict(columnar_config)
+    )
+    logbook.write_metric({"step": 3})
+    logbook.close()
+    assert (tmp_path / "metric_log.000002.arrow").exists()
+
+
+def test_filesystem_logger_rotates_segments(tmp_path):
+    logbook = make_logbook(
+        tmp_path,
+        write_to_console=False,
+        segment_max_bytes=200,
+        index_every_n_lines=2,
+    )
+    for step in range(10):
+        logbook.write_metric({"step": step, "loss": 1.0 / (step + 1)})
+    logbook.close()
+    segment_paths = sorted(tmp_path.glob("metric_log.*.jsonl"))
+    assert len(segment_paths) > 1
+    assert not (tmp_path / "metric_log.jsonl").exists()
+    steps = []
+    for path in segment_paths:
+        assert (tmp_path / f"{path.name}.idx").exists()
+        with open(path) as f:
+            steps.extend(json.loads(line)["step"] for line in f)
+    assert steps == list(range(10))
+
+    # the segments are numbered after the existing segments.
+    logbook = make_logbook(tmp_path, write_to_console=False, segment_max_seconds=60)
+    logbook.write_metric({"step": 10})
+    logbook.close()
+    assert sorted(tmp_path.glob("metric_log.*.jsonl"))[-1].name == (
+        f"metric_log.{len(segment_paths):06d}.jsonl"
+    )
+
+
+def test_filesystem_logger_with_invalid_compression(tmp_path):
+    with pytest.raises(ValueError):
+        make_logbook(tmp_path, write_to_console=False, compression="lz4")
+    with pytest.raises(ValueError):
+        make_logbook(
+            tmp_path,
+            write_to_console=False,
+            compression="gzip",
+            index_every_n_lines=2,
+        )
+
+
+def test_aggregator_writes_the_logs_of_many_logbooks(tmp_path):
+    aggregator = LogAggregator(
+        config=make_logbook_config(tmp_path, write_to_console=False)
+    )
+    num_logbooks, num_logs = 4, 50
+    logbooks = [
+        make_logbook(
+            None,
+            id=str(index),
+            write_to_console=False,
+            aggregator_address=aggregator.address,
+            batch_size=7,
+        )
+        for index in range(num_logbooks)
+    ]
+
+    def produce(logbook):
+        for step in range(num_logs):
+            logbook.write_metric({"step": step})
+        logbook.close()
+
+    # the flushed logs are written by the aggregator.
+    logbooks[0].write_metric({"step": -1})
+    logbooks[0].flush()
+    assert _count_lines(tmp_path / "metric_log.jsonl") == 1
+
+    threads = [
+        threading.Thread(target=produce, args=(logbook,)) for logbook in logbooks
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    aggregator.close()
+    with open(tmp_path / "metric_log.jsonl") as f:
+        logs = [json.loads(line) for line in f]
+    assert len(logs) == num_logbooks * num_logs + 1
+    for index in range(num_logbooks):
+        steps = [log["step"] for log in logs if log["logbook_id"] == str(index)]
+        expected_steps = list(range(num_logs))
+        assert steps == ([-1] + expected_steps if index == 0 else expected_steps)
+
+
+def test_logbooks_reduce_the_metrics_across_ranks(tmp_path):
+    world_size, num_logs = 3, 20
+    address = str(tmp_path / "rank_reduce.sock")
+
+    def run_rank(rank):
+        logbook = make_logbook(
+            tmp_path / "logs" if rank == 0 else None,
+            write_to_console=False,
+            rank_reduce_address=address,
+            rank=rank,
+            world_size=world_size,
+            rank_reduce_ops={"correct": "sum", "loss_max": "max"},
+            batch_size=3,
+        )
+        logbook.write_config({"lr": 0.1})
+        for step in range(num_logs):
+            logbook.write_metric(
+                {
+                    "step": step,
+                    "loss": float(rank + step),
+                    "loss_max": float(rank + step),
+                    "correct": rank,
+                }
+            )
+        logbook.close()
+
+    threads = [
+        threading.Thread(target=run_rank, args=(rank,)) for rank in range(world_size)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with open(tmp_path / "logs" / "metric_log.jsonl") as f:
+        logs = [json.loads(line) for line in f]
+    assert [log["step"] for log in logs] == list(range(num_logs))
+    for step, log in enumerate(logs):
+        assert log["loss"] == step + 1
+        assert log["loss_max"] == step + world_size - 1
+        assert log["correct"] == sum(range(world_size))
+    assert _count_lines(tmp_path / "logs" / "config_log.jsonl") == 1
+
+    with pytest.raises(ValueError):
+        make_logbook(None, rank_reduce_address=address, rank=3, world_size=3)
+    with pytest.raises(ValueError):
+        make_logbook(
+            None,
+            write_to_console=False,
+            rank_reduce_address=address,
+            rank=0,
+            world_size=1,
+            rank_reduce_ops={"loss": "median"},
+        )
@@ -1,4 +1,7 @@
-from typing import Iterator
+from typing import Iterator, List
+
+import numpy as np
+import pytest
 
 from ml_logger import metrics
 from ml_logger.types import LogType
@@ -101,3 +104,105 @@ def test_metric_dict() -> None:
     for key in expected_metric_dict:
         assert key in actual_metric_dict
         assert expected_metric_dict[key] == actual_metric_dict[key]
+
+
+def _make_metric_list(constant_val: int) -> List[metrics.BaseMetric]:
+    return [
+        metrics.CurrentMetric(name="test_current_metric"),
+        metrics.ConstantMetric(name="test_constant_metric", val=constant_val),
+        metrics.MaxMetric(name="test_max_metric"),
+        metrics.MinMetric(name="test_min_metric"),
+        metrics.AverageMetric(name="test_average_metric"),
+        metrics.AverageMetric(name="test_average_metric_using_tuple"),
+        metrics.SumMetric(name="test_sum_metric"),
+    ]
+
+
+def test_array_metric_dict() -> None:
+    metric_dict = metrics.MetricDict(_make_metric_list(constant_val=1000))
+    array_metric_dict = metrics.ArrayMetricDict(_make_metric_list(constant_val=1000))
+    assert array_metric_dict.to_dict() == metric_dict.to_dict()
+    num_steps = 100
+    for current_step in get_first_n_natural_numbers(num_steps):
+        current_metric_dict: LogType = {
+            "test_current_metric": current_step,
+            "test_max_metric": current_step % 7,
+            "test_min_metric": -current_step % 11,
+            "test_average_metric": current_step,
+            "test_average_metric_using_tuple": (current_step, 2),
+            "test_sum_metric": current_step,
+            "unknown_metric": current_step,
+        }
+        metric_dict.update(current_metric_dict)
+        array_metric_dict.update(current_metric_dict)
+        assert array_metric_dict.to_dict() == metric_dict.to_dict()
+    assert list(array_metric_dict.to_dict()) == list(metric_dict.to_dict())
+    tuples_metric_dict: LogType = {
+        "test_average_metric": (1, 3),
+        "test_sum_metric": (2, 3),
+    }
+    metric_dict.update(tuples_metric_dict)
+    array_metric_dict.update(tuples_metric_dict)
+    assert array_metric_dict.to_dict() == metric_dict.to_dict()
+
+    array_metric_dict.reset()
+    metric_dict.reset()
+    assert array_metric_dict.to_dict() == metric_dict.to_dict()
+
+    # update all the metrics with a vector of values.
+    names = array_metric_dict.names
+    for current_step in get_first_n_natural_numbers(num_steps):
+        array_metric_dict.update_array(
+            np.full(len(names), current_step), counts=np.full(len(names), 2)
+        )
+        metric_dict.update(
+            {
+                name: (
+                    (current_step, 2)
+                    if "average" in name or "sum" in name
+                    # the other metrics do not take the number of samples.
+                    else current_step
+                )
+                for name in names
+            }
+        )
+    assert array_metric_dict.to_dict() == metric_dict.to_dict()
+    with pytest.raises(ValueError):
+        array_metric_dict.update_array(np.zeros(len(names) + 1))
+    with pytest.raises(ValueError):
+        metrics.ArrayMetricDict([metrics.BaseMetric(name="test_base_metric")])
+
+
+def test_update_many() -> None:
+    values = np.arange(1, 101, dtype=np.float64)[::-1]
+    counts = np.arange(100) % 3 + 1
+    for metric_cls in [
+        metrics.CurrentMetric,
+        metrics.MaxMetric,
+        metrics.MinMetric,
+        metrics.AverageMetric,
+        metrics.SumMetric,
+    ]:
+        metric = metric_cls(name="test_metric")
+        expected_metric = metric_cls(name="test_metric")
+        metric.update_many(values[:50])
+        metric.update_many(list(values[50:]))
+        metric.update_many([])
+        for val in values:
+            expected_metric.update(float(val))
+        assert metric.get_val() == expected_metric.get_val()
+        assert repr(metric) == repr(expected_metric)
+        assert not hasattr(metric, "__dict__")
+
+    for metric_cls in [metrics.AverageMetric, metrics.SumMetric]:
+        metric = metric_cls(name="test_metric")
+        expected_metric = metric_cls(name="test_metric")
+        metric.update_many(values, counts=counts)
+        for val, n in zip(values, counts):
+            expected_metric.update(float(val), int(n))
+        assert metric.get_val() == expected_metric.get_val()
+
+    metric = metrics.ConstantMetric(name="test_constant_metric", val=1000)
+    metric.update_many(values)
+    assert metric.get_val() == 1000
+    assert repr(metric).endswith("{'name': 'test_constant_metric', 'val': 1000}")
@@ -1,8 +1,35 @@
+import functools
+import glob
+import gzip
+import json
+import os
 from copy import deepcopy
 
+import numpy as np
+import pandas as pd
 import pytest
 
-from ml_logger.parser.experiment import Parser
+from ml_logger.index import build_index, get_index_path, load_index
+from ml_logger.parser import downsample
+from ml_logger.parser.base import read_lines_in_reverse
+from ml_logger.parser.experiment import (
+    Catalog,
+    Experiment,
+    ExperimentSequence,
+    LazyExperimentSequence,
+    ParseCache,
+    Parser,
+    deserialize,
+)
+from ml_logger.parser.experiment.aggregate import (
+    STATISTICS,
+    aggregate_metric_statistics,
+    aggregate_runs,
+    align_runs,
+)
+from ml_logger.parser.log import parse_json_and_match_value
+from ml_logger.parser.metric import Parser as MetricParser
+from ml_logger.parser.reducer import Histogram, reduce_metrics
 from tests.utils import get_logs_and_types_for_parser, make_logbook
 
 logbook_keys = ["logbook_id", "logbook_timestamp", "logbook_type"]
@@ -50,3 +77,784 @@ def compare_components(exp_component, log_group, key):
     for exp_item, log_item in zip(exp_component, log_group):
         assert_logbook_keys_exist(exp_item, key)
         assert prep_log_before_comparing(exp_item) == log_item
+
+
+def write_metric_logs(logger_dir, num_logs):
+    logbook = make_logbook(logger_dir, write_to_console=False)
+    for step in range(num_logs):
+        logbook.write_metric({"step": step, "loss": 1.0 / (step + 1)})
+    logbook.close()
+
+
+@pytest.mark.parametrize("executor", ["process", "thread"])
+@pytest.mark.parametrize("ordered", [True, False])
+def test_parallel_metric_parser(tmp_path, executor, ordered):
+    num_logs = 200
+    for index in range(3):
+        write_metric_logs(tmp_path / str(index), num_logs)
+    filepath_pattern = str(tmp_path / "*" / "metric_log.jsonl")
+    parser = MetricParser()
+    expected_logs = list(parser.parse(filepath_pattern))
+    assert len(expected_logs) == 3 * num_logs
+    logs = list(
+        parser.parse(
+            filepath_pattern,
+            workers=2,
+            executor=executor,
+            ordered=ordered,
+            chunk_size=1000,
+        )
+    )
+    if ordered:
+        assert logs == expected_logs
+    else:
+        key = lambda log: (log["logbook_timestamp"], log["step"])  # noqa: E731
+        assert sorted(logs, key=key) == sorted(expected_logs, key=key)
+
+
+@pytest.mark.parametrize("logs", get_logs_and_types_for_parser())
+def test_parallel_experiment_parser(tmp_path, logs):
+    logbook = make_logbook(tmp_path)
+    for log, log_type in logs:
+        logbook.write(log, log_type)
+    parser = Parser()
+    assert parser.parse(tmp_path, workers=2) == parser.parse(tmp_path)
+
+
+def test_columnar_metric_parser(tmp_path):
+    logbook = make_logbook(tmp_path, write_to_console=False)
+    for step in range(10):
+        log = {
+            "step": step,
+            "mode": "train" if step % 2 else "eval",
+            "loss": 1.0 / (step + 1),
+            "nested": {"acc": step * 10},
+        }
+        if step == 5:
+            log["extra"] = "value"
+        logbook.write_metric(log)
+    logbook.close()
+    filepath_pattern = str(tmp_path / "metric_log.jsonl")
+    parser = MetricParser()
+    expected_df = parser.parse_as_df(filepath_pattern)["all"]
+    df = parser.parse_as_columnar_df(filepath_pattern)
+    pd.testing.assert_frame_equal(df, expected_df[df.columns], check_dtype=False)
+
+    df = parser.parse_as_columnar_df(
+        filepath_pattern, columns=["step", "nested.acc"], where={"mode": "train"}
+    )
+    assert list(df.columns) == ["step", "nested.acc"]
+    assert df["step"].tolist() == [1, 3, 5, 7, 9]
+    assert df["nested.acc"].tolist() == [10, 30, 50, 70, 90]
+
+    df = parser.parse_as_columnar_df(
+        filepath_pattern, columns=["step"], where={"nested.acc": 40}
+    )
+    assert df["step"].tolist() == [4]
+
+    df = parser.parse_as_columnar_df(filepath_pattern, where={"nested.acc": 40})
+    assert df["step"].tolist() == [4]
+    assert df["nested.acc"].tolist() == [40]
+
+    df = parser.parse_as_columnar_df(
+        filepath_pattern, where=lambda log: log["step"] >= 8
+    )
+    assert df["step"].tolist() == [8, 9]
+
+
+@pytest.mark.parametrize(
+    "line, value, is_match",
+    [
+        ('{"logbook_type": "metric", "loss": 1}', "metric", True),
+        ('{"logbook_type":"metric","loss":1}', "metric", True),
+        ('{"logbook_type": "config", "loss": 1}', "metric", False),
+        ('{"loss": 1}', "metric", False),
+        ('{"name": "logbook_type", "logbook_type": "metric"}', "metric", True),
+        ('{"nested": {"logbook_type": "metric"}}', "metric", False),
+        ('{"logbook_type": "met\\u0072ic"}', "metric", True),
+        ('{"logbook_type": 1}', "metric", False),
+        ('{"logbook_type": "config", "logbook_type": "metric"}', "metric", True),
+        ("not a json", "metric", False),
+    ],
+)
+def test_parse_json_and_match_value(line, value, is_match):
+    log = parse_json_and_match_value(line=line, value=value)
+    assert (log is not None) == is_match
+
+
+@pytest.mark.parametrize("content", ["", "\n", "a\nb\n", "a\n\nbcd", "abc" * 20])
+@pytest.mark.parametrize("block_size", [1, 2, 5, 1000])
+def test_read_lines_in_reverse(tmp_path, content, block_size):
+    file_path = tmp_path / "file.txt"
+    file_path.write_text(content)
+    with open(file_path) as f:
+        expected_lines = list(f)
+    lines = list(read_lines_in_reverse(file_path, block_size=block_size))
+    assert lines == expected_lines[::-1]
+
+
+def test_parse_last_n_logs(tmp_path):
+    num_logs = 20
+    for index in range(3):
+        write_metric_logs(tmp_path / str(index), num_logs)
+    file_paths = sorted(tmp_path.glob("*/metric_log.jsonl"))
+    # A partially written line at the end of the last file is skipped.
+    with open(file_paths[-1], "a") as f:
+        f.write('{"step": 20, "lo')
+    filepath_pattern = str(tmp_path / "*" / "metric_log.jsonl")
+    parser = MetricParser()
+    logs = list(parser.parse(filepath_pattern))
+    assert parser.parse_last_log(filepath_pattern) == logs[-1]
+    for n in [0, 1, 5, num_logs + 5, 4 * num_logs]:
+        expected_logs = logs[-n:] if n > 0 else []
+        assert parser.parse_last_n_logs(filepath_pattern, n=n) == expected_logs
+    assert parser.parse_last_log(str(tmp_path / "missing.jsonl")) is None
+
+
+def test_parse_since(tmp_path):
+    file_path = tmp_path / "metric_log.jsonl"
+    filepath_pattern = str(tmp_path / "metric_log.jsonl*")
+    parser = MetricParser()
+
+    def write_lines(path, steps, end="\n"):
+        with open(path, "a") as f:
+            for step in steps:
+                f.write(json.dumps({"step": step, "logbook_type": "metric"}) + end)
+
+    def parse_steps(checkpoint):
+        logs = parser.parse_since(filepath_pattern, checkpoint=checkpoint)
+        return [log["step"] for log in logs]
+
+    checkpoint = {}
+    write_lines(file_path, range(3))
+    assert parse_steps(checkpoint) == [0, 1, 2]
+    assert parse_steps(checkpoint) == []
+
+    # partially written lines are parsed once they are complete.
+    write_lines(file_path, [3])
+    write_lines(file_path, [4], end="")
+    assert parse_steps(checkpoint) == [3]
+    with open(file_path, "a") as f:
+        f.write("\n")
+    # the checkpoint can be persisted as JSON.
+    checkpoint = json.loads(json.dumps(checkpoint))
+    assert parse_steps(checkpoint) == [4]
+
+    # rotated files are parsed from the checkpointed offset and the new
+    # file is parsed from the start.
+    write_lines(file_path, [5])
+    file_path.rename(tmp_path / "metric_log.jsonl.1")
+    write_lines(file_path, [6])
+    assert sorted(parse_steps(checkpoint)) == [5, 6]
+    assert len(checkpoint) == 2
+
+    # truncated files are parsed from the start.
+    file_path.write_text("")
+    (tmp_path / "metric_log.jsonl.1").unlink()
+    assert parse_steps(checkpoint) == []
+    write_lines(file_path, [7])
+    assert parse_steps(checkpoint) == [7]
+    assert list(checkpoint) == [str(file_path)]
+
+    # files that are rewritten in place (same inode) and grow past the
+    # checkpointed offset are parsed from the start.
+    file_path.write_text("")
+    write_lines(file_path, range(10, 15))
+    assert parse_steps(checkpoint) == list(range(10, 15))
+
+
+def test_parse_since_skips_removed_files(tmp_path, monkeypatch):
+    write_metric_logs(tmp_path, 3)
+    file_path = str(tmp_path / "metric_log.jsonl")
+    missing_file_path = str(tmp_path / "missing_log.jsonl")
+    # the missing file is removed after globbing.
+    monkeypatch.setattr(
+        glob, "iglob", lambda pattern: iter([missing_file_path, file_path])
+    )
+    checkpoint = {missing_file_path: {"inode": 0, "offset": 10}}
+    logs = list(MetricParser().parse_since("*", checkpoint=checkpoint))
+    assert [log["step"] for log in logs] == [0, 1, 2]
+    assert list(checkpoint) == [file_path]
+
+
+def test_follow(tmp_path):
+    write_metric_logs(tmp_path, 5)
+    filepath_pattern = str(tmp_path / "metric_log.jsonl")
+    parser = MetricParser()
+    checkpoint = {}
+    logs = parser.follow(filepath_pattern, checkpoint=checkpoint, poll_interval=0.01)
+    assert [next(logs)["step"] for _ in range(5)] == list(range(5))
+    with open(filepath_pattern, "a") as f:
+        f.write(json.dumps({"step": 5, "logbook_type": "metric"}) + "\n")
+    assert next(logs)["step"] == 5
+    logs.close()
+    assert checkpoint[filepath_pattern]["offset"] == os.path.getsize(filepath_pattern)
+
+
+def get_steps(logs):
+    return [log["step"] for log in logs]
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_parse_step_range(tmp_path, workers):
+    logbook = make_logbook(tmp_path, write_to_console=False, index_every_n_lines=8)
+    for step in range(100):
+        logbook.write_metric({"step": step, "loss": 1.0 / (step + 1)})
+        if step % 10 == 0:
+            logbook.write_message({"message": f"step {step}"})
+    logbook.close()
+    file_path = str(tmp_path / "metric_log.jsonl")
+    index = load_index(file_path, step_key="step")
+    assert index.blocks == build_index(file_path, "step", lines_per_block=8).blocks
+    assert index.get_byte_ranges((50, 60), os.path.getsize(file_path)) == [
+        (index.blocks[6]["start"], index.blocks[7]["end"])
+    ]
+
+    parser = MetricParser()
+    logs = parser.parse(
+        file_path, step_range=(50, 60), workers=workers, executor="thread"
+    )
+    assert get_steps(logs) == list(range(50, 61))
+    logs = parser.parse(str(tmp_path / "*"), step_range=(95, 200))
+    assert get_steps(logs) == list(range(95, 100))
+    # the index files are not parsed as logs.
+    info = Parser().parse(tmp_path).info
+    assert [len(logs) for logs in info.values()] == [10]
+    assert all("logbook_type" in log for log in parser.parse(str(tmp_path / "*")))
+
+
+def test_parse_step_range_with_missing_or_stale_index(tmp_path):
+    write_metric_logs(tmp_path, 30)
+    file_path = str(tmp_path / "metric_log.jsonl")
+    parser = MetricParser()
+    # the missing index is rebuilt.
+    assert get_steps(parser.parse(file_path, step_range=(10, 12))) == [10, 11, 12]
+    assert os.path.exists(get_index_path(file_path))
+
+    # the index of a replaced file is rebuilt.
+    os.remove(file_path)
+    write_metric_logs(tmp_path, 5)
+    assert get_steps(parser.parse(file_path, step_range=(2, 12))) == [2, 3, 4]
+
+    # lines appended after the index are parsed.
+    logbook = make_logbook(tmp_path, write_to_console=False, index_every_n_lines=2)
+    for step in range(5, 10):
+        logbook.write_metric({"step": step})
+    logbook.flush()
+    assert get_steps(parser.parse(file_path, step_range=(3, 100))) == list(range(3, 10))
+    logbook.close()
+    index = load_index(file_path, step_key="step")
+    assert index.end == os.path.getsize(file_path)
+    assert get_steps(parser.parse(file_path, step_range=(9, 9))) == [9]
+
+
+@pytest.mark.parametrize("format", ["arrow", "parquet"])
+def test_parse_columnar_logs(tmp_path, format):
+    pytest.importorskip("pyarrow")
+    logs = []
+    for step in range(50):
+        log = {"step": step, "mode": "train" if step % 2 else "eval"}
+        log["nested"] = {"acc": step * 10}
+        if step >= 30:
+            log["loss"] = 1.0 / (step + 1)
+        logs.append(log)
+    jsonl_dir, columnar_dir = tmp_path / "jsonl", tmp_path / "columnar"
+    logbook = make_logbook(jsonl_dir, write_to_console=False)
+    for log in logs:
+        logbook.write_metric(log)
+    logbook.close()
+    logbook = make_logbook(
+        columnar_dir,
+        write_to_console=False,
+        columnar_config={"format": format, "rows_per_batch": 8},
+    )
+    logbook.write_config({"lr": 0.1})
+    for log in logs[:25]:
+        logbook.write_metric(log)
+    # every flush writes a new segment.
+    logbook.flush()
+    for log in logs[25:]:
+        logbook.write_metric(log)
+    logbook.close()
+    os.remove(columnar_dir / "metric_log.jsonl")
+    assert len(glob.glob(str(columnar_dir / f"metric_log.*.{format}"))) == 2
+
+    parser = MetricParser()
+    expected_df = parser.parse_as_df(str(jsonl_dir / "*"))["all"]
+    df = parser.parse_as_df(str(columnar_dir / "*"))["all"]
+    pd.testing.assert_frame_equal(df[expected_df.columns], expected_df)
+    df = parser.parse_as_columnar_df(
+        str(columnar_dir / "*"), columns=["step", "loss"], where={"mode": "train"}
+    )
+    expected_df = parser.parse_as_columnar_df(
+        str(jsonl_dir / "*"), columns=["step", "loss"], where={"mode": "train"}
+    )
+    pd.testing.assert_frame_equal(df, expected_df)
+    logs = parser.parse(str(columnar_dir / "*"))
+    assert sorted(get_steps(logs)) == list(range(50))
+    logs = parser.parse(str(columnar_dir / "*"), step_range=(5, 7))
+    assert sorted(get_steps(logs)) == [5, 6, 7]
+
+    experiment = Parser().parse(columnar_dir)
+    assert experiment.configs[0]["lr"] == 0.1
+    assert experiment.metrics["all"]["step"].tolist() == list(range(50))
+
+
+@pytest.mark.parametrize("metric_compression", [None, "uncompressed"])
+def test_lazy_deserialize(tmp_path, metric_compression):
+    logbook = make_logbook(tmp_path / "logs", write_to_console=False)
+    logbook.write_config({"lr": 0.1})
+    for step in range(10):
+        logbook.write_metric({"step": step, "loss": 1.0 / (step + 1)})
+    logbook.write_message({"message": "done"})
+    logbook.close()
+    experiment = Parser().parse(tmp_path / "logs")
+    experiment.serialize(
+        str(tmp_path / "experiment"), metric_compression=metric_compression
+    )
+
+    lazy_experiment = deserialize(str(tmp_path / "experiment"), lazy=True)
+    assert lazy_experiment.config == experiment.config
+    assert lazy_experiment._info is None
+    assert list(lazy_experiment.metrics) == ["all"]
+    assert lazy_experiment.metrics.paths
+    pd.testing.assert_frame_equal(
+        lazy_experiment.metrics["all"], experiment.metrics["all"]
+    )
+    assert not lazy_experiment.metrics.paths
+    assert lazy_experiment.info == experiment.info
+    assert lazy_experiment == experiment == deserialize(str(tmp_path / "experiment"))
+
+
+def test_catalog(tmp_path):
+    configs = [
+        {"lr": 1e-2, "dataset": "mnist", "model": {"depth": 2}},
+        {"lr": 1e-4, "dataset": "mnist", "model": {"depth": 4}},
+        {"lr": 1e-4, "dataset": "cifar", "model": {"depth": 4}},
+    ]
+    for index, config in enumerate(configs):
+        logbook = make_logbook(tmp_path / f"logs_{index}", write_to_console=False)
+        logbook.write_config(config)
+        for step in range(5):
+            logbook.write_metric({"step": step, "loss": (index + 1) / (step + 1)})
+        logbook.close()
+        experiment = Parser().parse(tmp_path / f"logs_{index}")
+        experiment.serialize(str(tmp_path / "experiments" / str(index)))
+
+    catalog = Catalog(str(tmp_path / "catalog.db"))
+    assert catalog.update_from_root(str(tmp_path / "experiments")) == 3
+    assert catalog.update_from_root(str(tmp_path / "experiments")) == 0
+    root = os.path.abspath(tmp_path / "experiments")
+    assert catalog.select({"config.lr": ("<", 1e-3), "config.dataset": "mnist"}) == [
+        os.path.join(root, "1")
+    ]
+    assert catalog.select({"config.model.depth": ("in", [2, 3])}) == [
+        os.path.join(root, "0")
+    ]
+    assert catalog.select({"metric.all.loss.last": (">=", 0.4)}) == [
+        os.path.join(root, "1"),
+        os.path.join(root, "2"),
+    ]
+    assert catalog.select({"metric.all.loss.min": ("<", 0.0)}) == []
+    assert catalog.select({"config.missing": 1}) == []
+    with pytest.raises(ValueError):
+        catalog.select({"config.lr": ("~", 1)})
+    experiments = catalog.load({"config.dataset": "cifar"})
+    assert len(experiments) == 1
+    assert experiments[0].config["dataset"] == "cifar"
+    assert len(catalog.to_df()) == 3
+    catalog.close()
+
+    # the catalog is updated incrementally (and persisted).
+    experiment.serialize(str(tmp_path / "experiments" / "3"))
+    catalog = Catalog(str(tmp_path / "catalog.db"))
+    assert catalog.update_from_root(str(tmp_path / "experiments")) == 1
+    assert len(catalog.select({"config.dataset": "cifar"})) == 2
+    catalog.close()
+
+
+def test_lazy_experiment_sequence(tmp_path):
+    for index in range(4):
+        logbook = make_logbook(tmp_path / f"logs_{index}", write_to_console=False)
+        logbook.write_config({"seed": index, "dataset": ["mnist", "cifar"][index % 2]})
+        for step in range(3):
+            logbook.write_metric({"step": step, "loss": index + step})
+        logbook.close()
+        experiment = Parser().parse(tmp_path / f"logs_{index}")
+        experiment.serialize(str(tmp_path / "experiments" / str(index)))
+    experiments = ExperimentSequence(
+        [deserialize(str(tmp_path / "experiments" / str(index))) for index in range(4)]
+    )
+
+    sequence = LazyExperimentSequence(str(tmp_path / "experiments" / "*"), cache_size=2)
+    assert len(sequence) == 4
+    assert len(sequence._cache) == 0
+    assert list(sequence) == list(experiments)
+    assert len(sequence._cache) == 2
+    assert sequence[-1] == experiments[-1]
+    assert list(sequence[1:3]) == list(experiments[1:3])
+
+    def is_mnist(experiment):
+        return experiment.config["dataset"] == "mnist"
+
+    filtered = sequence.filter(is_mnist)
+    assert isinstance(filtered, LazyExperimentSequence)
+    assert list(filtered) == list(experiments.filter(is_mnist))
+    assert len(filtered) == 2
+    assert filtered[1] == experiments[2]
+    assert filtered[-1] == experiments[2]
+    with pytest.raises(IndexError):
+        filtered[2]
+
+    def get_dataset(experiment):
+        return experiment.config["dataset"]
+
+    groups = sequence.groupby(get_dataset)
+    expected_groups = experiments.groupby(get_dataset)
+    assert list(groups) == list(expected_groups)
+    for key, group in groups.items():
+        assert list(group) == list(expected_groups[key])
+        assert group.aggregate() == expected_groups[key].aggregate()
+    assert sequence.materialize() == experiments
+
+    sequence = LazyExperimentSequence(
+        [tmp_path / "experiments" / "3", tmp_path / "experiments" / "0"]
+    )
+    assert [experiment.config["seed"] for experiment in sequence] == [3, 0]
+
+    catalog = Catalog(str(tmp_path / "catalog.db"))
+    catalog.update_from_root(str(tmp_path / "experiments"))
+    sequence = catalog.stream({"config.dataset": "cifar"})
+    assert list(sequence) == list(experiments.filter(lambda exp: not is_mnist(exp)))
+    catalog.close()
+
+
+@pytest.mark.parametrize(
+    "fill, expected",
+    [
+        ("interpolate", [[0.0, 1.0, 2.0, 3.0], [10.0, 15.0, 20.0, float("nan")]]),
+        ("ffill", [[0.0, 1.0, 2.0, 3.0], [10.0, 10.0, 20.0, 20.0]]),
+        (None, [[0.0, 1.0, 2.0, 3.0], [10.0, float("nan"), 20.0, float("nan")]]),
+    ],
+)
+def test_align_runs(fill, expected):
+    dfs = [
+        pd.DataFrame({"step": [0, 1, 2, 3], "loss": [0.0, 1.0, 2.0, 3.0]}),
+        pd.DataFrame({"step": [2, 0, 2], "loss": [30.0, 10.0, 20.0]}),
+        pd.DataFrame({"step": [0, 1]}),
+    ]
+    steps, values = align_runs(dfs, column="loss", fill=fill)
+    assert steps.tolist() == [0, 1, 2, 3]
+    np.testing.assert_array_equal(values, [*expected, [float("nan")] * 4])
+
+
+def test_aggregate_metric_statistics():
+    rng = np.random.default_rng(0)
+    runs = [
+        pd.DataFrame({"step": np.arange(100), "loss": rng.random(100), "mode": "train"})
+        for _ in range(5)
+    ]
+    runs[0] = runs[0].iloc[:50]
+    experiments = ExperimentSequence(
+        [Experiment(configs=[], metrics={"train": run}) for run in runs]
+    )
+    experiment = experiments.aggregate(
+        aggregate_metrics=functools.partial(
+            aggregate_metric_statistics,
+            fill=None,
+            statistics=STATISTICS,
+            quantiles=[0.25, 0.75],
+            confidence=0.95,
+            seed=0,
+        )
+    )
+    df = experiment.metrics["train"]
+    expected = pd.concat(runs).groupby("step")["loss"]
+    assert df["step"].tolist() == list(range(100))
+    np.testing.assert_allclose(df["loss_mean"], expected.mean())
+    np.testing.assert_allclose(df["loss_std"], expected.std())
+    np.testing.assert_allclose(df["loss_sem"], expected.sem())
+    np.testing.assert_allclose(df["loss_min"], expected.min())
+    np.testing.assert_allclose(df["loss_max"], expected.max())
+    np.testing.assert_allclose(df["loss_median"], expected.median())
+    np.testing.assert_allclose(df["loss_q0.25"], expected.quantile(0.25))
+    assert df["loss_count"].tolist() == [5] * 50 + [4] * 50
+    assert (df["loss_ci_low"] <= df["loss_mean"]).all()
+    assert (df["loss_mean"] <= df["loss_ci_high"]).all()
+
+    df = aggregate_runs(runs, fill="ffill", statistics=["count"])
+    assert df.columns.tolist() == ["step", "loss_count"]
+    assert df["loss_count"].tolist() == [5] * 100
+
+
+@pytest.mark.parametrize(
+    "workers, executor", [(None, "process"), (2, "thread"), (2, "process")]
+)
+def test_serialize_all_and_from_dirs(tmp_path, workers, executor):
+    experiments = ExperimentSequence(
+        [
+            Experiment(
+                configs=[{"seed": index}],
+                metrics={
+                    "train": pd.DataFrame(
+                        {"step": range(index + 1), "loss": [0.5] * (index + 1)}
+                    )
+                },
+                info={"messages": [{"index": index}]},
+            )
+            for index in range(5)
+        ]
+        + [Experiment(configs=[], metrics={"all": pd.DataFrame()})]
+    )
+    progress = []
+    dir_paths = experiments.serialize_all(
+        str(tmp_path),
+        workers=workers,
+        executor=executor,
+        progress=lambda done, total: progress.append((done, total)),
+    )
+    assert dir_paths == [f"{tmp_path}/{index}" for index in range(6)]
+    assert progress == [(done, 6) for done in range(1, 7)]
+
+    progress = []
+    loaded_experiments = ExperimentSequence.from_dirs(
+        list(reversed(dir_paths)),
+        workers=workers,
+        executor=executor,
+        progress=lambda done, total: progress.append((done, total)),
+    )
+    assert list(loaded_experiments) == list(reversed(experiments))
+    assert progress == [(done, 6) for done in range(1, 7)]
+
+    with pytest.raises(ValueError):
+        experiments.serialize_all(str(tmp_path), dir_names=["0"])
+
+
+def test_parse_cache(tmp_path, monkeypatch):
+    def write_logs(logger_dir, steps):
+        logbook = make_logbook(str(logger_dir), write_to_console=False)
+        if steps.start == 0:
+            logbook.write_config({"lr": 0.1})
+        for step in steps:
+            logbook.write_metric({"step": step, "loss": 1.0 / (step + 1)})
+        logbook.write_message({"message": f"done {steps.stop}"})
+        logbook.close()
+
+    write_logs(tmp_path / "logs", range(0, 10))
+    cache = ParseCache(str(tmp_path / "cache"), max_entries=1)
+    parsed_chunks = []
+    parse_file_chunks = cache.parser._parse_file_chunks
+
+    def _parse_file_chunks(file_chunks, **kwargs):
+        file_chunks = list(file_chunks)
+        parsed_chunks.extend(file_chunks)
+        return parse_file_chunks(file_chunks=file_chunks, **kwargs)
+
+    monkeypatch.setattr(cache.parser, "_parse_file_chunks", _parse_file_chunks)
+    assert cache.parse(tmp_path / "logs") == Parser().parse(tmp_path / "logs")
+    assert {start for _, start, _ in parsed_chunks} == {0}
+    assert len(cache) == 1
+
+    # unchanged logs are deserialized from the cache.
+    parsed_chunks.clear()
+    assert cache.parse(tmp_path / "logs") == Parser().parse(tmp_path / "logs")
+    assert not parsed_chunks
+
+    # only the appended (complete) lines are parsed.
+    log_path = str(tmp_path / "logs" / "metric_log.jsonl")
+    old_size = os.path.getsize(log_path)
+    write_logs(tmp_path / "logs", range(10, 15))
+    size = os.path.getsize(log_path)
+    with open(log_path, "a") as f:
+        f.write('{"step": 15, "loss": 0.0')
+    experiment = cache.parse(tmp_path / "logs")
+    assert (log_path, old_size, size) in parsed_chunks
+    assert len(parsed_chunks) == 2
+    assert experiment.metrics["all"]["step"].tolist() == list(range(15))
+    assert [len(logs) for logs in experiment.info.values()] == [2]
+    with open(log_path, "a") as f:
+        f.write(', "logbook_type": "metric"}\n')
+    expected_experiment = Parser().parse(tmp_path / "logs")
+    assert cache.parse(tmp_path / "logs") == expected_experiment
+    assert expected_experiment.metrics["all"]["step"].tolist() == list(range(16))
+
+    # the replaced files are parsed again.
+    os.remove(log_path)
+    write_logs(tmp_path / "logs", range(0, 3))
+    parsed_chunks.clear()
+    assert cache.parse(tmp_path / "logs") == Parser().parse(tmp_path / "logs")
+    assert {start for _, start, _ in parsed_chunks} == {0}
+
+    # the least recently used experiments are removed.
+    write_logs(tmp_path / "other_logs", range(0, 3))
+    cache.parse(tmp_path / "other_logs")
+    assert len(cache) == 1
+
+
+def test_downsample(tmp_path):
+    logs = [
+        {"mode": mode, "step": step, "loss": float((step * 7) % 11), "name": "a"}
+        for step in range(100)
+        for mode in ["train", "eval"]
+    ]
+    df = pd.DataFrame(logs)
+    for function, kwargs in [
+        (downsample.every_k, {"k": 3}),
+        (downsample.bucket_mean, {"bucket_size": 10}),
+        (downsample.min_max, {"y_key": "loss", "bucket_size": 10}),
+    ]:
+        streamed = pd.DataFrame(function(iter(logs), group_key="mode", **kwargs))
+        df_function = getattr(downsample, f"{function.__name__}_df")
+        expected = df_function(df, group_key="mode", **kwargs)
+        pd.testing.assert_frame_equal(
+            streamed.sort_values(["mode", "step"]).reset_index(drop=True),
+            expected.sort_values(["mode", "step"]).reset_index(drop=True),
+            check_dtype=False,
+        )
+    means = list(downsample.bucket_mean(logs, bucket_size=50, group_key="mode"))
+    assert [log["step"] for log in means] == [0, 0, 50, 50]
+    assert means[0]["loss"] == np.mean([(step * 7) % 11 for step in range(50)])
+
+    # the first and the last logs and one log per (complete) bucket.
+    train_logs = [log for log in logs if log["mode"] == "train"]
+    selected = list(downsample.lttb(train_logs, y_key="loss", bucket_size=10))
+    steps = [log["step"] for log in selected]
+    assert steps[0] == 0 and steps[-1] == 99 and len(steps) == 12
+    assert [step // 10 for step in steps[1:-1]] == list(range(10))
+    selected_df = downsample.lttb_df(df, y_key="loss", num_points=12, group_key="mode")
+    assert selected_df["mode"].value_counts().to_dict() == {"train": 12, "eval": 12}
+    assert selected_df.groupby("mode")["step"].agg(["min", "max"]).values.tolist() == [
+        [0, 99],
+        [0, 99],
+    ]
+    assert len(downsample.lttb_df(df.iloc[:5], y_key="loss", num_points=12)) == 5
+
+    # downsample while parsing.
+    logbook = make_logbook(str(tmp_path), write_to_console=False)
+    for log in logs:
+        logbook.write_metric(log)
+    logbook.close()
+    metric_dfs = MetricParser().parse_as_df(
+        str(tmp_path / "metric_log.jsonl"),
+        downsample=functools.partial(downsample.every_k, k=10, group_key="mode"),
+    )
+    assert len(metric_dfs["all"]) == 20
+    assert metric_dfs["all"]["step"].tolist()[:4] == [0, 0, 10, 10]
+
+
+def test_reduce_metrics(tmp_path):
+    logs = [
+        {"mode": mode, "epoch": step // 10, "step": step, "loss": float(step % 7)}
+        for step in range(50)
+        for mode in ["train", "eval"]
+    ]
+    logs.append({"epoch": 0, "loss": 100.0})
+    logbook = make_logbook(str(tmp_path), write_to_console=False)
+    for log in logs:
+        logbook.write_metric(log)
+    logbook.close()
+    reducers = {
+        "loss": [
+            "count",
+            "sum",
+            "mean",
+            "last",
+            "min",
+            "max",
+            functools.partial(Histogram, bin_edges=[0, 2, 4, 6]),
+        ],
+        "step": ["last"],
+    }
+    dfs = MetricParser().parse_as_reduced_df(
+        str(tmp_path / "metric_log.jsonl"),
+        reducers=reducers,
+        group_by="mode",
+        index_by="epoch",
+    )
+    assert set(dfs) == {"train", "eval"}
+    df = pd.DataFrame(logs[:-1])
+    expected = (
+        df[df["mode"] == "train"]
+        .groupby("epoch")
+        .agg(
+            loss_count=("loss", "count"),
+            loss_sum=("loss", "sum"),
+            loss_mean=("loss", "mean"),
+            loss_last=("loss", "last"),
+            loss_min=("loss", "min"),
+            loss_max=("loss", "max"),
+        )
+        .reset_index()
+    )
+    pd.testing.assert_frame_equal(
+        dfs["train"].drop(columns=["loss_histogram", "step_last"]),
+        expected,
+        check_dtype=False,
+    )
+    assert dfs["train"]["step_last"].tolist() == [9, 19, 29, 39, 49]
+    assert (
+        dfs["train"]["loss_histogram"][0]
+        == np.histogram([step % 7 for step in range(10)], bins=[0, 2, 4, 6])[0].tolist()
+    )
+
+    # without grouping, every log is aggregated in one row.
+    dfs = reduce_metrics(logs, reducers={"loss": ["count", "max"]})
+    assert dfs["all"].to_dict("records") == [{"loss_count": 101, "loss_max": 100.0}]
+    with pytest.raises(ValueError):
+        reduce_metrics(logs, reducers={"loss": ["median"]})
+
+
+@pytest.mark.parametrize("compression", [None, "gzip", "zstd"])
+def test_parse_segments(tmp_path, compression):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    logs = [{"step": step, "loss": 1.0 / (step + 1)} for step in range(100)]
+    logbook = make_logbook(
+        str(tmp_path),
+        write_to_console=False,
+        flush_every_n_lines=7,
+        segment_max_bytes=500,
+        compression=compression,
+    )
+    logbook.write_config({"lr": 0.1})
+    for log in logs[:50]:
+        logbook.write_metric(log)
+    logbook.flush()
+    checkpoint = {}
+    parser = MetricParser()
+    pattern = str(tmp_path / "metric_log.jsonl")
+    assert get_steps(parser.parse_since(pattern, checkpoint)) == list(range(50))
+    for log in logs[50:]:
+        logbook.write_metric(log)
+    logbook.close()
+    suffix = {None: "", "gzip": ".gz", "zstd": ".zst"}[compression]
+    assert len(glob.glob(str(tmp_path / f"metric_log.*.jsonl{suffix}"))) > 2
+
+    assert get_steps(parser.parse_since(pattern, checkpoint)) == list(range(50, 100))
+    assert get_steps(parser.parse(pattern)) == list(range(100))
+    assert get_steps(parser.parse(str(tmp_path / "*"), workers=2)) == list(range(100))
+    assert get_steps(parser.parse_last_n_logs(pattern, n=3)) == [97, 98, 99]
+    assert get_steps(parser.parse(pattern, step_range=(20, 22))) == [20, 21, 22]
+    assert parser.parse_as_df(pattern)["all"]["step"].tolist() == list(range(100))
+    experiment = Parser().parse(tmp_path)
+    assert experiment.configs[0]["lr"] == 0.1
+    assert experiment.metrics["all"]["step"].tolist() == list(range(100))
+    cache = ParseCache(str(tmp_path / "cache"))
+    assert cache.parse(tmp_path) == experiment
+
+
+def test_parse_truncated_compressed_segment(tmp_path):
+    logbook = make_logbook(
+        str(tmp_path),
+        write_to_console=False,
+        flush_every_n_lines=5,
+        compression="gzip",
+    )
+    for step in range(10):
+        logbook.write_metric({"step": step})
+    logbook.close()
+    (path,) = glob.glob(str(tmp_path / "metric_log.*.jsonl.gz"))
+    with open(path, "ab") as f:
+        # a member that was being written when the process crashed.
+        f.write(gzip.compress(b'{"step": 10}\n')[:15])
+    assert get_steps(MetricParser().parse(path)) == list(range(10))
@@ -0,0 +1,81 @@
+import json
+import math
+
+import numpy as np
+import pytest
+
+from ml_logger.serializer import SERIALIZERS, get_serializer
+
+
+def _get_serializer(name):
+    if name != "json":
+        pytest.importorskip(name)
+    return get_serializer(name=name)
+
+
+@pytest.mark.parametrize("name", list(SERIALIZERS))
+def test_serializer_with_numpy_values(name):
+    serializer = _get_serializer(name)
+    log = {
+        "alpha": np.float64(0.5),
+        "beta": np.float32(0.25),
+        "gamma": np.int64(1),
+        "delta": np.int32(10),
+        "array": np.arange(3),
+        "nested": {"lr": 0.01, "datasets": ["mnist", "cifar"]},
+        "none": None,
+    }
+    expected_log = {
+        "alpha": 0.5,
+        "beta": 0.25,
+        "gamma": 1,
+        "delta": 10,
+        "array": [0, 1, 2],
+        "nested": {"lr": 0.01, "datasets": ["mnist", "cifar"]},
+        "none": None,
+    }
+    log_str = serializer.dumps(log)
+    assert json.loads(log_str) == expected_log
+    assert serializer.loads(log_str) == expected_log
+    assert serializer.loads(log_str.encode("utf-8")) == expected_log
+
+
+@pytest.mark.parametrize("name", list(SERIALIZERS))
+def test_serializer_reads_logs_written_by_json(name):
+    serializer = _get_serializer(name)
+    big_int = 1 << 70
+    log = serializer.loads(json.dumps({"loss": float("nan"), 1: big_int}))
+    assert math.isnan(log["loss"])
+    assert log["1"] == big_int
+    with pytest.raises(json.JSONDecodeError):
+        serializer.loads("This is not a JSON string")
+
+
+@pytest.mark.parametrize("name", list(SERIALIZERS))
+def test_serializer_with_invalid_values(name):
+    serializer = _get_serializer(name)
+    with pytest.raises(TypeError):
+        serializer.dumps({"object": object()})
+
+
+@pytest.mark.parametrize("name", list(SERIALIZERS))
+def test_serializer_preserves_non_finite_floats(name):
+    serializer = _get_serializer(name)
+    log = {
+        "loss": float("nan"),
+        "nested": {"best": float("inf"), "worst": np.float32("-inf")},
+        "array": np.array([1.0, np.nan]),
+        "none": None,
+    }
+    log_str = serializer.dumps(log)
+    assert log_str == get_serializer(name="json").dumps(log)
+    log = serializer.loads(log_str)
+    assert math.isnan(log["loss"])
+    assert log["nested"] == {"best": math.inf, "worst": -math.inf}
+    assert math.isnan(log["array"][1])
+    assert log["none"] is None
+
+
+def test_invalid_serializer():
+    with pytest.raises(ValueError):
+        get_serializer(name="invalid")
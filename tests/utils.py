@@ -4,17 +4,18 @@ from ml_logger import logbook as ml_logbook
 from ml_logger.types import ConfigType
 
 
-def make_logbook_config(logger_dir: str) -> ConfigType:
+def make_logbook_config(logger_dir: str, **kwargs) -> ConfigType:
     return ml_logbook.make_config(
         logger_dir=logger_dir,
         wandb_config=None,
         tensorboard_config=None,
         mlflow_config=None,
+        **kwargs,
     )
 
 
-def make_logbook(logger_dir: str) -> ml_logbook.LogBook:
-    logbook = ml_logbook.LogBook(config=make_logbook_config(logger_dir))
+def make_logbook(logger_dir: str, **kwargs) -> ml_logbook.LogBook:
+    logbook = ml_logbook.LogBook(config=make_logbook_config(logger_dir, **kwargs))
     return logbook
 
 